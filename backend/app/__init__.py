@@ -1,4 +1,3 @@
 """
 NY Civic Sphere backend package.
 """
-
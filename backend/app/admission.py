@@ -0,0 +1,271 @@
+"""
+Admission control for expensive endpoints.
+
+Chat and AI summary requests hold a threadpool worker for seconds while they wait on Azure OpenAI or Azure
+Functions. ``AdmissionMiddleware`` gates those routes before they reach the threadpool:
+
+* a per-client token bucket rejects bursts with ``429``. Clients are keyed by their ``X-API-Key`` when it is one of
+  the configured keys, else by client IP, so made-up keys cannot buy fresh buckets. Behind a reverse proxy the
+  client IP is the one the server takes from a trusted proxy's headers (``--proxy-headers``), not the proxy's;
+* a per-route concurrency limit with a bounded wait queue rejects overflow with ``503``.
+
+Both responses carry ``Retry-After`` and are sent without touching the application, so cheap read routes keep
+their threads and their latency while the expensive routes are saturated. Limits are per worker process.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from .config import Settings
+from .metrics import REGISTRY
+
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "admission_rejections_total", "Requests rejected before reaching the application.", ("policy", "reason")
+)
+ADMISSION_IN_FLIGHT = REGISTRY.gauge("admission_in_flight", "Admitted requests currently running.", ("policy",))
+ADMISSION_QUEUED = REGISTRY.gauge("admission_queued", "Requests waiting for a concurrency slot.", ("policy",))
+ADMISSION_WAIT = REGISTRY.histogram(
+    "admission_queue_wait_seconds", "Time admitted requests spent waiting for a concurrency slot.", ("policy",)
+)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens per second up to ``capacity``."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Consume one token; return 0 on success or the seconds until a token will be available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    """Token bucket per client key, holding at most ``max_clients`` buckets (least recently seen evicted)."""
+
+    def __init__(self, per_minute: float, burst: float, max_clients: int = 10000) -> None:
+        self._rate = per_minute / 60.0
+        self._burst = max(1.0, burst)
+        self._max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self._rate, self._burst, now)
+                if len(self._buckets) > self._max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            return bucket.take(now)
+
+
+class ConcurrencyLimiter:
+    """
+    At most ``limit`` requests run at once; up to ``queue_size`` more wait up to ``queue_timeout`` seconds.
+    Anything beyond that is rejected immediately.
+    """
+
+    def __init__(self, policy: str, limit: int, queue_size: int, queue_timeout: float) -> None:
+        self.policy = policy
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Smoothed service time, used to suggest a Retry-After that matches how fast the queue drains.
+        self._service_seconds = 1.0
+
+    def _sem(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + self.active) / max(1, self.limit)
+        return max(1, math.ceil(backlog * self._service_seconds))
+
+    async def acquire(self) -> bool:
+        semaphore = self._sem()
+        if semaphore.locked():
+            if self.waiting >= self.queue_size:
+                return False
+            self.waiting += 1
+            ADMISSION_QUEUED.set(self.waiting, policy=self.policy)
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+                ADMISSION_QUEUED.set(self.waiting, policy=self.policy)
+            ADMISSION_WAIT.observe(time.perf_counter() - start, policy=self.policy)
+        else:
+            await semaphore.acquire()
+            ADMISSION_WAIT.observe(0.0, policy=self.policy)
+        self.active += 1
+        ADMISSION_IN_FLIGHT.set(self.active, policy=self.policy)
+        return True
+
+    def release(self, elapsed: float) -> None:
+        self.active -= 1
+        ADMISSION_IN_FLIGHT.set(self.active, policy=self.policy)
+        self._service_seconds = 0.8 * self._service_seconds + 0.2 * elapsed
+        self._sem().release()
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    name: str
+    routes: Tuple[Tuple[str, str], ...]  # (method, path) pairs, matched exactly
+    max_concurrency: int
+    queue_size: int
+    rate_per_minute: float
+    # Requests a client may make back to back, however low the rate (a page load can fire several).
+    min_burst: float = 1.0
+
+
+def policies_from_settings(settings: Settings) -> List[AdmissionPolicy]:
+    return [
+        AdmissionPolicy(
+            name="chat",
+            routes=(("POST", "/api/chat"), ("POST", "/api/chat/batch")),
+            max_concurrency=settings.admission_chat_concurrency,
+            queue_size=settings.admission_chat_queue,
+            rate_per_minute=settings.admission_chat_rate_per_minute,
+            min_burst=settings.admission_min_burst,
+        ),
+        AdmissionPolicy(
+            name="ai_summary",
+            routes=(("POST", "/api/dashboard/ai-summary"),),
+            max_concurrency=settings.admission_ai_summary_concurrency,
+            queue_size=settings.admission_ai_summary_queue,
+            rate_per_minute=settings.admission_ai_summary_rate_per_minute,
+            min_burst=settings.admission_min_burst,
+        ),
+    ]
+
+
+class _Gate:
+    __slots__ = ("policy", "limiter", "rate_limiter")
+
+    def __init__(self, policy: AdmissionPolicy, queue_timeout: float) -> None:
+        self.policy = policy
+        self.limiter = ConcurrencyLimiter(policy.name, policy.max_concurrency, policy.queue_size, queue_timeout)
+        # A client may burst up to ten seconds' worth of its allowance, and at least ``min_burst`` requests.
+        burst = max(policy.min_burst, policy.rate_per_minute / 6.0)
+        self.rate_limiter = ClientRateLimiter(policy.rate_per_minute, burst) if policy.rate_per_minute > 0 else None
+
+
+def hash_api_key(api_key: bytes) -> str:
+    # Never keep raw keys in memory longer than needed.
+    return hashlib.sha256(api_key).hexdigest()
+
+
+def client_key(scope, trust_forwarded_for: bool = False, api_keys: FrozenSet[str] = frozenset()) -> str:
+    """
+    Rate-limit key for a request: its ``X-API-Key`` if the key's hash is in ``api_keys``, else the client IP.
+    Unknown keys are ignored rather than trusted, so rotating them does not escape the per-IP limit.
+    """
+    headers = dict(scope.get("headers") or [])
+    api_key = headers.get(b"x-api-key")
+    if api_key:
+        digest = hash_api_key(api_key)
+        if digest in api_keys:
+            return "key:" + digest[:16]
+    if trust_forwarded_for and b"x-forwarded-for" in headers:
+        return "ip:" + headers[b"x-forwarded-for"].decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+async def _reject(send, status: int, detail: str, retry_after: int) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(retry_after).encode("ascii")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying ``AdmissionPolicy`` limits by method and path. Requests that match no policy pass
+    straight through.
+    """
+
+    def __init__(
+        self,
+        app,
+        policies: Sequence[AdmissionPolicy] = (),
+        queue_timeout: float = 5.0,
+        trust_forwarded_for: bool = False,
+        api_keys: Sequence[str] = (),
+    ) -> None:
+        self.app = app
+        self.trust_forwarded_for = trust_forwarded_for
+        self._api_keys = frozenset(hash_api_key(key.encode("utf-8")) for key in api_keys if key)
+        self._gates: Dict[Tuple[str, str], _Gate] = {}
+        for policy in policies:
+            if policy.max_concurrency <= 0 and policy.rate_per_minute <= 0:
+                continue
+            gate = _Gate(policy, queue_timeout)
+            for route in policy.routes:
+                self._gates[route] = gate
+
+    async def __call__(self, scope, receive, send) -> None:
+        gate = self._gates.get((scope.get("method", ""), scope.get("path", "").rstrip("/"))) if scope["type"] == "http" else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        policy = gate.policy.name
+        if gate.rate_limiter is not None:
+            wait = gate.rate_limiter.check(client_key(scope, self.trust_forwarded_for, self._api_keys))
+            if wait > 0:
+                ADMISSION_REJECTIONS.inc(policy=policy, reason="rate_limited")
+                await _reject(send, 429, "Too many requests", max(1, math.ceil(wait)))
+                return
+
+        if gate.policy.max_concurrency <= 0:
+            await self.app(scope, receive, send)
+            return
+        if not await gate.limiter.acquire():
+            ADMISSION_REJECTIONS.inc(policy=policy, reason="overloaded")
+            await _reject(send, 503, "Server busy, please retry", gate.limiter.retry_after())
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.limiter.release(time.perf_counter() - start)
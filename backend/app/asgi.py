@@ -0,0 +1,13 @@
+"""
+Server entry point: ``uvicorn app.asgi:app`` / ``gunicorn app.asgi:app``.
+
+Starts the cold-start import timer before ``app.main`` pulls in FastAPI, pydantic and friends, so the report at
+``/debug/startup`` covers them. Scripts, benchmarks and tests import ``app.main`` directly and never install it.
+"""
+from .startup_timing import STARTUP
+
+STARTUP.timer.install()
+
+from .main import app  # noqa: E402
+
+__all__ = ["app"]
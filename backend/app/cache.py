@@ -0,0 +1,316 @@
+"""
+Pluggable cache backends for expensive upstream results.
+
+``LocalCacheBackend`` keeps values in process memory. ``SharedMemoryCacheBackend`` stores them as files on a
+tmpfs directory (``/dev/shm`` on Linux), so every worker process on the host shares one copy. A per-key
+``flock`` ensures only one worker computes a missing value while the others wait for it. tmpfs is RAM, so expired
+entries, idle lock files and abandoned temp files are deleted rather than left to accumulate.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import get_settings
+from .metrics import record_cache_lookup
+
+_EXPIRY = struct.Struct("<d")
+
+
+def _metric_name(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+class CacheBackend(ABC):
+    """Interface every cache tier implements."""
+
+    name = "abstract"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a JSON-serialisable value for ``ttl`` seconds."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Drop a key if present."""
+
+    @abstractmethod
+    def _compute_lock(self, key: str):
+        """Context manager held while a missing value is computed."""
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: float) -> Any:
+        """
+        Return the cached value or compute, store and return it. ``None`` results are returned but never cached
+        so a failing upstream is retried on the next call.
+        """
+        value = self.get(key)
+        if value is not None:
+            record_cache_lookup(_metric_name(key), True)
+            return value
+        with self._compute_lock(key):
+            # Another thread or worker may have filled the key while we waited for the lock.
+            value = self.get(key)
+            if value is not None:
+                record_cache_lookup(_metric_name(key), True)
+                return value
+            record_cache_lookup(_metric_name(key), False)
+            value = compute()
+            if value is not None and ttl > 0:
+                self.set(key, value, ttl)
+            return value
+
+
+class _KeyLocks:
+    """Per-key locks created on demand for single-flight computation within a process."""
+
+    def __init__(self) -> None:
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def __call__(self, key: str) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-process cache; each worker keeps its own copy."""
+
+    name = "local"
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._key_locks = _KeyLocks()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            if len(self._entries) >= self._max_entries and key not in self._entries:
+                # Evict the entry closest to expiry; the cache only holds a handful of hot keys.
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (time.time() + ttl, value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _compute_lock(self, key: str):
+        return self._key_locks(key)
+
+
+class _FileLock:
+    """Cross-process exclusive lock on a lock file, bounded by ``timeout`` so a stuck worker cannot wedge others."""
+
+    def __init__(self, path: Path, timeout: float, thread_lock: threading.Lock) -> None:
+        self._path = path
+        self._timeout = timeout
+        self._thread_lock = thread_lock
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> "_FileLock":
+        import fcntl
+
+        self._thread_lock.acquire()
+        deadline = time.monotonic() + self._timeout
+        while True:
+            if self._fd is None:
+                self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if _same_file(self._fd, self._path):
+                    return self
+                # The sweep deleted the lock file after we opened it; lock the file now at the path instead.
+                os.close(self._fd)
+                self._fd = None
+                continue
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    # Give up waiting and compute locally rather than failing the request.
+                    return self
+                time.sleep(0.01)
+
+    def __exit__(self, *exc_info) -> None:
+        import fcntl
+
+        try:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+        finally:
+            self._fd = None
+            self._thread_lock.release()
+
+
+def _same_file(fd: int, path: Path) -> bool:
+    try:
+        return os.fstat(fd).st_ino == os.stat(path).st_ino
+    except OSError:
+        return False
+
+
+class SharedMemoryCacheBackend(CacheBackend):
+    """
+    Host-wide cache on a tmpfs directory shared by every worker process.
+
+    Each key is one file: an 8-byte expiry timestamp followed by the JSON value. Writes go to a temp file and
+    are renamed into place, so readers never see partial values. ``get`` deletes an expired entry it finds, and
+    ``set`` sweeps the whole directory every ``sweep_interval`` seconds for expired entries nobody reads any
+    more, lock files nobody holds and temp files left by a worker that died mid-write.
+    """
+
+    name = "shared"
+
+    def __init__(self, directory: Optional[str] = None, lock_timeout: float = 15.0, sweep_interval: float = 60.0) -> None:
+        self._directory = Path(directory or self.default_directory())
+        self._directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._lock_timeout = lock_timeout
+        self._key_locks = _KeyLocks()
+        self._sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._sweep_lock = threading.Lock()
+
+    @staticmethod
+    def default_directory() -> str:
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        return os.path.join(base, "ny-civic-sphere-cache")
+
+    def _path(self, key: str) -> Path:
+        return self._directory / hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                data = handle.read()
+                if len(data) >= _EXPIRY.size and _EXPIRY.unpack_from(data)[0] < time.time():
+                    # Only if no worker has replaced it since we opened it.
+                    if _same_file(handle.fileno(), path):
+                        _unlink(path)
+                    return None
+        except OSError:
+            return None
+        if len(data) < _EXPIRY.size:
+            return None
+        try:
+            return json.loads(data[_EXPIRY.size:])
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        body = _EXPIRY.pack(time.time() + ttl) + json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(body)
+            os.replace(tmp_path, path)
+        except OSError:
+            _unlink(Path(tmp_path))
+        if time.monotonic() >= self._next_sweep:
+            self.sweep()
+
+    def delete(self, key: str) -> None:
+        _unlink(self._path(key))
+
+    def _compute_lock(self, key: str):
+        path = self._path(key)
+        return _FileLock(path.with_suffix(".lock"), self._lock_timeout, self._key_locks(key))
+
+    def sweep(self) -> int:
+        """Delete expired entries, unheld lock files and stale temp files; returns how many files went."""
+        import fcntl
+
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+        removed = 0
+        try:
+            self._next_sweep = time.monotonic() + self._sweep_interval
+            now = time.time()
+            for path in self._directory.iterdir():
+                name = path.name
+                if name.startswith(".tmp-"):
+                    # A rename normally follows within milliseconds; older ones belong to a worker that died.
+                    if _mtime(path) < now - self._sweep_interval:
+                        removed += _unlink(path)
+                elif name.endswith(".lock"):
+                    try:
+                        fd = os.open(path, os.O_RDWR)
+                    except OSError:
+                        continue
+                    try:
+                        # Held locks are skipped; deleting a free one is safe because _FileLock re-checks the path.
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        removed += _unlink(path)
+                    except BlockingIOError:
+                        pass
+                    finally:
+                        os.close(fd)
+                else:
+                    try:
+                        with open(path, "rb") as handle:
+                            header = handle.read(_EXPIRY.size)
+                            if len(header) == _EXPIRY.size and _EXPIRY.unpack(header)[0] < now and _same_file(handle.fileno(), path):
+                                removed += _unlink(path)
+                    except OSError:
+                        continue
+        finally:
+            self._sweep_lock.release()
+        return removed
+
+
+def _unlink(path: Path) -> bool:
+    try:
+        path.unlink()
+        return True
+    except OSError:
+        return False
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return float("inf")
+
+
+@lru_cache
+def get_cache() -> CacheBackend:
+    """
+    Process-wide cache backend selected by ``CACHE_BACKEND`` (``local`` or ``shared``).
+    """
+    settings = get_settings()
+    if settings.cache_backend == "shared":
+        try:
+            import fcntl  # noqa: F401 - the shared tier needs POSIX file locks
+
+            return SharedMemoryCacheBackend(settings.cache_dir or None)
+        except (ImportError, OSError):
+            pass
+    return LocalCacheBackend()
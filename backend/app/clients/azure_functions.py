@@ -8,6 +8,8 @@ from typing import Any, Dict, Optional
 import httpx
 
 from ..config import get_settings
+from ..metrics import track_upstream
+from .resilience import UpstreamUnavailable, get_upstream, shared_http_client
 
 
 class AzureFunctionClient:
@@ -29,12 +31,18 @@ class AzureFunctionClient:
 
         url = f"{self._base_url}/api/generate-dashboard-summary"
         headers = {"x-functions-key": self._function_key} if self._function_key else {}
-        try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.post(url, json=payload, headers=headers)
+
+        def generate(timeout: float) -> Dict[str, Any]:
+            with track_upstream("azure_functions", "generate_dashboard_summary") as call:
+                response = shared_http_client().post(url, json=payload, headers=headers, timeout=timeout)
+                call.payload_bytes = len(response.content)
                 response.raise_for_status()
                 return response.json()
-        except httpx.HTTPError:
-            # Fallback to None so the API remains healthy even if the Function is down.
+
+        try:
+            # Summaries are generated from the payload alone, so repeating the POST is safe.
+            return get_upstream("azure_functions").call(generate)
+        except (httpx.HTTPError, UpstreamUnavailable, ValueError):
+            # Fallback to None so the API remains healthy even if the Function is down or answers with a broken body.
             return None
 
@@ -1,17 +1,22 @@
 """
-Azure OpenAI client for generating RAG responses.
+Azure OpenAI client for generating RAG responses and short background completions.
 """
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional
-
-from openai import AzureOpenAI
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from ..config import get_settings
+from ..metrics import REGISTRY, track_upstream
+from .resilience import get_upstream
+
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
 
 logger = logging.getLogger(__name__)
 
+OPENAI_TOKENS = REGISTRY.counter("openai_tokens_total", "Tokens consumed by Azure OpenAI completions.", ("kind",))
+
 
 class AzureOpenAIClient:
     """
@@ -27,12 +32,15 @@ class AzureOpenAIClient:
 
         self._client: Optional[AzureOpenAI] = None
         if self._endpoint and self._key and self._deployment:
+            # Imported lazily so workers without Azure OpenAI configured never pay for loading the SDK.
+            from openai import AzureOpenAI
+
             self._client = AzureOpenAI(
                 azure_endpoint=self._endpoint,
                 api_key=self._key,
                 api_version=self._api_version,
             )
-            logger.info(f"Azure OpenAI client initialized: endpoint={self._endpoint}, deployment={self._deployment}")
+            logger.debug("Azure OpenAI client initialized: endpoint=%s, deployment=%s", self._endpoint, self._deployment)
         else:
             missing = []
             if not self._endpoint:
@@ -41,15 +49,23 @@ class AzureOpenAIClient:
                 missing.append("key")
             if not self._deployment:
                 missing.append("deployment")
-            logger.warning(f"Azure OpenAI client not initialized. Missing: {', '.join(missing)}")
-
-    def generate_rag_response(self, query: str, search_results: List[Dict[str, Any]]) -> Optional[str]:
+            logger.warning("Azure OpenAI client not initialized. Missing: %s", ", ".join(missing))
+
+    def generate_rag_response(
+        self,
+        query: str,
+        search_results: List[Dict[str, Any]],
+        history: Optional[List[Dict[str, str]]] = None,
+        summary: str = "",
+    ) -> Optional[str]:
         """
         Generate a RAG response using the query and search results as context.
 
         Args:
             query: The user's query
             search_results: List of search result dictionaries from Azure AI Search
+            history: Recent user/assistant messages from the same chat session, oldest first
+            summary: Running summary of earlier turns that no longer fit in ``history``
 
         Returns:
             Generated response string, or None if client is not configured or error occurs
@@ -58,7 +74,7 @@ class AzureOpenAIClient:
             logger.warning("RAG generation called but client is not initialized")
             return None
 
-        logger.info(f"Generating RAG response for query: '{query}' with {len(search_results)} search results")
+        logger.info("Generating RAG response", extra={"query_chars": len(query), "search_results": len(search_results)})
 
         # Format search results as context
         context_parts = []
@@ -90,7 +106,7 @@ class AzureOpenAIClient:
             context_parts.append(f"[{title}]\n{content}")
 
         context = "\n\n".join(context_parts)
-        logger.debug(f"Context length: {len(context)} characters from {len(context_parts)} documents")
+        logger.debug("Context length: %d characters from %d documents", len(context), len(context_parts))
 
         # Create the prompt for RAG
         system_prompt = """You are a helpful assistant for NYC Civic Sphere. Answer questions based on the provided context from NYC civic documents, policies, and information. 
@@ -106,26 +122,60 @@ Question: {query}
 
 Please provide a helpful answer based on the context above. If you reference specific information, mention which document it came from."""
 
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": user_prompt})
+
         try:
             logger.debug("Calling Azure OpenAI API")
-            response = self._client.chat.completions.create(
-                model=self._deployment,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.7,
-                max_tokens=1000,
-            )
-
-            if response.choices and len(response.choices) > 0:
-                response_text = response.choices[0].message.content
-                logger.info(f"RAG response generated successfully ({len(response_text)} characters)")
+            response_text = self._complete(messages, "chat_completion", temperature=0.7, max_tokens=1000)
+            if response_text is not None:
+                logger.info("RAG response generated successfully (%d characters)", len(response_text))
                 return response_text
             logger.warning("Azure OpenAI returned no choices")
             return None
         except Exception as e:
-            logger.error(f"RAG generation failed with error: {str(e)}", exc_info=True)
+            logger.error("RAG generation failed with error: %s", e, exc_info=True)
             # Return None on error so the API can continue
             return None
 
+    @property
+    def configured(self) -> bool:
+        return self._client is not None
+
+    def complete_text(self, system_prompt: str, user_prompt: str, operation: str, max_tokens: int = 300) -> Optional[str]:
+        """
+        Single-turn completion for background jobs. Unlike ``generate_rag_response`` errors propagate, so the
+        caller decides whether to keep its previous result.
+        """
+        if not self._client:
+            return None
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
+        return self._complete(messages, operation, temperature=0.3, max_tokens=max_tokens)
+
+    def _complete(self, messages: List[Dict[str, str]], operation: str, temperature: float, max_tokens: int) -> Optional[str]:
+        def complete(timeout: float):
+            with track_upstream("azure_openai", operation) as call:
+                response = self._client.chat.completions.create(
+                    model=self._deployment,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=timeout,
+                )
+                if response.choices:
+                    call.payload_bytes = len(response.choices[0].message.content or "")
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    OPENAI_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+                    OPENAI_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+                    call.set_attribute("tokens.prompt", usage.prompt_tokens or 0)
+                    call.set_attribute("tokens.completion", usage.completion_tokens or 0)
+            return response
+
+        response = get_upstream("azure_openai").call(complete)
+        if response.choices:
+            return response.choices[0].message.content
+        return None
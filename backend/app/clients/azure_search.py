@@ -4,15 +4,18 @@ Azure AI Search client for querying search indexes.
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional
-
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from azure.search.documents.models import QueryType
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from ..config import get_settings
+from ..metrics import track_upstream
+from .resilience import UpstreamUnavailable, get_upstream, sdk_timeouts
+
+if TYPE_CHECKING:
+    from azure.search.documents import SearchClient
 
 logger = logging.getLogger(__name__)
+# Search result field discovery: one line per request, sampled by LOG_SAMPLE_RATES.
+fields_logger = logging.getLogger(f"{__name__}.fields")
 
 
 class AzureSearchClient:
@@ -30,13 +33,22 @@ class AzureSearchClient:
 
         self._client: Optional[SearchClient] = None
         if self._endpoint and self._key and self._index_name:
+            # Imported lazily so workers without Azure Search configured never pay for loading the SDK.
+            from azure.core.credentials import AzureKeyCredential
+            from azure.search.documents import SearchClient
+
             credential = AzureKeyCredential(self._key)
             self._client = SearchClient(
                 endpoint=self._endpoint,
                 index_name=self._index_name,
                 credential=credential,
             )
-            logger.info(f"Azure Search client initialized: endpoint={self._endpoint}, index={self._index_name}, semantic_config={self._semantic_config_name}")
+            logger.debug(
+                "Azure Search client initialized: endpoint=%s, index=%s, semantic_config=%s",
+                self._endpoint,
+                self._index_name,
+                self._semantic_config_name,
+            )
         else:
             missing = []
             if not self._endpoint:
@@ -45,7 +57,7 @@ class AzureSearchClient:
                 missing.append("key")
             if not self._index_name:
                 missing.append("index_name")
-            logger.warning(f"Azure Search client not initialized. Missing: {', '.join(missing)}")
+            logger.warning("Azure Search client not initialized. Missing: %s", ", ".join(missing))
 
     def search(self, query: str, top: int = 5) -> List[Dict[str, Any]]:
         """
@@ -59,10 +71,10 @@ class AzureSearchClient:
             List of search result dictionaries with document content, scores, and metadata
         """
         if not self._client:
-            logger.warning("Search called but client is not initialized")
-            return []
+            logger.warning("Search called but client is not initialized; using local retrieval")
+            return self._local_search(query, top)
 
-        logger.info(f"Searching Azure Search index '{self._index_name}' with query: '{query}' (top={top})")
+        logger.info("Searching Azure Search index %s", self._index_name, extra={"query_chars": len(query), "top": top})
 
         # Try semantic search first (which can work with vector fields if configured)
         # Then fall back to hybrid search, then simple search
@@ -72,22 +84,50 @@ class AzureSearchClient:
             ("simple", self._try_simple_search),
         ]
 
+        upstream = get_upstream("azure_search")
         for search_type, search_func in search_attempts:
+            def attempt(timeout: float, search_type=search_type, search_func=search_func) -> List[Dict[str, Any]]:
+                with track_upstream("azure_search", search_type) as call:
+                    call.set_attribute("search.mode", search_type)
+                    results = search_func(query, top, timeout)
+                    call.payload_bytes = sum(len(str(result)) for result in results)
+                    call.set_attribute("result_count", len(results))
+                return results
+
             try:
-                logger.debug(f"Attempting {search_type} search")
-                results = search_func(query, top)
+                logger.debug("Attempting %s search", search_type)
+                results = upstream.call(attempt)
                 if results:
-                    logger.info(f"{search_type.capitalize()} search succeeded with {len(results)} results")
+                    logger.info("%s search succeeded with %d results", search_type.capitalize(), len(results))
                     return results
+            except UpstreamUnavailable as e:
+                logger.warning(str(e))
+                break
             except Exception as e:
-                logger.warning(f"{search_type.capitalize()} search failed: {str(e)}")
+                logger.warning("%s search failed: %s", search_type.capitalize(), e)
                 continue
 
-        logger.error("All search methods failed")
-        return []
+        logger.error("All search methods failed; using local retrieval")
+        return self._local_search(query, top)
+
+    def _local_search(self, query: str, top: int) -> List[Dict[str, Any]]:
+        """Answer from the offline index built by ``app.search.ingest`` when Azure Search cannot."""
+        from ..search.local_retrieval import get_local_retriever
 
-    def _try_semantic_search(self, query: str, top: int) -> List[Dict[str, Any]]:
+        retriever = get_local_retriever()
+        if retriever is None:
+            return []
+        with track_upstream("local_retrieval", "hybrid") as call:
+            results = retriever.search(query, top)
+            call.payload_bytes = sum(len(result["content"]) for result in results)
+            call.set_attribute("result_count", len(results))
+        logger.info("Local retrieval returned %d results", len(results))
+        return results
+
+    def _try_semantic_search(self, query: str, top: int, timeout: float) -> List[Dict[str, Any]]:
         """Try semantic search with the configured semantic configuration."""
+        from azure.search.documents.models import QueryType
+
         results = self._client.search(
             search_text=query,
             top=top,
@@ -96,11 +136,14 @@ class AzureSearchClient:
             include_total_count=True,
             query_caption="extractive",
             query_answer="extractive",
+            **sdk_timeouts(timeout),
         )
         return self._process_results(results)
 
-    def _try_hybrid_search(self, query: str, top: int) -> List[Dict[str, Any]]:
+    def _try_hybrid_search(self, query: str, top: int, timeout: float) -> List[Dict[str, Any]]:
         """Try hybrid search combining semantic and keyword search."""
+        from azure.search.documents.models import QueryType
+
         # Hybrid search: semantic + keyword
         results = self._client.search(
             search_text=query,
@@ -108,15 +151,17 @@ class AzureSearchClient:
             query_type=QueryType.SEMANTIC,
             semantic_configuration_name=self._semantic_config_name,
             include_total_count=True,
+            **sdk_timeouts(timeout),
         )
         return self._process_results(results)
 
-    def _try_simple_search(self, query: str, top: int) -> List[Dict[str, Any]]:
+    def _try_simple_search(self, query: str, top: int, timeout: float) -> List[Dict[str, Any]]:
         """Fall back to simple keyword search."""
         results = self._client.search(
             search_text=query,
             top=top,
             include_total_count=True,
+            **sdk_timeouts(timeout),
         )
         return self._process_results(results)
 
@@ -140,8 +185,13 @@ class AzureSearchClient:
             
             # Log available fields for debugging (only for first result)
             if result_count == 1:
-                logger.debug(f"First result fields: {list(doc.keys())}")
-                logger.debug(f"First result scores - search: {doc.get('score')}, reranker: {doc.get('reranker_score')}, semantic: {doc.get('semantic_score')}")
+                fields_logger.debug("First result fields: %s", list(doc))
+                fields_logger.debug(
+                    "First result scores - search: %s, reranker: %s, semantic: %s",
+                    doc.get("score"),
+                    doc.get("reranker_score"),
+                    doc.get("semantic_score"),
+                )
             
             search_results.append(doc)
 
@@ -1,14 +1,17 @@
 """
-Cosmos DB client abstraction for dashboard data.
+Cosmos DB client abstractions for dashboard data and forum persistence.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
-
-from azure.cosmos import CosmosClient  # type: ignore
-from azure.cosmos.partition_key import PartitionKey  # type: ignore
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
 
 from ..config import get_settings
+from ..metrics import track_upstream
+from .resilience import UpstreamUnavailable, get_upstream, sdk_timeouts
+
+logger = logging.getLogger(__name__)
 
 
 class CosmosDashboardClient:
@@ -21,6 +24,9 @@ class CosmosDashboardClient:
         # Only create client if both endpoint and key are configured
         if settings.cosmos_endpoint and settings.cosmos_key:
             try:
+                # Imported lazily so workers without Cosmos configured never pay for loading the SDK.
+                from azure.cosmos import CosmosClient  # type: ignore
+
                 self._client = CosmosClient(settings.cosmos_endpoint, credential=settings.cosmos_key)
             except Exception:
                 # If client creation fails (e.g., invalid credentials), set to None
@@ -37,15 +43,120 @@ class CosmosDashboardClient:
         if not self._client:
             return None
 
+        from azure.cosmos.partition_key import PartitionKey  # type: ignore
+
         database = self._client.get_database_client(self._database_name)
         container = database.get_container_client(self._container_name)
         query = "SELECT TOP 1 c.payload FROM c WHERE c.type = @type ORDER BY c._ts DESC"
         params = [{"name": "@type", "value": "dashboard"}]
-        result: List[Dict[str, Any]] = list(
-            container.query_items(query, parameters=params, partition_key=PartitionKey(path="/type"))
-        )
+
+        def query_dashboard(timeout: float) -> List[Dict[str, Any]]:
+            with track_upstream("cosmos", "query_dashboard") as call:
+                rows: List[Dict[str, Any]] = list(
+                    container.query_items(
+                        query, parameters=params, partition_key=PartitionKey(path="/type"), **sdk_timeouts(timeout)
+                    )
+                )
+                call.payload_bytes = len(json.dumps(rows, default=str))
+                call.set_attribute("result_count", len(rows))
+            return rows
+
+        try:
+            result = get_upstream("cosmos").call(query_dashboard)
+        except UpstreamUnavailable:
+            # Cosmos keeps failing or is saturated; serve the fallback until it has room again.
+            return None
+        except Exception as exc:
+            # Timeouts and transport errors fall back like a missing configuration, also before the breaker opens.
+            logger.warning("Cosmos dashboard query failed: %s", exc)
+            return None
         if not result:
             return None
 
         return result[0].get("payload")
 
+
+
+# Cosmos rejects transactional batches with more than 100 operations.
+MAX_TRANSACTIONAL_BATCH = 100
+
+
+class CosmosBatchClient:
+    """
+    Upserts documents into one container in transactional batches, one partition per batch. Used for forum posts
+    (partitioned by ``/thread_id``) and vote tallies (``/election_id``). Votes also create one document per voter
+    through ``create_once``; both read their documents back through ``query``.
+    """
+
+    def __init__(self, container_name: str) -> None:
+        settings = get_settings()
+        self._container = None
+        if settings.cosmos_endpoint and settings.cosmos_key:
+            try:
+                from azure.cosmos import CosmosClient  # type: ignore
+
+                client = CosmosClient(settings.cosmos_endpoint, credential=settings.cosmos_key)
+                database = client.get_database_client(settings.cosmos_database)
+                self._container = database.get_container_client(container_name)
+            except Exception:
+                self._container = None
+
+    @property
+    def configured(self) -> bool:
+        return self._container is not None
+
+    def upsert_batch(self, partition_key: str, documents: Sequence[Dict[str, Any]]) -> None:
+        """
+        Upsert ``documents`` (all in ``partition_key``'s partition) atomically, at most ``MAX_TRANSACTIONAL_BATCH``
+        per call. Upserts are idempotent, so a failed batch can be replayed as a whole.
+        """
+        if self._container is None:
+            raise RuntimeError("Cosmos container is not configured")
+        operations = [("upsert", (document,)) for document in documents]
+
+        def execute(timeout: float) -> None:
+            with track_upstream("cosmos", "upsert_batch") as call:
+                call.payload_bytes = len(json.dumps(documents, default=str))
+                call.set_attribute("operations", len(operations))
+                self._container.execute_item_batch(operations, partition_key=partition_key, **sdk_timeouts(timeout))
+
+        get_upstream("cosmos").call(execute)
+
+    def create_once(self, document: Dict[str, Any]) -> bool:
+        """Create ``document``; return False if one with its ``id`` already exists in its partition."""
+        if self._container is None:
+            raise RuntimeError("Cosmos container is not configured")
+
+        def create(timeout: float) -> bool:
+            from azure.cosmos.exceptions import CosmosResourceExistsError  # type: ignore
+
+            with track_upstream("cosmos", "create_item") as call:
+                call.payload_bytes = len(json.dumps(document, default=str))
+                try:
+                    self._container.create_item(document, **sdk_timeouts(timeout))
+                except CosmosResourceExistsError:
+                    call.set_attribute("conflict", True)
+                    return False
+            return True
+
+        return get_upstream("cosmos").call(create)
+
+    def query(
+        self, query: str, parameters: Sequence[Dict[str, Any]], partition_key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a query within ``partition_key``'s partition, or across partitions without one, and return every row."""
+        if self._container is None:
+            raise RuntimeError("Cosmos container is not configured")
+        scope: Dict[str, Any] = (
+            {"partition_key": partition_key} if partition_key is not None else {"enable_cross_partition_query": True}
+        )
+
+        def run(timeout: float) -> List[Dict[str, Any]]:
+            with track_upstream("cosmos", "query_items") as call:
+                rows: List[Dict[str, Any]] = list(
+                    self._container.query_items(query, parameters=list(parameters), **scope, **sdk_timeouts(timeout))
+                )
+                call.set_attribute("result_count", len(rows))
+            return rows
+
+        return get_upstream("cosmos").call(run)
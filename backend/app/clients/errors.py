@@ -0,0 +1,16 @@
+"""
+Errors the upstream layer raises without getting an answer from the upstream.
+"""
+from __future__ import annotations
+
+
+class UpstreamUnavailable(Exception):
+    """
+    The upstream was not called, because its circuit is open or no concurrency slot freed up before the deadline.
+
+    Clients handle it the way they handle a missing configuration: they serve their fallback.
+    """
+
+    def __init__(self, message: str, upstream: str) -> None:
+        super().__init__(message)
+        self.upstream = upstream
@@ -0,0 +1,201 @@
+"""
+Fault and latency injection for upstream calls, to reproduce slow or failing upstreams on demand.
+
+``Upstream.call`` passes each attempt through ``FAULTS.wrap``, so every client in this package is covered,
+including the Azure SDK ones. The injected failure then takes the same path as a real one: through retries, hedging,
+the circuit breaker and the client's fallback. Rules are set per upstream name (``cosmos``, ``azure_search``,
+``azure_openai``, ``nyc_calendar``, ``nyc_calendar_alerts``, ``azure_functions``), from the ``FAULT_INJECTION``
+setting at startup or ``PUT /api/admin/faults`` at runtime. An upstream without a rule gets its attempt back
+unchanged.
+
+For each attempt, a rule can:
+
+* add a sampled latency before the call. The latency counts against the attempt's timeout, so the call gets what is
+  left of it. When the latency reaches the timeout, the attempt sleeps for the timeout and then raises
+  ``httpx.ReadTimeout``, as the client would have.
+* fail instead of calling the upstream: a timeout, a connection error or an HTTP status.
+* call the upstream and then fail as if its body were truncated JSON.
+* call the upstream and keep only the leading ``partial_fraction`` of each result list, for example partial Azure
+  Search results or a short NYC feed.
+
+Injected errors are ``httpx`` exceptions, the same types the HTTP clients see from a real upstream, so every
+client's fallback handles them.
+
+Random draws come from one seeded generator, so a run with ``FAULT_INJECTION_SEED`` set is repeatable for the same
+sequence of calls.
+"""
+from __future__ import annotations
+
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Literal, Mapping, Optional, Tuple, TypeVar
+
+import httpx
+from pydantic import BaseModel, Field, field_validator
+
+from ..metrics import REGISTRY
+
+T = TypeVar("T")
+
+KNOWN_UPSTREAMS = ("cosmos", "azure_search", "azure_openai", "nyc_calendar", "nyc_calendar_alerts", "azure_functions")
+
+FAULTS_INJECTED = REGISTRY.counter(
+    "upstream_faults_injected_total", "Faults injected into upstream calls, by kind.", ("upstream", "fault")
+)
+
+# What a response cut off mid-stream looks like to ``json.loads``.
+_TRUNCATED_BODY = '{"items": [{"id": "evt-1", "name": "Summer Stre'
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Latency model in milliseconds.
+
+    Specs look like ``fixed:20``, ``uniform:5,50``, ``normal:40,10``, ``lognormal:40,0.6`` (median, sigma)
+    or ``exponential:25`` (mean).
+    """
+
+    kind: str = "fixed"
+    params: Tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, raw = spec.partition(":")
+        params = tuple(float(value) for value in raw.split(",") if value) or (0.0,)
+        if kind not in {"fixed", "uniform", "normal", "lognormal", "exponential"}:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        if kind in {"uniform", "normal", "lognormal"} and len(params) < 2:
+            raise ValueError(f"{kind} latency needs two parameters, e.g. {kind}:40,10")
+        return cls(kind, params)
+
+    def sample_ms(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(self.params[0], self.params[1]))
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(max(self.params[0], 1e-3)), self.params[1])
+        return rng.expovariate(1.0 / max(self.params[0], 1e-3))
+
+
+class FaultRule(BaseModel):
+    """Faults for one upstream. Each ``*_rate`` is the fraction of attempts affected."""
+
+    latency: Optional[str] = Field(None, description="Latency distribution, e.g. `lognormal:200,0.8`", examples=["lognormal:200,0.8"])
+    latency_rate: float = Field(1.0, ge=0.0, le=1.0)
+    error_rate: float = Field(0.0, ge=0.0, le=1.0)
+    error: Literal["timeout", "connect", "status"] = "status"
+    status_code: int = Field(503, ge=400, le=599)
+    malformed_rate: float = Field(0.0, ge=0.0, le=1.0)
+    partial_rate: float = Field(0.0, ge=0.0, le=1.0)
+    partial_fraction: float = Field(0.5, ge=0.0, le=1.0)
+
+    @field_validator("latency")
+    @classmethod
+    def _valid_latency(cls, value: Optional[str]) -> Optional[str]:
+        if value:
+            LatencyDistribution.parse(value)
+        return value or None
+
+
+class _CompiledRule:
+    __slots__ = ("rule", "latency")
+
+    def __init__(self, rule: FaultRule) -> None:
+        self.rule = rule
+        self.latency = LatencyDistribution.parse(rule.latency) if rule.latency else None
+
+
+def _request(upstream: str) -> httpx.Request:
+    return httpx.Request("GET", f"https://{upstream}.fault-injection.invalid/")
+
+
+def _injected_error(upstream: str, rule: FaultRule) -> Exception:
+    request = _request(upstream)
+    if rule.error == "timeout":
+        return httpx.ReadTimeout(f"Injected timeout for {upstream}", request=request)
+    if rule.error == "connect":
+        return httpx.ConnectError(f"Injected connection failure for {upstream}", request=request)
+    response = httpx.Response(rule.status_code, request=request)
+    return httpx.HTTPStatusError(f"Injected HTTP {rule.status_code} for {upstream}", request=request, response=response)
+
+
+def _truncate(result: Any, fraction: float) -> Any:
+    """Keep the leading ``fraction`` of a list result, or of each list in a dict result."""
+    if isinstance(result, list):
+        return result[: int(len(result) * fraction)]
+    if isinstance(result, dict):
+        return {key: value[: int(len(value) * fraction)] if isinstance(value, list) else value for key, value in result.items()}
+    return result
+
+
+class FaultInjector:
+    """Per-upstream fault rules applied to ``Upstream.call`` attempts."""
+
+    def __init__(self) -> None:
+        self._rules: Dict[str, _CompiledRule] = {}
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    def configure(self, rules: Mapping[str, Any], seed: Optional[int] = None) -> None:
+        """Replace every rule; an empty mapping turns injection off. Raises ``ValueError`` for unknown upstreams."""
+        unknown = set(rules) - set(KNOWN_UPSTREAMS)
+        if unknown:
+            raise ValueError(f"Unknown upstreams: {', '.join(sorted(unknown))}. Known: {', '.join(KNOWN_UPSTREAMS)}")
+        compiled = {name: _CompiledRule(FaultRule.model_validate(rule)) for name, rule in rules.items()}
+        with self._lock:
+            self._rng = random.Random(seed)
+            self._rules = compiled
+
+    def rules(self) -> Dict[str, Dict[str, Any]]:
+        return {name: compiled.rule.model_dump() for name, compiled in sorted(self._rules.items())}
+
+    def wrap(self, upstream: str, attempt: Callable[[float], T]) -> Callable[[float], T]:
+        compiled = self._rules.get(upstream)
+        if compiled is None:
+            return attempt
+        rule = compiled.rule
+
+        def injected(timeout: float) -> T:
+            with self._lock:
+                delay_ms = compiled.latency.sample_ms(self._rng) if compiled.latency and self._rng.random() < rule.latency_rate else 0.0
+                failed = self._rng.random() < rule.error_rate
+                malformed = self._rng.random() < rule.malformed_rate
+                partial = self._rng.random() < rule.partial_rate
+            if delay_ms > 0:
+                FAULTS_INJECTED.inc(upstream=upstream, fault="latency")
+                if delay_ms / 1000.0 >= timeout:
+                    time.sleep(timeout)
+                    FAULTS_INJECTED.inc(upstream=upstream, fault="latency_timeout")
+                    raise httpx.ReadTimeout(
+                        f"Injected {delay_ms:.0f}ms latency for {upstream} exceeded the {timeout:.2f}s timeout",
+                        request=_request(upstream),
+                    )
+                time.sleep(delay_ms / 1000.0)
+                timeout = max(0.05, timeout - delay_ms / 1000.0)
+            if failed:
+                FAULTS_INJECTED.inc(upstream=upstream, fault=rule.error)
+                raise _injected_error(upstream, rule)
+            result = attempt(timeout)
+            if malformed:
+                FAULTS_INJECTED.inc(upstream=upstream, fault="malformed")
+                try:
+                    json.loads(_TRUNCATED_BODY)
+                except json.JSONDecodeError as exc:
+                    raise json.JSONDecodeError(f"Injected truncated body for {upstream}: {exc.msg}", exc.doc, exc.pos) from None
+            if partial:
+                FAULTS_INJECTED.inc(upstream=upstream, fault="partial")
+                result = _truncate(result, rule.partial_fraction)
+            return result
+
+        return injected
+
+
+FAULTS = FaultInjector()
@@ -6,9 +6,10 @@ from __future__ import annotations
 import re
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from ..config import get_settings
+from ..metrics import track_upstream
+from ..tracing import current_span
+from .resilience import get_upstream, shared_http_client
 
 
 class NYCCalendarClient:
@@ -20,6 +21,13 @@ class NYCCalendarClient:
         if self.api_key:
             self._headers["Ocp-Apim-Subscription-Key"] = self.api_key
 
+    def _get_discover(self, timeout: float) -> Any:
+        with track_upstream("nyc_calendar", "discover") as call:
+            resp = shared_http_client().get(self.base_url, headers=self._headers, timeout=timeout)
+            call.payload_bytes = len(resp.content)
+            resp.raise_for_status()
+            return resp.json()
+
     def fetch_events(self) -> Optional[List[Dict[str, Any]]]:
         """Return a list of mapped events suitable for the dashboard payload.
 
@@ -31,9 +39,7 @@ class NYCCalendarClient:
             return None
 
         try:
-            resp = httpx.get(self.base_url, headers=self._headers, timeout=10.0)
-            resp.raise_for_status()
-            body = resp.json()
+            body = get_upstream("nyc_calendar").call(self._get_discover, hedge=True)
             items = body.get("items", []) if isinstance(body, dict) else []
 
             mapped: List[Dict[str, Any]] = []
@@ -72,6 +78,7 @@ class NYCCalendarClient:
                     }
                 )
 
+            current_span().set_attribute("result_count", len(mapped))
             return mapped
         except Exception:
             # Swallow errors here; caller can fall back to stub data.
@@ -5,9 +5,9 @@ from __future__ import annotations
 
 from typing import Any, Dict, Optional
 
-import httpx
-
 from ..config import get_settings
+from ..metrics import track_upstream
+from .resilience import get_upstream, shared_http_client
 
 
 class NYCCalendarAlertsClient:
@@ -33,11 +33,20 @@ class NYCCalendarAlertsClient:
             # No API key configured, don't attempt a network call.
             return None
 
+        params = {"fromdate": fromdate, "todate": todate}
+
+        def get_calendar(timeout: float) -> Any:
+            with track_upstream("nyc_calendar_alerts", "get_calendar") as call:
+                resp = shared_http_client().get(self.base_url, headers=self._headers, params=params, timeout=timeout)
+                call.payload_bytes = len(resp.content)
+                resp.raise_for_status()
+                body = resp.json()
+                if isinstance(body, dict):
+                    call.set_attribute("result_count", len(body.get("days") or []))
+                return body
+
         try:
-            params = {"fromdate": fromdate, "todate": todate}
-            resp = httpx.get(self.base_url, headers=self._headers, params=params, timeout=10.0)
-            resp.raise_for_status()
-            body = resp.json()
+            body = get_upstream("nyc_calendar_alerts").call(get_calendar, hedge=True)
             return body if isinstance(body, dict) else None
         except Exception:
             # Swallow errors here; caller can handle fallback.
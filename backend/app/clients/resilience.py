@@ -0,0 +1,393 @@
+"""
+Shared resilience layer for upstream calls: retries with full-jitter backoff under a retry budget, a circuit
+breaker per upstream, per-call deadlines, optional hedging of idempotent requests and a priority-aware
+concurrency limit per upstream (see ``scheduler.py``). Attempts pass through the fault injector (``faults.py``),
+which leaves them untouched unless a fault rule is configured for the upstream.
+
+Clients wrap one attempt in a function taking the attempt timeout and hand it to ``get_upstream(name).call``::
+
+    body = get_upstream("nyc_calendar").call(lambda timeout: self._get(timeout), hedge=True)
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from functools import lru_cache
+from typing import Callable, ContextManager, Dict, List, Optional, TypeVar
+
+import httpx
+
+from ..config import get_settings
+from ..metrics import REGISTRY
+from .errors import UpstreamUnavailable
+from .faults import FAULTS
+from .scheduler import PRIORITIES, PriorityLimiter, QueueTimeoutError, current_priority
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0.0, HALF_OPEN: 1.0, OPEN: 2.0}
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+UPSTREAM_RETRIES = REGISTRY.counter("upstream_retries_total", "Upstream attempts beyond the first.", ("upstream",))
+UPSTREAM_RETRY_BUDGET_EXHAUSTED = REGISTRY.counter(
+    "upstream_retry_budget_exhausted_total", "Retries skipped because the retry budget was empty.", ("upstream",)
+)
+UPSTREAM_SHORT_CIRCUITS = REGISTRY.counter(
+    "upstream_short_circuits_total", "Calls failed fast because the upstream's circuit was open.", ("upstream",)
+)
+UPSTREAM_BREAKER_TRANSITIONS = REGISTRY.counter(
+    "upstream_circuit_transitions_total", "Circuit breaker state changes.", ("upstream", "state")
+)
+UPSTREAM_HEDGES = REGISTRY.counter(
+    "upstream_hedged_requests_total", "Hedged second attempts, by which attempt answered first.", ("upstream", "winner")
+)
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Raised without calling the upstream while its circuit is open."""
+
+    def __init__(self, upstream: str, retry_in: float) -> None:
+        super().__init__(f"Circuit for {upstream} is open; retry in {retry_in:.1f}s", upstream)
+        self.retry_in = retry_in
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transport failures, timeouts and 408/429/5xx responses are worth another attempt; other errors are not."""
+    if isinstance(exc, UpstreamUnavailable):
+        return False
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    if isinstance(exc, (httpx.TransportError, TimeoutError, ConnectionError)):
+        return True
+    # Azure SDK errors expose ``status_code``; connection failures have none.
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # Matched by name up the class hierarchy so subclasses such as ServiceResponseTimeoutError count as well.
+    return any(cls.__name__ in _RETRYABLE_SDK_ERRORS for cls in type(exc).__mro__)
+
+
+_RETRYABLE_SDK_ERRORS = frozenset({"ServiceRequestError", "ServiceResponseError", "APIConnectionError", "APITimeoutError"})
+
+
+def sdk_timeouts(timeout: float) -> Dict[str, float]:
+    """
+    Keyword arguments bounding one Azure SDK request to ``timeout`` seconds. On its own, azure-core's ``timeout``
+    only limits the SDK's retry loop between tries; ``connection_timeout`` and ``read_timeout`` bound the socket.
+    """
+    return {"timeout": timeout, "connection_timeout": timeout, "read_timeout": timeout}
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    ``failure_threshold`` retryable failures in a row open the circuit. After ``reset_timeout`` seconds one
+    probe call is let through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("Circuit for %s: %s -> %s", self.name, self.state, state)
+            self.state = state
+            UPSTREAM_BREAKER_TRANSITIONS.inc(upstream=self.name, state=state)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def cancel_probe(self) -> None:
+        """A granted half-open probe was never sent; let the next call probe instead."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probe_in_flight = False
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_in_seconds": round(self.retry_in(), 3) if self.state == OPEN else 0.0,
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries at ``ratio`` of recent calls plus ``min_per_second``, so a failing upstream sees at most
+    ``1 + ratio`` times its normal load instead of ``max_attempts`` times.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, capacity: float = 10.0) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self._balance = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._balance = min(self.capacity, self._balance + (now - self._updated) * self.min_per_second)
+            self._updated = now
+            if self._balance >= 1.0:
+                self._balance -= 1.0
+                return True
+            return False
+
+
+@lru_cache
+def _hedge_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="upstream-hedge")
+
+
+class Upstream:
+    """Retry, breaker, deadline, hedging and concurrency policy for one upstream service."""
+
+    def __init__(
+        self,
+        name: str,
+        breaker: CircuitBreaker,
+        budget: RetryBudget,
+        timeout: float,
+        deadline: Optional[float] = None,
+        max_attempts: int = 3,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        hedge_after: float = 0.0,
+        limiter: Optional[PriorityLimiter] = None,
+    ) -> None:
+        self.name = name
+        self.breaker = breaker
+        self.budget = budget
+        self.timeout = timeout
+        self.deadline = deadline or timeout * max_attempts
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.limiter = limiter
+
+    def backoff(self, retry: int) -> float:
+        """Full jitter: uniform over [0, min(max, base * 2^retry)]."""
+        return random.uniform(0.0, min(self.backoff_max, self.backoff_base * (2 ** retry)))
+
+    def call(self, attempt: Callable[[float], T], *, retry: bool = True, hedge: bool = False) -> T:
+        """
+        Run ``attempt(timeout)`` until it succeeds, the error is not retryable, attempts, budget or deadline run
+        out, or the circuit opens. Pass ``retry=False`` for calls that are not safe to repeat; ``hedge=True``
+        only for idempotent reads.
+
+        Each attempt holds one of the upstream's concurrency slots, requested at the current call priority; waiting
+        for a slot counts against the deadline and raises ``QueueTimeoutError`` when it runs out.
+        """
+        if not self.breaker.allow():
+            UPSTREAM_SHORT_CIRCUITS.inc(upstream=self.name)
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+        self.budget.deposit()
+        started = time.monotonic()
+        priority = current_priority()
+        attempt = FAULTS.wrap(self.name, attempt)
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                with self._slot(priority, started):
+                    timeout = max(0.05, min(self.timeout, self.deadline - (time.monotonic() - started)))
+                    if hedge and self.hedge_after > 0:
+                        result = self._hedged(attempt, timeout)
+                    else:
+                        result = attempt(timeout)
+            except QueueTimeoutError:
+                # The upstream was never called, so this says nothing about its health.
+                self.breaker.cancel_probe()
+                raise
+            except Exception as exc:
+                retryable = is_retryable(exc)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The upstream answered (e.g. 404 or bad request); that says nothing about its health.
+                    self.breaker.record_success()
+                if not (retry and retryable) or attempts >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempts - 1)
+                if time.monotonic() - started + delay >= self.deadline:
+                    raise
+                if not self.budget.withdraw():
+                    UPSTREAM_RETRY_BUDGET_EXHAUSTED.inc(upstream=self.name)
+                    raise
+                if not self.breaker.allow():
+                    UPSTREAM_SHORT_CIRCUITS.inc(upstream=self.name)
+                    raise
+                UPSTREAM_RETRIES.inc(upstream=self.name)
+                logger.info("Retrying %s in %.0fms after %s", self.name, delay * 1000.0, type(exc).__name__)
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _slot(self, priority: str, started: float) -> ContextManager[None]:
+        if self.limiter is None:
+            return nullcontext()
+        return self.limiter.slot(priority, max(0.0, self.deadline - (time.monotonic() - started)))
+
+    def _hedged(self, attempt: Callable[[float], T], timeout: float) -> T:
+        """Start a second identical attempt if the first has not answered within ``hedge_after`` seconds."""
+        pool = _hedge_pool()
+        # Each attempt runs in a copy of the caller's context so its span joins the caller's trace.
+        primary = pool.submit(contextvars.copy_context().run, attempt, timeout)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        backup = pool.submit(contextvars.copy_context().run, attempt, max(0.05, timeout - self.hedge_after))
+        pending = {primary, backup}
+        errors: List[BaseException] = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    UPSTREAM_HEDGES.inc(upstream=self.name, winner="hedge" if future is backup else "primary")
+                    return future.result()
+                errors.append(error)
+        UPSTREAM_HEDGES.inc(upstream=self.name, winner="none")
+        raise errors[-1]
+
+
+def _state_values() -> Dict[tuple, float]:
+    return {(name,): _STATE_VALUES[upstream.breaker.state] for name, upstream in _UPSTREAMS.items()}
+
+
+UPSTREAM_CIRCUIT_STATE = REGISTRY.gauge(
+    "upstream_circuit_state", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open).", ("upstream",), _state_values
+)
+
+
+def _in_flight_values() -> Dict[tuple, float]:
+    return {(name,): float(upstream.limiter.in_flight) for name, upstream in _UPSTREAMS.items() if upstream.limiter}
+
+
+def _queued_values() -> Dict[tuple, float]:
+    return {
+        (name, priority): float(upstream.limiter.queued(priority))
+        for name, upstream in _UPSTREAMS.items()
+        if upstream.limiter
+        for priority in PRIORITIES
+    }
+
+
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "upstream_scheduler_in_flight", "Upstream calls holding a concurrency slot.", ("upstream",), _in_flight_values
+)
+UPSTREAM_QUEUED = REGISTRY.gauge(
+    "upstream_scheduler_queued", "Upstream calls waiting for a concurrency slot, by priority.", ("upstream", "priority"), _queued_values
+)
+
+_UPSTREAMS: Dict[str, Upstream] = {}
+_UPSTREAMS_LOCK = threading.Lock()
+# The NYC APIs are plain idempotent GETs, so they get short attempts, retries and optional hedging.
+_NYC_UPSTREAMS = frozenset({"nyc_calendar", "nyc_calendar_alerts"})
+# SDKs with their own retry policies (Cosmos, Azure Search, OpenAI) only get a breaker from this layer.
+_SDK_UPSTREAMS = frozenset({"cosmos", "azure_search", "azure_openai"})
+
+
+def _timeout_for(name: str, settings) -> float:
+    if name in _NYC_UPSTREAMS:
+        return settings.nyc_timeout_seconds
+    if name == "azure_openai":
+        # Completions stream up to max_tokens; a short timeout would cut off long answers.
+        return settings.openai_timeout_seconds
+    return settings.upstream_timeout_seconds
+
+
+def _limiter_for(name: str, settings) -> Optional[PriorityLimiter]:
+    limit = settings.upstream_concurrency.get(name, settings.upstream_default_concurrency)
+    if limit <= 0:
+        return None
+    return PriorityLimiter(name, limit, max(1, round(limit * settings.upstream_interactive_reserve_ratio)))
+
+
+def get_upstream(name: str) -> Upstream:
+    """Process-wide policy for ``name``, built from settings on first use."""
+    upstream = _UPSTREAMS.get(name)
+    if upstream is not None:
+        return upstream
+    with _UPSTREAMS_LOCK:
+        upstream = _UPSTREAMS.get(name)
+        if upstream is None:
+            settings = get_settings()
+            nyc = name in _NYC_UPSTREAMS
+            upstream = _UPSTREAMS[name] = Upstream(
+                name,
+                CircuitBreaker(name, settings.breaker_failure_threshold, settings.breaker_reset_seconds),
+                RetryBudget(ratio=settings.upstream_retry_budget_ratio),
+                timeout=_timeout_for(name, settings),
+                deadline=settings.nyc_deadline_seconds if nyc else None,
+                max_attempts=1 if name in _SDK_UPSTREAMS else settings.upstream_max_attempts,
+                backoff_base=settings.upstream_retry_base_ms / 1000.0,
+                backoff_max=settings.upstream_retry_max_ms / 1000.0,
+                hedge_after=settings.nyc_hedge_after_ms / 1000.0 if nyc else 0.0,
+                limiter=_limiter_for(name, settings),
+            )
+        return upstream
+
+
+def upstream_states() -> Dict[str, Dict[str, object]]:
+    return {
+        name: {**upstream.breaker.snapshot(), "scheduler": upstream.limiter.snapshot() if upstream.limiter else None}
+        for name, upstream in sorted(_UPSTREAMS.items())
+    }
+
+
+@lru_cache
+def shared_http_client() -> httpx.Client:
+    """
+    One pooled client per process. Reusing it keeps TCP/TLS connections alive between calls instead of building
+    a new SSL context and handshake for every request.
+    """
+    return httpx.Client(limits=httpx.Limits(max_connections=64, max_keepalive_connections=16))
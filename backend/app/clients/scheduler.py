@@ -0,0 +1,165 @@
+"""
+Priority-aware concurrency limits for outbound upstream calls.
+
+Every attempt made through ``Upstream.call`` first takes a slot from that upstream's ``PriorityLimiter``. Calls
+carry one of three priority classes, read from a context variable, so clients do not pass it explicitly:
+
+* ``INTERACTIVE``: the default, for work a user is waiting on (dashboard fetches, ``/chat``).
+* ``BACKGROUND``: refreshes and derived data (forum persistence, AI summaries, vote flushes, warm-start refresh).
+* ``BATCH``: bulk work such as ``/chat/batch`` questions.
+
+Background threads mark their work with ``with call_priority(BACKGROUND):``.
+
+Freed slots go to waiting interactive calls first. Background and batch calls together may hold at most
+``limit - interactive_reserve`` slots, so a surge of them always leaves room for an interactive call to start at
+once. Between background and batch, slots are shared by weighted fair queuing (3:1), so neither class starves the
+other. Calls within a class are served first come, first served.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, Optional
+
+from ..metrics import REGISTRY
+from .errors import UpstreamUnavailable
+
+INTERACTIVE, BACKGROUND, BATCH = "interactive", "background", "batch"
+PRIORITIES = (INTERACTIVE, BACKGROUND, BATCH)
+# Relative share of the non-reserved slots when both background and batch calls are waiting.
+_WEIGHTS = {BACKGROUND: 3.0, BATCH: 1.0}
+
+_call_priority: ContextVar[str] = ContextVar("upstream_call_priority", default=INTERACTIVE)
+
+SCHEDULER_WAIT = REGISTRY.histogram(
+    "upstream_scheduler_wait_seconds", "Time upstream calls waited for a concurrency slot.", ("upstream", "priority")
+)
+SCHEDULER_TIMEOUTS = REGISTRY.counter(
+    "upstream_scheduler_timeouts_total", "Upstream calls abandoned while waiting for a concurrency slot.", ("upstream", "priority")
+)
+
+
+class QueueTimeoutError(UpstreamUnavailable):
+    """No slot became free before the call's deadline; the upstream itself was never called."""
+
+    def __init__(self, upstream: str, priority: str, waited: float) -> None:
+        super().__init__(f"No {upstream} slot for {priority} call after {waited:.2f}s", upstream)
+        self.priority = priority
+
+
+def current_priority() -> str:
+    return _call_priority.get()
+
+
+def set_call_priority(priority: str) -> None:
+    """Set the priority for the rest of the current context (e.g. inside ``contextvars.Context.run``)."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}")
+    _call_priority.set(priority)
+
+
+@contextmanager
+def call_priority(priority: str) -> Iterator[None]:
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}")
+    token = _call_priority.set(priority)
+    try:
+        yield
+    finally:
+        _call_priority.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("priority", "event", "granted")
+
+    def __init__(self, priority: str) -> None:
+        self.priority = priority
+        self.event = threading.Event()
+        self.granted = False
+
+
+class PriorityLimiter:
+    """At most ``limit`` concurrent calls, handed out by priority class with ``interactive_reserve`` slots held back."""
+
+    def __init__(self, name: str, limit: int, interactive_reserve: int = 1) -> None:
+        self.name = name
+        self.limit = max(1, limit)
+        self.interactive_reserve = min(max(0, interactive_reserve), self.limit - 1)
+        self.in_flight = 0
+        self._low_in_flight = 0
+        self._waiters: Dict[str, Deque[_Waiter]] = {priority: deque() for priority in PRIORITIES}
+        # Virtual finish time per non-interactive class; the class that is furthest behind goes next.
+        self._virtual: Dict[str, float] = {BACKGROUND: 0.0, BATCH: 0.0}
+        self._lock = threading.Lock()
+
+    def queued(self, priority: str) -> int:
+        return len(self._waiters[priority])
+
+    def acquire(self, priority: str, timeout: Optional[float] = None) -> None:
+        """Block until a slot is granted; raise ``QueueTimeoutError`` after ``timeout`` seconds."""
+        waiter = _Waiter(priority)
+        started = time.monotonic()
+        with self._lock:
+            queue = self._waiters[priority]
+            if not queue and priority in self._virtual:
+                # A class returning from idle resumes at the current virtual time instead of claiming a backlog.
+                self._virtual[priority] = max(self._virtual[priority], min(self._virtual.values()))
+            queue.append(waiter)
+            self._dispatch()
+        if not waiter.granted and not waiter.event.wait(timeout):
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters[priority].remove(waiter)
+                    waited = time.monotonic() - started
+                    SCHEDULER_TIMEOUTS.inc(upstream=self.name, priority=priority)
+                    SCHEDULER_WAIT.observe(waited, upstream=self.name, priority=priority)
+                    raise QueueTimeoutError(self.name, priority, waited)
+        SCHEDULER_WAIT.observe(time.monotonic() - started, upstream=self.name, priority=priority)
+
+    def release(self, priority: str) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if priority != INTERACTIVE:
+                self._low_in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: str, timeout: Optional[float] = None) -> Iterator[None]:
+        self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters while any can start. Caller holds the lock."""
+        while self.in_flight < self.limit:
+            if self._waiters[INTERACTIVE]:
+                self._grant(self._waiters[INTERACTIVE].popleft())
+                continue
+            if self._low_in_flight >= self.limit - self.interactive_reserve:
+                return
+            waiting = [priority for priority in (BACKGROUND, BATCH) if self._waiters[priority]]
+            if not waiting:
+                return
+            priority = min(waiting, key=lambda candidate: self._virtual[candidate])
+            self._virtual[priority] += 1.0 / _WEIGHTS[priority]
+            self._grant(self._waiters[priority].popleft())
+
+    def _grant(self, waiter: _Waiter) -> None:
+        self.in_flight += 1
+        if waiter.priority != INTERACTIVE:
+            self._low_in_flight += 1
+        waiter.granted = True
+        waiter.event.set()
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "limit": self.limit,
+            "interactive_reserve": self.interactive_reserve,
+            "in_flight": self.in_flight,
+            "queued": {priority: len(waiters) for priority, waiters in self._waiters.items()},
+        }
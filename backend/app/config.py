@@ -3,6 +3,7 @@ Centralized Pydantic settings for Azure + Cosmos integration.
 """
 from functools import lru_cache
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -21,6 +22,10 @@ class Settings(BaseSettings):
     cosmos_key: str = ""
     cosmos_database: str = "ny-civic-sphere"
     cosmos_container: str = "dashboard"
+    # Forum posts and thread counters, partitioned by /thread_id; only written when Cosmos is configured
+    cosmos_forum_container: str = "forum"
+    # Per-worker live vote totals and one document per voter, partitioned by /election_id
+    cosmos_votes_container: str = "votes"
     azure_functions_base_url: str = ""
     ai_suggestion_function_key: str = ""
     # Azure AI Search configuration
@@ -40,6 +45,119 @@ class Settings(BaseSettings):
     # NYC calendar alerts API configuration
     nyc_calendar_alerts_base_url: str = "https://api.nyc.gov/public/api/GetCalendar"
     nyc_calendar_alerts_key: str = ""
+    # Logging: level, "text" or "json" (opt-in) lines written by a background thread, records buffered before new ones are
+    # dropped, and the fraction of DEBUG/INFO records kept per logger (and its children)
+    log_level: str = "INFO"
+    log_format: str = "text"
+    log_queue_size: int = 10000
+    log_sample_rates: Dict[str, float] = {"app.main.fields": 0.01, "app.clients.azure_search.fields": 0.01}
+    # Tracing: number of recent traces kept in memory and an optional OTLP/JSON lines file export path
+    trace_buffer_size: int = 200
+    trace_otlp_file: str = ""
+    # Admin and /debug endpoints (profiling, traces, startup and upstream state) are disabled unless a token is configured
+    admin_token: str = ""
+    # Sampling profiler: fraction of requests profiled automatically, sampling interval and bounded store sizes
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: float = 5.0
+    profile_store_size: int = 100
+    profile_max_concurrent: int = 4
+    # Cache tier for expensive upstream results: "local" (per process) or "shared" (tmpfs files shared by all
+    # workers on the host). cache_dir defaults to /dev/shm/ny-civic-sphere-cache.
+    cache_backend: str = "local"
+    cache_dir: str = ""
+    dashboard_cache_ttl_seconds: float = 60.0
+    service_alerts_cache_ttl_seconds: float = 300.0
+    # Warm start: last good dashboard and service alert data written to disk every warm_start_interval_seconds and
+    # loaded by the next worker at startup. warm_start_path defaults to a file in the temp directory; on App Service
+    # point it at /home so it survives restarts. Snapshots older than warm_start_max_age_seconds are ignored.
+    warm_start_enabled: bool = True
+    warm_start_path: str = ""
+    warm_start_interval_seconds: float = 60.0
+    warm_start_max_age_seconds: float = 86400.0
+    # Days in each rolling window of the live snapshot metrics (current vs previous window gives the trend)
+    snapshot_window_days: int = 7
+    # Offline chat retrieval index built by `python -m app.search.ingest`; defaults to backend/data/local_index
+    local_retrieval_dir: str = ""
+    # Chat sessions: idle TTL, max sessions per process, verbatim turns kept and running summary size
+    chat_session_ttl_seconds: float = 1800.0
+    chat_max_sessions: int = 10000
+    chat_history_turns: int = 4
+    chat_summary_chars: int = 1200
+    # Batch chat: distinct questions answered concurrently across all in-flight batches
+    chat_batch_concurrency: int = 8
+    # Forum write-behind: documents per Cosmos transactional batch (max 100), how long a batch may wait to fill,
+    # queued documents before post creation blocks, how long it blocks before answering 503, and how long
+    # shutdown waits for the final flush
+    forum_write_batch_size: int = 100
+    forum_write_flush_ms: float = 5.0
+    forum_write_max_pending: int = 10000
+    forum_write_submit_timeout_seconds: float = 2.0
+    forum_write_shutdown_timeout_seconds: float = 10.0
+    # Live forum updates over SSE: streams held per worker, idle keepalive interval and events kept for
+    # Last-Event-ID resumption
+    forum_stream_max_subscribers: int = 10000
+    forum_stream_heartbeat_seconds: float = 15.0
+    forum_stream_history: int = 1000
+    # Background forum AI: model-calling workers, how often dirty summaries are regenerated, and moderator
+    # debounce after a thread's latest post, minimum gap between interventions and new posts needed for one
+    forum_ai_workers: int = 2
+    forum_ai_batch_interval_seconds: float = 2.0
+    forum_moderator_debounce_seconds: float = 30.0
+    forum_moderator_cooldown_seconds: float = 300.0
+    forum_moderator_min_posts: int = 3
+    # Worker processes per host; startup.sh runs gunicorn with this many. Voting needs Cosmos when it is above 1.
+    web_concurrency: int = 1
+    # Live election votes: counter shards, how often reads see new votes, and how often totals are flushed (and the
+    # other workers' totals read back)
+    vote_shards: int = 16
+    vote_tally_refresh_ms: float = 300.0
+    vote_flush_seconds: float = 2.0
+    # How long an Idempotency-Key on POST /forum/threads/{id}/posts maps to the post it created
+    idempotency_ttl_seconds: float = 86400.0
+    # Admission control per worker for expensive routes: running requests, queued requests and per-client
+    # requests per minute (0 disables a limit), with bursts of at least admission_min_burst requests. Clients are
+    # keyed by X-API-Key when it is one of admission_api_keys, else by IP. The IP is the caller's address from
+    # X-Forwarded-For only when the request came through a proxy listed in FORWARDED_ALLOW_IPS (see startup.sh).
+    admission_chat_concurrency: int = 8
+    admission_chat_queue: int = 16
+    admission_chat_rate_per_minute: float = 30.0
+    admission_ai_summary_concurrency: int = 2
+    admission_ai_summary_queue: int = 4
+    admission_ai_summary_rate_per_minute: float = 10.0
+    admission_min_burst: float = 5.0
+    admission_queue_timeout_seconds: float = 5.0
+    admission_trust_forwarded_for: bool = False
+    admission_api_keys: List[str] = []
+    # Upstream resilience: per-attempt timeouts, retries with full-jitter backoff capped by a retry budget,
+    # per-upstream circuit breakers, and hedging of idempotent NYC API GETs after nyc_hedge_after_ms (0 disables)
+    upstream_timeout_seconds: float = 10.0
+    openai_timeout_seconds: float = 60.0
+    upstream_max_attempts: int = 3
+    upstream_retry_base_ms: float = 100.0
+    upstream_retry_max_ms: float = 2000.0
+    upstream_retry_budget_ratio: float = 0.2
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+    nyc_timeout_seconds: float = 2.5
+    nyc_deadline_seconds: float = 6.0
+    nyc_hedge_after_ms: float = 0.0
+    # Upstream scheduling: concurrent calls per upstream (0 disables the limit), of which a share is held back for
+    # interactive calls; background and batch calls queue for the rest
+    upstream_default_concurrency: int = 16
+    upstream_concurrency: Dict[str, int] = {
+        "cosmos": 32,
+        "azure_search": 16,
+        "azure_openai": 16,
+        "nyc_calendar": 8,
+        "nyc_calendar_alerts": 4,
+        "azure_functions": 8,
+    }
+    upstream_interactive_reserve_ratio: float = 0.25
+    # Fault injection for tail-latency and fallback testing: per-upstream rules (see app/clients/faults.py), also
+    # replaceable at runtime through PUT /api/admin/faults. Off unless fault_injection_enabled is set.
+    fault_injection_enabled: bool = False
+    fault_injection: Dict[str, Dict[str, Any]] = {}
+    fault_injection_seed: Optional[int] = None
 
 
 @lru_cache
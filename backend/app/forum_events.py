@@ -0,0 +1,212 @@
+"""
+In-process pub/sub hub for live forum updates, streamed to browsers as Server-Sent Events.
+
+``ForumRepository.create_post`` publishes from a threadpool worker; each subscriber is an ``asyncio.Queue`` read
+by its SSE response on the event loop. A publish encodes the event once, records it in a short replay history
+and hands it to the loop in a single ``call_soon_threadsafe``, so an idle subscriber costs one queue and one
+suspended coroutine and thousands of them fit in a worker.
+
+Event ids are ``<epoch>-<sequence>``. The epoch is drawn once per hub, so ids from another worker or from before
+a restart are never mistaken for this hub's history; a client presenting one is told to resync.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .metrics import REGISTRY
+from .schemas import ForumPost, ForumThread
+
+THREAD_LIST_TOPIC = "threads"
+
+STREAM_EVENTS = REGISTRY.counter("forum_stream_events_total", "Forum events published to live subscribers.", ("event",))
+STREAM_SUBSCRIBERS = REGISTRY.gauge("forum_stream_subscribers", "Live forum stream connections in this worker.")
+STREAM_LAGGED = REGISTRY.counter(
+    "forum_stream_lagged_total", "Live subscribers disconnected because they fell too far behind."
+)
+
+
+def thread_topic(thread_id: str) -> str:
+    return f"thread:{thread_id}"
+
+
+class SubscriberLimitError(Exception):
+    """The worker already holds ``max_subscribers`` live streams."""
+
+
+@dataclass(frozen=True)
+class ForumEvent:
+    id: str
+    sequence: int
+    name: str
+    topics: Tuple[str, ...]
+    data: str
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.name}\ndata: {self.data}\n\n"
+
+
+def _resync(event_id: Optional[str]) -> str:
+    # Carries the current id so EventSource reconnects from it instead of repeating the unusable one.
+    prefix = f"id: {event_id}\n" if event_id else ""
+    return f"{prefix}event: resync\ndata: {{}}\n\n"
+
+
+class Subscription:
+    __slots__ = ("topics", "queue", "loop", "lagged", "resync_at")
+
+    def __init__(self, topics: Tuple[str, ...], queue_size: int) -> None:
+        self.topics = topics
+        self.queue: "asyncio.Queue[ForumEvent]" = asyncio.Queue(maxsize=queue_size)
+        self.loop = asyncio.get_running_loop()
+        self.lagged = False
+        # Set when the client's Last-Event-ID cannot be replayed: the id of the last event before it subscribed.
+        self.resync_at: Optional[str] = None
+
+
+class ForumEventHub:
+    """
+    Topic-based fan-out with a bounded replay history for SSE ``Last-Event-ID`` reconnects.
+
+    A subscriber whose queue fills up (a stalled client) is not allowed to slow publishers down: it is marked
+    lagged, told to resync and disconnected. A subscriber whose ``Last-Event-ID`` is unknown here (another worker,
+    an earlier boot) or already gone from the history is told to resync and then receives live events.
+    """
+
+    def __init__(self, history: int = 1000, queue_size: int = 256, max_subscribers: int = 10000) -> None:
+        self._history: Deque[ForumEvent] = deque(maxlen=history)
+        self._queue_size = queue_size
+        self._max_subscribers = max_subscribers
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._count = 0
+        self.epoch = f"{time.time_ns():x}{os.getpid():x}"
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def _sequence(self, event_id: str) -> Optional[int]:
+        """The sequence number of one of this hub's ids, or None for anything it did not issue."""
+        epoch, _, sequence = event_id.rpartition("-")
+        if epoch != self.epoch or not sequence.isdigit() or int(sequence) >= self._next_id:
+            return None
+        return int(sequence)
+
+    def _last_id(self) -> str:
+        return f"{self.epoch}-{self._next_id - 1}"
+
+    def publish(self, name: str, topics: Iterable[str], payload: dict) -> None:
+        data = json.dumps(payload, separators=(",", ":"), default=str)
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        with self._lock:
+            event = ForumEvent(f"{self.epoch}-{self._next_id}", self._next_id, name, tuple(topics), data)
+            self._next_id += 1
+            self._history.append(event)
+            targets: Set[Subscription] = set()
+            for topic in event.topics:
+                targets.update(self._subscribers.get(topic, ()))
+        STREAM_EVENTS.inc(event=name)
+        for subscription in targets:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, event, subscriptions)
+            except RuntimeError:
+                # The loop has shut down; its subscribers are gone with it.
+                pass
+
+    def publish_post(self, post: ForumPost, thread: ForumThread) -> None:
+        """Announce a new post to the thread's subscribers and its new counters to thread-list subscribers too."""
+        topic = thread_topic(thread.id)
+        self.publish("post", (topic,), post.model_dump(mode="json"))
+        self.publish(
+            "thread",
+            (topic, THREAD_LIST_TOPIC),
+            {"thread_id": thread.id, "post_count": thread.post_count, "last_activity": thread.last_activity.isoformat()},
+        )
+
+    def subscribe(self, topics: Tuple[str, ...], last_event_id: Optional[str] = None) -> Subscription:
+        """Register a subscriber on the running loop, first queueing any history after ``last_event_id``."""
+        subscription = Subscription(topics, self._queue_size)
+        with self._lock:
+            if self._count >= self._max_subscribers:
+                raise SubscriberLimitError(f"Live stream limit of {self._max_subscribers} reached")
+            if last_event_id is not None:
+                sequence = self._sequence(last_event_id)
+                if sequence is None or (self._history and self._history[0].sequence > sequence + 1):
+                    # Not one of ours, or part of what the client missed has already left the history.
+                    subscription.resync_at = self._last_id()
+                else:
+                    for event in self._history:
+                        if event.sequence > sequence and set(event.topics) & set(topics):
+                            _offer(subscription, event)
+            for topic in topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+            self._count += 1
+            STREAM_SUBSCRIBERS.set(self._count)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None and subscription in subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+            self._count -= 1
+            STREAM_SUBSCRIBERS.set(self._count)
+
+    def full(self) -> bool:
+        return self._count >= self._max_subscribers
+
+    async def stream(
+        self, topics: Tuple[str, ...], last_event_id: Optional[str] = None, heartbeat: float = 15.0
+    ) -> AsyncIterator[str]:
+        """
+        SSE body: queued events as they arrive, a comment line every ``heartbeat`` seconds while idle. The
+        subscription lives exactly as long as the generator runs, so a dropped connection releases it.
+        """
+        try:
+            subscription = self.subscribe(topics, last_event_id)
+        except SubscriberLimitError:
+            yield _resync(None)
+            return
+        try:
+            # Tell EventSource how long to wait before reconnecting.
+            yield "retry: 3000\n\n"
+            if subscription.resync_at is not None:
+                yield _resync(subscription.resync_at)
+            while True:
+                if subscription.lagged:
+                    STREAM_LAGGED.inc()
+                    with self._lock:
+                        last_id = self._last_id()
+                    yield _resync(last_id)
+                    return
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield event.encode()
+        finally:
+            self.unsubscribe(subscription)
+
+
+def _offer(subscription: Subscription, event: ForumEvent) -> None:
+    if subscription.lagged:
+        return
+    try:
+        subscription.queue.put_nowait(event)
+    except asyncio.QueueFull:
+        subscription.lagged = True
+
+
+def _deliver(event: ForumEvent, subscriptions: List[Subscription]) -> None:
+    for subscription in subscriptions:
+        _offer(subscription, event)
@@ -3,21 +3,51 @@ FastAPI entrypoint for NY Civic Sphere backend.
 """
 from __future__ import annotations
 
+import contextvars
+import hmac
 import logging
-from datetime import date, timedelta
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 
-from fastapi import Depends, FastAPI, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from .admission import AdmissionMiddleware, policies_from_settings
+from .cache import get_cache
 from .clients.azure_openai import AzureOpenAIClient
 from .clients.azure_search import AzureSearchClient
+from .clients.faults import FAULTS, FaultRule
+from .clients.cosmos import MAX_TRANSACTIONAL_BATCH, CosmosBatchClient
 from .clients.nyc_calendar_alerts import NYCCalendarAlertsClient
+from .clients.resilience import upstream_states
+from .clients.scheduler import BACKGROUND, BATCH, call_priority, set_call_priority
 from .config import get_settings, Settings
-from .repositories.dashboard import DashboardRepository
-from .repositories.forum import ForumRepository
+from .forum_events import THREAD_LIST_TOPIC, ForumEventHub, thread_topic
+from .metrics import CONTENT_TYPE_LATEST, REGISTRY, MetricsMiddleware, register_lru_cache
+from .profiling import PROFILER, ProfilingMiddleware
+from .snapshot_metrics import SNAPSHOT_METRICS, new_revision
+from .startup_timing import STARTUP
+from .structured_logging import configure_logging, shutdown_logging
+from .repositories.chat_sessions import ChatSessionStore
+from .repositories.dashboard import DASHBOARD_CACHE_KEY, SNAPSHOT_METRICS_SECTION, WARM_START_SECTION, DashboardRepository
+from .repositories.forum import ForumRepository, ForumStoreUnavailable, ThreadSource
+from .repositories.forum_ai import ForumAIPipeline, ThreadAIGenerator
+from .repositories.ids import IdempotencyConflictError
+from .repositories.votes import VoteCounter
+from .repositories.write_behind import GroupCommitWriter
 from .schemas import (
+    ChatBatchItem,
+    ChatBatchRequest,
+    ChatBatchResponse,
     ChatRequest,
     ChatResponse,
     CommunitySnapshot,
@@ -27,29 +57,245 @@ from .schemas import (
     Election,
     Event,
     ForumResponse,
+    ForumSearchHit,
+    ForumSearchResponse,
+    ForumThread,
     ForumThreadResponse,
     Policy,
     ServiceAlertsResponse,
     Source,
     Story,
+    VoteRequest,
+    VoteResponse,
 )
+from .tracing import TRACER, TracingMiddleware, render_waterfall
+from .warm_start import WARM_START, default_snapshot_path
+from .wire import FIELDS_QUERY, shaped_response
 
 # Get the static files directory (where frontend build will be copied)
 STATIC_DIR = Path(__file__).resolve().parents[1] / "static"
 
+logger = logging.getLogger(__name__)
+# Search result field discovery: one line per request, sampled by LOG_SAMPLE_RATES.
+fields_logger = logging.getLogger(f"{__name__}.fields")
+
+STARTUP_READY_SECONDS = REGISTRY.gauge("app_startup_ready_seconds", "Seconds from the server entry point import until the worker was ready.")
+STARTUP_IMPORT_SECONDS = REGISTRY.gauge("app_startup_import_seconds", "Seconds spent importing modules during startup.")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    STARTUP.ready()
+    report = STARTUP.as_dict(limit=5)
+    STARTUP_READY_SECONDS.set(report["ready_ms"] / 1000.0)
+    STARTUP_IMPORT_SECONDS.set(report["import_ms"] / 1000.0)
+    logger.info(
+        "Worker ready in %.1f ms (%.1f ms importing %d modules; top: %s)",
+        report["ready_ms"],
+        report["import_ms"],
+        report["modules_imported"],
+        ", ".join(f"{p['package']}={p['self_ms']:.0f}ms" for p in report["top_packages"][:5]),
+    )
+    _warm_start()
+    yield
+    if get_votes.cache_info().currsize:
+        get_votes().close()
+    if get_forum_ai.cache_info().currsize:
+        get_forum_ai().close()
+    if get_forum_writer.cache_info().currsize:
+        writer = get_forum_writer()
+        if writer is not None:
+            # Durable shutdown: persist every buffered post before the worker exits.
+            writer.close(get_settings().forum_write_shutdown_timeout_seconds)
+    WARM_START.close()
+    shutdown_logging()
+
+
 # Create main app and API app
-app = FastAPI(title="NY Civic Sphere", version="0.1.0")
+app = FastAPI(title="NY Civic Sphere", version="0.1.0", lifespan=lifespan)
 api_app = FastAPI(title="NY Civic Sphere API", version="0.1.0")
 
-logger = logging.getLogger(__name__)
+_settings = get_settings()
+configure_logging(_settings.log_level, _settings.log_format, _settings.log_queue_size, _settings.log_sample_rates)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(ProfilingMiddleware, sample_rate=_settings.profile_sample_rate, admin_token=_settings.admin_token)
+app.add_middleware(
+    AdmissionMiddleware,
+    policies=policies_from_settings(_settings),
+    queue_timeout=_settings.admission_queue_timeout_seconds,
+    trust_forwarded_for=_settings.admission_trust_forwarded_for,
+    api_keys=_settings.admission_api_keys,
+)
+app.add_middleware(MetricsMiddleware)
+register_lru_cache("settings", get_settings)
+TRACER.configure(_settings.trace_buffer_size, _settings.trace_otlp_file, _settings.app_name)
+PROFILER.configure(_settings.profile_interval_ms, _settings.profile_store_size, _settings.profile_max_concurrent)
+SNAPSHOT_METRICS.configure(_settings.snapshot_window_days)
+if _settings.fault_injection_enabled:
+    FAULTS.configure(_settings.fault_injection, _settings.fault_injection_seed)
+if _settings.warm_start_enabled:
+    WARM_START.configure(
+        _settings.warm_start_path or default_snapshot_path(),
+        _settings.warm_start_interval_seconds,
+        _settings.warm_start_max_age_seconds,
+    )
 
 
 def get_repo() -> DashboardRepository:
     return DashboardRepository()
 
 
+@lru_cache
+def get_forum_writer() -> Optional[GroupCommitWriter]:
+    client = CosmosBatchClient(get_settings().cosmos_forum_container)
+    if not client.configured:
+        return None
+    settings = get_settings()
+    return GroupCommitWriter(
+        _background(client.upsert_batch),
+        max_batch=min(settings.forum_write_batch_size, MAX_TRANSACTIONAL_BATCH),
+        flush_interval=settings.forum_write_flush_ms / 1000.0,
+        max_pending=settings.forum_write_max_pending,
+    )
+
+
+@lru_cache
+def get_votes() -> VoteCounter:
+    settings = get_settings()
+    client = CosmosBatchClient(settings.cosmos_votes_container)
+    if not client.configured:
+        return VoteCounter(
+            shards=settings.vote_shards,
+            refresh_interval=settings.vote_tally_refresh_ms / 1000.0,
+            flush_interval=settings.vote_flush_seconds,
+        )
+    node = f"{socket.gethostname()}-{os.getpid()}"
+    return VoteCounter(
+        shards=settings.vote_shards,
+        refresh_interval=settings.vote_tally_refresh_ms / 1000.0,
+        flush_interval=settings.vote_flush_seconds,
+        sink=_vote_sink(client, node),
+        claim=_voter_claim(client),
+        load=_background(_stored_votes(client, node)),
+    )
+
+
+def _background(write):
+    """Run a sink's upstream calls at background priority; it is called from flusher threads, not for a request."""
+
+    def run(*args):
+        with call_priority(BACKGROUND):
+            return write(*args)
+
+    return run
+
+
+def _vote_sink(client: CosmosBatchClient, node: str):
+    # Each worker upserts its own running total per election; the election's count is the sum over workers.
+    def write(totals: Dict[str, int]) -> None:
+        updated_at = datetime.now(timezone.utc).isoformat()
+        for election_id, votes in totals.items():
+            client.upsert_batch(
+                election_id,
+                [{"id": f"{election_id}:{node}", "election_id": election_id, "node": node, "votes": votes, "updated_at": updated_at}],
+            )
+
+    return _background(write)
+
+
+def _voter_claim(client: CosmosBatchClient):
+    # One document per voter and election; Cosmos rejects a second one with the same id whichever worker writes it.
+    # This is the one synchronous Cosmos write on the request path, on purpose: the 200/409 answer depends on it,
+    # and batching it behind the tally flush would mean answering "counted" for votes later found to be repeats.
+    # It is a single-partition point create (one round trip, no read first) behind the cosmos breaker and limiter;
+    # `python -m benchmarks.load --routes dashboard.vote` measures its cost.
+    def claim(election_id: str, fingerprint: int) -> bool:
+        document = {
+            "id": f"{election_id}:voter:{fingerprint:016x}",
+            "election_id": election_id,
+            "voted_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return client.create_once(document)
+
+    return claim
+
+
+def _stored_votes(client: CosmosBatchClient, node: str):
+    # Totals flushed by the other workers and by earlier runs on other pids; this worker's own come from memory.
+    # One single-partition query per open election rather than a cross-partition scan of every voter document.
+    query = "SELECT c.election_id, c.votes FROM c WHERE IS_DEFINED(c.node) AND c.node != @node"
+
+    def read(election_ids: List[str]) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for election_id in election_ids:
+            rows = client.query(query, [{"name": "@node", "value": node}], partition_key=election_id)
+            totals[election_id] = sum(int(row.get("votes") or 0) for row in rows)
+        return totals
+
+    return read
+
+
+@lru_cache
+def get_forum_events() -> ForumEventHub:
+    settings = get_settings()
+    return ForumEventHub(history=settings.forum_stream_history, max_subscribers=settings.forum_stream_max_subscribers)
+
+
+@lru_cache
+def get_forum_ai() -> ForumAIPipeline:
+    settings = get_settings()
+    return ForumAIPipeline(
+        ThreadAIGenerator(AzureOpenAIClient()),
+        workers=settings.forum_ai_workers,
+        batch_interval=settings.forum_ai_batch_interval_seconds,
+        moderator_debounce=settings.forum_moderator_debounce_seconds,
+        moderator_cooldown=settings.forum_moderator_cooldown_seconds,
+        moderator_min_posts=settings.forum_moderator_min_posts,
+    )
+
+
+@lru_cache
 def get_forum_repo() -> ForumRepository:
-    return ForumRepository()
+    # One repository per process so posts and the forum search index survive across requests.
+    return ForumRepository(writer=get_forum_writer(), events=get_forum_events(), ai=get_forum_ai(), load=_stored_thread())
+
+
+def _stored_thread() -> Optional[ThreadSource]:
+    # Every document in the thread's partition: its posts and its counter document.
+    client = CosmosBatchClient(get_settings().cosmos_forum_container)
+    if not client.configured:
+        return None
+
+    def load(thread_id: str) -> List[dict]:
+        return client.query("SELECT * FROM c", [], partition_key=thread_id)
+
+    return load
+
+
+def _forum_unavailable(exc: ForumStoreUnavailable) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "5"})
+
+
+@lru_cache
+def get_chat_sessions() -> ChatSessionStore:
+    settings = get_settings()
+    return ChatSessionStore(
+        ttl_seconds=settings.chat_session_ttl_seconds,
+        max_sessions=settings.chat_max_sessions,
+        max_turns=settings.chat_history_turns,
+        summary_chars=settings.chat_summary_chars,
+        # The local tier is per process already, like the store itself; only the shared tier spans workers.
+        shared=get_cache() if get_cache().name == "shared" else None,
+    )
+
+
+def require_admin(
+    x_admin_token: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),
+) -> None:
+    """Reject admin calls unless ADMIN_TOKEN is configured and matches the X-Admin-Token header."""
+    if not settings.admin_token or not hmac.compare_digest(x_admin_token or "", settings.admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
 
 
 @api_app.get("/health", tags=["meta"])
@@ -58,8 +304,10 @@ def health(settings: Settings = Depends(get_settings)) -> dict:
 
 
 @api_app.get("/dashboard", response_model=DashboardResponse, tags=["dashboard"])
-def read_dashboard(repo: DashboardRepository = Depends(get_repo)) -> DashboardResponse:
-    return repo.fetch_dashboard()
+def read_dashboard(request: Request, repo: DashboardRepository = Depends(get_repo)) -> Response:
+    dashboard = repo.fetch_dashboard()
+    dashboard.elections = _with_live_votes(dashboard.elections)
+    return shaped_response(request, dashboard, DashboardResponse)
 
 
 @api_app.get("/dashboard/snapshot", response_model=CommunitySnapshot, tags=["dashboard"])
@@ -68,28 +316,59 @@ def read_snapshot(repo: DashboardRepository = Depends(get_repo)) -> CommunitySna
 
 
 @api_app.get("/dashboard/stories", response_model=list[Story], tags=["dashboard"])
-def read_stories(repo: DashboardRepository = Depends(get_repo)) -> list[Story]:
-    return repo.fetch_dashboard().stories
+def read_stories(request: Request, fields: Optional[str] = FIELDS_QUERY, repo: DashboardRepository = Depends(get_repo)) -> Response:
+    return shaped_response(request, repo.fetch_dashboard().stories, List[Story], Story, fields)
 
 
 @api_app.get("/dashboard/policies", response_model=list[Policy], tags=["dashboard"])
-def read_policies(repo: DashboardRepository = Depends(get_repo)) -> list[Policy]:
-    return repo.fetch_dashboard().policies
+def read_policies(request: Request, fields: Optional[str] = FIELDS_QUERY, repo: DashboardRepository = Depends(get_repo)) -> Response:
+    return shaped_response(request, repo.fetch_dashboard().policies, List[Policy], Policy, fields)
 
 
 @api_app.get("/dashboard/discussions", response_model=list[Discussion], tags=["dashboard"])
-def read_discussions(repo: DashboardRepository = Depends(get_repo)) -> list[Discussion]:
-    return repo.fetch_dashboard().discussions
+def read_discussions(request: Request, fields: Optional[str] = FIELDS_QUERY, repo: DashboardRepository = Depends(get_repo)) -> Response:
+    return shaped_response(request, repo.fetch_dashboard().discussions, List[Discussion], Discussion, fields)
 
 
 @api_app.get("/dashboard/events", response_model=list[Event], tags=["dashboard"])
-def read_events(repo: DashboardRepository = Depends(get_repo)) -> list[Event]:
-    return repo.fetch_dashboard().events
+def read_events(request: Request, fields: Optional[str] = FIELDS_QUERY, repo: DashboardRepository = Depends(get_repo)) -> Response:
+    return shaped_response(request, repo.fetch_dashboard().events, List[Event], Event, fields)
+
+
+def _with_live_votes(elections: List[Election]) -> List[Election]:
+    votes = get_votes()
+    votes.register(elections)
+    return votes.apply(elections)
 
 
 @api_app.get("/dashboard/elections", response_model=list[Election], tags=["dashboard"])
-def read_elections(repo: DashboardRepository = Depends(get_repo)) -> list[Election]:
-    return repo.fetch_dashboard().elections
+def read_elections(request: Request, fields: Optional[str] = FIELDS_QUERY, repo: DashboardRepository = Depends(get_repo)) -> Response:
+    return shaped_response(request, _with_live_votes(repo.fetch_dashboard().elections), List[Election], Election, fields)
+
+
+@api_app.post("/dashboard/elections/{election_id}/votes", response_model=VoteResponse, tags=["dashboard"])
+def cast_vote(election_id: str, request: VoteRequest) -> VoteResponse:
+    """
+    Record one vote per voter and election. Returns 409 if this voter already voted; ``votes`` is the tally as of
+    its last refresh (a few hundred milliseconds). Voters are recorded in Cosmos, so the check holds across workers
+    and restarts; without Cosmos, voting is refused with 503 when several workers would each keep their own voters.
+    """
+    votes = get_votes()
+    if not votes.shared and get_settings().web_concurrency > 1:
+        raise HTTPException(status_code=503, detail="Voting needs Cosmos DB when running several workers")
+    if not votes.knows(election_id):
+        # Learn the open elections from the (cached) dashboard the first time around.
+        _with_live_votes(get_repo().fetch_dashboard().elections)
+        if not votes.knows(election_id):
+            raise HTTPException(status_code=404, detail="Election not found")
+    try:
+        counted = votes.vote(election_id, request.voter_id)
+    except Exception as exc:
+        logger.warning("Could not record vote in %s: %s", election_id, exc)
+        raise HTTPException(status_code=503, detail="Votes cannot be recorded right now", headers={"Retry-After": "5"})
+    if not counted:
+        raise HTTPException(status_code=409, detail="Already voted in this election")
+    return VoteResponse(election_id=election_id, counted=True, votes=votes.votes(election_id))
 
 
 @api_app.post("/dashboard/ai-summary", tags=["dashboard"])
@@ -98,15 +377,43 @@ def ai_summary(repo: DashboardRepository = Depends(get_repo)) -> dict:
     return summary or {"message": "AI summary unavailable", "status": "fallback"}
 
 
+def _stamp_revision(data: Optional[dict]) -> Optional[dict]:
+    return {**data, "revision": new_revision()} if data else data
+
+
+SERVICE_ALERTS_SECTION = "service_alerts"
+
+
+def _service_alerts_window() -> "tuple[str, str]":
+    """The past 7 days (from today - 7 days to today)."""
+    today = date.today()
+    return (today - timedelta(days=7)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")
+
+
+def _service_alerts_key(fromdate: str, todate: str) -> str:
+    return f"service_alerts:{fromdate}:{todate}"
+
+
+def _load_service_alerts(fromdate: str, todate: str) -> Optional[dict]:
+    data = NYCCalendarAlertsClient().fetch_alerts(fromdate, todate)
+    if data and data.get("days"):
+        WARM_START.put(SERVICE_ALERTS_SECTION, data)
+    else:
+        # While the alerts API is down, the last alerts it returned beat an empty timeline.
+        data = WARM_START.get(SERVICE_ALERTS_SECTION) or data
+    return _stamp_revision(data)
+
+
 @api_app.get("/dashboard/service-alerts", response_model=ServiceAlertsResponse, tags=["dashboard"])
-def read_service_alerts() -> ServiceAlertsResponse:
+def read_service_alerts(settings: Settings = Depends(get_settings)) -> ServiceAlertsResponse:
     """Fetch service alerts for the past 7 days (from today - 7 days to today)."""
-    client = NYCCalendarAlertsClient()
-    today = date.today()
-    fromdate = (today - timedelta(days=7)).strftime("%Y-%m-%d")
-    todate = today.strftime("%Y-%m-%d")
-    
-    data = client.fetch_alerts(fromdate, todate)
+    fromdate, todate = _service_alerts_window()
+    data = get_cache().get_or_compute(
+        _service_alerts_key(fromdate, todate),
+        lambda: _load_service_alerts(fromdate, todate),
+        settings.service_alerts_cache_ttl_seconds,
+    )
+    SNAPSHOT_METRICS.observe_service_alerts(data)
     if data and "days" in data:
         try:
             return ServiceAlertsResponse(**data)
@@ -118,42 +425,69 @@ def read_service_alerts() -> ServiceAlertsResponse:
     return ServiceAlertsResponse(days=[])
 
 
-@api_app.post("/chat", response_model=ChatResponse, tags=["chat"])
-def chat(request: ChatRequest) -> ChatResponse:
+def _warm_start() -> None:
     """
-    Handle chat messages using Azure AI Search and Azure OpenAI RAG.
-    
-    Flow:
-    1. Query Azure AI Search with user message
-    2. Use search results as context for Azure OpenAI
-    3. Generate RAG response with source citations
+    Seed empty caches from the on-disk snapshot so the first requests are served last-known-good data, then
+    refresh whatever was seeded from the upstreams in the background.
     """
-    search_client = AzureSearchClient()
-    openai_client = AzureOpenAIClient()
-    
-    # Search for relevant documents
-    logger.info(f"Chat endpoint called with message: '{request.message}'")
-    search_results = search_client.search(request.message, top=5)
-    
-    logger.info(f"Search returned {len(search_results)} results")
-    
-    # Log the structure of first result for debugging
-    if search_results:
-        first_result_keys = list(search_results[0].keys())
-        logger.debug(f"First search result has fields: {first_result_keys}")
-    else:
-        logger.warning("No search results returned")
-    
-    # Generate sources from search results
+    sections = WARM_START.load()
+    settings = get_settings()
+    cache = get_cache()
+    seeded = []
+    policy_state = sections.get(SNAPSHOT_METRICS_SECTION)
+    if policy_state:
+        SNAPSHOT_METRICS.restore_policies(policy_state)
+    dashboard = sections.get(WARM_START_SECTION)
+    if dashboard and cache.get(DASHBOARD_CACHE_KEY) is None:
+        try:
+            DashboardResponse.model_validate(dashboard)
+        except Exception as exc:
+            logger.warning("Warm-start dashboard no longer matches the schema: %s", exc)
+        else:
+            cache.set(DASHBOARD_CACHE_KEY, _stamp_revision(dashboard), settings.dashboard_cache_ttl_seconds)
+            seeded.append(WARM_START_SECTION)
+    alerts = sections.get(SERVICE_ALERTS_SECTION)
+    window = _service_alerts_window()
+    if alerts and cache.get(_service_alerts_key(*window)) is None:
+        cache.set(_service_alerts_key(*window), _stamp_revision(alerts), settings.service_alerts_cache_ttl_seconds)
+        seeded.append(SERVICE_ALERTS_SECTION)
+    if seeded:
+        threading.Thread(target=_refresh_warm_caches, args=(seeded, window), name="warm-start-refresh", daemon=True).start()
+    WARM_START.start()
+
+
+def _refresh_warm_caches(seeded: List[str], window: "tuple[str, str]") -> None:
+    with call_priority(BACKGROUND):
+        if WARM_START_SECTION in seeded:
+            try:
+                get_repo().refresh()
+            except Exception:
+                logger.exception("Background dashboard refresh after warm start failed")
+        if SERVICE_ALERTS_SECTION in seeded:
+            try:
+                data = _load_service_alerts(*window)
+                if data:
+                    get_cache().set(_service_alerts_key(*window), data, get_settings().service_alerts_cache_ttl_seconds)
+            except Exception:
+                logger.exception("Background service alerts refresh after warm start failed")
+
+
+# If we have search results but no OpenAI, return a simple message
+NO_COMPLETION_RESPONSE = "I found some relevant information, but I'm unable to generate a detailed response at the moment. Please try again later."
+NO_RESULTS_RESPONSE = "I couldn't find relevant information for your question. Please try rephrasing your question or ask about NYC policies, services, or civic information."
+
+
+def _build_sources(search_results: List[dict]) -> List[Source]:
+    """Map raw search results from any index schema onto citation sources."""
     sources = []
     for idx, result in enumerate(search_results):
         # Log all available fields for first result to help identify title field
         if idx == 0:
             all_keys = list(result.keys())
-            logger.info(f"Available fields in search result: {all_keys}")
+            fields_logger.info("Available fields in search result: %s", all_keys)
             # Filter out internal Azure Search fields
             data_keys = [k for k in all_keys if not k.startswith("@") and k not in ["score", "reranker_score"]]
-            logger.info(f"Data fields (excluding Azure metadata): {data_keys}")
+            fields_logger.info("Data fields (excluding Azure metadata): %s", data_keys)
         
         # Try multiple field name variations for title (prioritize knowledge base fields)
         # Knowledge base fields: sourcepage, sourcefile, title, filepath, etc.
@@ -248,7 +582,9 @@ def chat(request: ChatRequest) -> ChatResponse:
         
         # Log which fields were found for first result with more detail
         if idx == 0:
-            logger.info(f"Extracted fields - title: '{title}', url: {url is not None}, content length: {len(content)}, score: {score}")
+            fields_logger.info(
+                "Extracted fields - title: %r, url: %s, content length: %d, score: %s", title, url is not None, len(content), score
+            )
             # Log which specific field was used for title
             title_source = None
             for field in ["sourcepage", "sourcePage", "source_page", "sourcefile", "sourceFile", "source_file", 
@@ -257,9 +593,9 @@ def chat(request: ChatRequest) -> ChatResponse:
                     title_source = field
                     break
             if title_source:
-                logger.info(f"Title extracted from field: '{title_source}' = '{result.get(title_source)}'")
+                fields_logger.info("Title extracted from field: %r = %r", title_source, result.get(title_source))
             else:
-                logger.warning(f"Title fallback used: '{title}' - consider checking available fields in logs")
+                logger.warning("Title fallback used: %r - consider checking available fields in logs", title)
         
         # Don't include URL in sources since we don't want hyperlinks
         sources.append(Source(
@@ -268,58 +604,258 @@ def chat(request: ChatRequest) -> ChatResponse:
             score=score,
             content=content[:200] if content else None,  # Truncate for response
         ))
+    return sources
+
+
+@api_app.post("/chat", response_model=ChatResponse, tags=["chat"])
+def chat(request: ChatRequest, sessions: ChatSessionStore = Depends(get_chat_sessions)) -> ChatResponse:
+    """
+    Handle chat messages using Azure AI Search and Azure OpenAI RAG.
     
-    logger.info(f"Generated {len(sources)} sources from search results")
+    Flow:
+    1. Resume the chat session (or start one) and reuse its search results if the topic hasn't changed
+    2. Otherwise query Azure AI Search with user message
+    3. Use search results, recent turns and the session summary as context for Azure OpenAI
+    4. Generate RAG response with source citations
+    """
+    session = sessions.get_or_create(request.session_id)
+    openai_client = AzureOpenAIClient()
+    
+    # Search for relevant documents
+    logger.info("Chat request", extra={"session_id": session.id, "message_chars": len(request.message)})
+    search_results = sessions.cached_results(session, request.message)
+    if search_results is None:
+        search_results = AzureSearchClient().search(request.message, top=5)
+        if search_results:
+            sessions.remember_results(session, request.message, search_results)
+    else:
+        logger.info("Reusing search results from the previous turn of session %s", session.id)
+    
+    logger.info("Search returned %d results", len(search_results))
+    
+    # Log the structure of first result for debugging
+    if search_results:
+        fields_logger.debug("First search result has fields: %s", list(search_results[0]))
+    else:
+        logger.warning("No search results returned")
+    
+    sources = _build_sources(search_results)
+    logger.info("Generated %d sources from search results", len(sources))
     
     # Generate RAG response
-    response_text = openai_client.generate_rag_response(request.message, search_results)
+    response_text = openai_client.generate_rag_response(
+        request.message,
+        search_results,
+        history=sessions.history(session),
+        summary=session.summary,
+    )
     
     # Fallback if OpenAI is not available or returns None
     if not response_text:
-        if search_results:
-            # If we have search results but no OpenAI, return a simple message
-            response_text = "I found some relevant information, but I'm unable to generate a detailed response at the moment. Please try again later."
-        else:
-            response_text = "I couldn't find relevant information for your question. Please try rephrasing your question or ask about NYC policies, services, or civic information."
+        response_text = NO_COMPLETION_RESPONSE if search_results else NO_RESULTS_RESPONSE
+    else:
+        sessions.record_turn(session, request.message, response_text)
     
     return ChatResponse(
         response=response_text,
         sources=sources,
+        session_id=session.id,
     )
 
 
+@api_app.delete("/chat/sessions/{session_id}", status_code=204, tags=["chat"])
+def delete_chat_session(session_id: str, sessions: ChatSessionStore = Depends(get_chat_sessions)) -> Response:
+    """Forget a chat session's history and cached search results."""
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return Response(status_code=204)
+
+
+@lru_cache
+def get_chat_batch_pool() -> ThreadPoolExecutor:
+    # Shared by every batch so concurrent batches together stay under the configured upstream concurrency.
+    return ThreadPoolExecutor(max_workers=get_settings().chat_batch_concurrency, thread_name_prefix="chat-batch")
+
+
+def _normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def _answer_question(
+    message: str,
+    top: int,
+    search_client: AzureSearchClient,
+    openai_client: AzureOpenAIClient,
+) -> ChatResponse:
+    search_results = search_client.search(message, top=top)
+    response_text = openai_client.generate_rag_response(message, search_results)
+    if not response_text:
+        response_text = NO_COMPLETION_RESPONSE if search_results else NO_RESULTS_RESPONSE
+    return ChatResponse(response=response_text, sources=_build_sources(search_results))
+
+
+def _run_chat_batch(request: ChatBatchRequest) -> "tuple[Dict[str, List[int]], Iterator[tuple[str, Optional[ChatResponse], Optional[str]]]]":
+    """
+    Start one search + completion per distinct question on the shared pool.
+
+    Returns the indexes that share each normalized question and an iterator yielding
+    ``(question, response, error)`` as each distinct question finishes.
+    """
+    indexes: Dict[str, List[int]] = {}
+    for index, question in enumerate(request.questions):
+        indexes.setdefault(_normalize_question(question), []).append(index)
+
+    search_client = AzureSearchClient()
+    openai_client = AzureOpenAIClient()
+    pool = get_chat_batch_pool()
+    futures = {}
+    for key, positions in indexes.items():
+        message = request.questions[positions[0]]
+        # Copy the request context so upstream spans and metrics attach to this request's trace; the copy's
+        # upstream calls queue as batch work behind interactive ones.
+        context = contextvars.copy_context()
+        context.run(set_call_priority, BATCH)
+        future = pool.submit(context.run, _answer_question, message, request.top, search_client, openai_client)
+        futures[future] = key
+
+    def completed() -> Iterator[tuple[str, Optional[ChatResponse], Optional[str]]]:
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                yield key, future.result(), None
+            except Exception as e:
+                logger.warning("Batch chat question failed: %s", e)
+                yield key, None, f"{type(e).__name__}: {e}"
+
+    return indexes, completed()
+
+
+def _batch_items(request: ChatBatchRequest, positions: List[int], answer: Optional[ChatResponse], error: Optional[str]) -> List[ChatBatchItem]:
+    return [
+        ChatBatchItem(
+            index=index,
+            message=request.questions[index],
+            response=answer.response if answer else None,
+            sources=answer.sources if answer else [],
+            error=error,
+        )
+        for index in positions
+    ]
+
+
+@api_app.post("/chat/batch", response_model=ChatBatchResponse, tags=["chat"])
+def chat_batch(request: ChatBatchRequest, stream: bool = Query(False, description="Stream NDJSON items as each question finishes")):
+    """
+    Answer many stateless questions in one call.
+
+    Identical questions (ignoring case and whitespace) are answered once. Distinct questions run their search
+    and completion concurrently on a pool bounded by ``CHAT_BATCH_CONCURRENCY``. A failing question reports
+    an ``error`` on its own items without failing the batch.
+    """
+    indexes, completed = _run_chat_batch(request)
+    if stream:
+        def lines() -> Iterator[str]:
+            for key, answer, error in completed:
+                for item in _batch_items(request, indexes[key], answer, error):
+                    yield item.model_dump_json() + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    results: List[Optional[ChatBatchItem]] = [None] * len(request.questions)
+    for key, answer, error in completed:
+        for item in _batch_items(request, indexes[key], answer, error):
+            results[item.index] = item
+    return ChatBatchResponse(results=results, unique_questions=len(indexes))
+
+
 @api_app.get("/forum/threads", response_model=ForumResponse, tags=["forum"])
-def read_forum_threads(repo: ForumRepository = Depends(get_forum_repo)) -> ForumResponse:
-    """Fetch all forum threads."""
-    return repo.fetch_forum_threads()
+def read_forum_threads(request: Request, fields: Optional[str] = FIELDS_QUERY, repo: ForumRepository = Depends(get_forum_repo)) -> Response:
+    """Fetch all forum threads; ``fields`` projects each thread."""
+    return shaped_response(request, repo.fetch_forum_threads(), ForumResponse, ForumThread, fields, items="threads")
+
+
+@api_app.get("/forum/search", response_model=ForumSearchResponse, tags=["forum"])
+def search_forum(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Search terms"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=50),
+    fields: Optional[str] = FIELDS_QUERY,
+    repo: ForumRepository = Depends(get_forum_repo),
+) -> Response:
+    """Ranked full-text search over thread titles, summaries and posts with highlighted snippets; ``fields`` projects each hit."""
+    return shaped_response(request, repo.search(q, page, page_size), ForumSearchResponse, ForumSearchHit, fields, items="hits")
 
 
 @api_app.get("/forum/threads/{thread_id}", response_model=ForumThreadResponse, tags=["forum"])
-def read_thread_detail(thread_id: str, repo: ForumRepository = Depends(get_forum_repo)) -> ForumThreadResponse:
+def read_thread_detail(thread_id: str, request: Request, repo: ForumRepository = Depends(get_forum_repo)) -> Response:
     """Fetch detailed thread with all posts."""
-    thread_response = repo.fetch_thread_detail(thread_id)
+    try:
+        thread_response = repo.fetch_thread_detail(thread_id)
+    except ForumStoreUnavailable as e:
+        raise _forum_unavailable(e)
     if not thread_response:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Thread not found")
-    return thread_response
+    return shaped_response(request, thread_response, ForumThreadResponse)
+
+
+def _event_stream(topics: tuple, last_event_id: Optional[str]) -> StreamingResponse:
+    events = get_forum_events()
+    if events.full():
+        raise HTTPException(status_code=503, detail="Too many live connections", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        events.stream(topics, last_event_id or None, get_settings().forum_stream_heartbeat_seconds),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they are written rather than buffer the response.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_app.get("/forum/stream", tags=["forum"])
+async def stream_forum_threads(last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")) -> StreamingResponse:
+    """Server-Sent Events with post count and last activity changes for every thread."""
+    return _event_stream((THREAD_LIST_TOPIC,), last_event_id)
+
+
+@api_app.get("/forum/threads/{thread_id}/stream", tags=["forum"])
+async def stream_thread(thread_id: str, last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")) -> StreamingResponse:
+    """Server-Sent Events with each new post in the thread and the thread's updated counters."""
+    # Streams are async (and skip the sync repo dependency) so connecting never waits for a threadpool worker;
+    # only seeding the threads needs one.
+    try:
+        exists = await run_in_threadpool(get_forum_repo().thread_exists, thread_id)
+    except ForumStoreUnavailable as e:
+        raise _forum_unavailable(e)
+    if not exists:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    return _event_stream((thread_topic(thread_id),), last_event_id)
 
 
 @api_app.post("/forum/threads/{thread_id}/posts", response_model=ForumThreadResponse, tags=["forum"])
 def create_post(
     thread_id: str,
     request: CreatePostRequest,
-    repo: ForumRepository = Depends(get_forum_repo)
+    repo: ForumRepository = Depends(get_forum_repo),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
 ) -> ForumThreadResponse:
-    """Create a new post in a thread."""
+    """
+    Create a new post in a thread.
+
+    Clients that retry should send an ``Idempotency-Key`` header; repeating a request with the same key returns
+    the thread without posting twice. Returns 503 without posting when the thread cannot be loaded from Cosmos or
+    the write-behind queue stays full.
+    """
     try:
-        repo.create_post(thread_id, request.content, request.author, request.parent_post_id)
+        repo.create_post(thread_id, request.content, request.author, request.parent_post_id, idempotency_key)
         thread_response = repo.fetch_thread_detail(thread_id)
         if not thread_response:
-            from fastapi import HTTPException
             raise HTTPException(status_code=404, detail="Thread not found")
         return thread_response
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ForumStoreUnavailable as e:
+        raise _forum_unavailable(e)
     except ValueError as e:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail=str(e))
 
 
@@ -335,15 +871,15 @@ def chat_debug(query: str = Query(..., description="Search query to test")) -> d
     """
     search_client = AzureSearchClient()
     
-    logger.info(f"Debug search called with query: '{query}'")
+    logger.info("Debug search called with query: %r", query)
     
     # Search for documents
     search_results = search_client.search(query, top=5)
     
     # Log the structure of results
     if search_results:
-        logger.info(f"Debug search returned {len(search_results)} results")
-        logger.debug(f"First result keys: {list(search_results[0].keys()) if search_results else []}")
+        logger.info("Debug search returned %d results", len(search_results))
+        fields_logger.debug("First result keys: %s", list(search_results[0]))
     else:
         logger.warning("Debug search returned no results")
     
@@ -354,6 +890,83 @@ def chat_debug(query: str = Query(..., description="Search query to test")) -> d
         "first_result_keys": list(search_results[0].keys()) if search_results else [],
     }
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Expose process metrics in the Prometheus text exposition format."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+@api_app.get("/debug/traces", tags=["meta"], dependencies=[Depends(require_admin)])
+def debug_traces(
+    limit: int = Query(10, ge=1, le=100, description="Number of slowest traces to return"),
+    name: Optional[str] = Query(None, description="Only include traces whose root span starts with this, e.g. 'POST /api/chat'"),
+) -> dict:
+    """Dump the slowest recently completed traces as span waterfalls."""
+    traces = TRACER.ring_buffer.slowest(limit, name)
+    return {"traces": [render_waterfall(spans) for spans in traces]}
+
+
+@api_app.get("/debug/startup", tags=["meta"], dependencies=[Depends(require_admin)])
+def debug_startup(limit: int = Query(25, ge=1, le=500, description="Number of slowest modules to list")) -> dict:
+    """Cold-start report for this worker: time to ready and per-module import durations."""
+    return STARTUP.as_dict(limit)
+
+
+@api_app.get("/debug/upstreams", tags=["meta"], dependencies=[Depends(require_admin)])
+def debug_upstreams() -> dict:
+    """Circuit breaker state for every upstream this worker has called."""
+    return {"upstreams": upstream_states()}
+
+
+@api_app.get("/admin/profiles", tags=["admin"], dependencies=[Depends(require_admin)])
+def list_profiles() -> dict:
+    """List recently profiled requests and per-route sample totals."""
+    return {"profiles": PROFILER.profiles(), "routes": PROFILER.routes()}
+
+
+@api_app.get("/admin/profiles/aggregate", response_class=PlainTextResponse, tags=["admin"], dependencies=[Depends(require_admin)])
+def aggregate_profile(route: str = Query(..., description="Route template, e.g. /api/dashboard")) -> str:
+    """Folded stacks summed across every sampled request for a route (flamegraph.pl / speedscope input)."""
+    folded = PROFILER.aggregate(route)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="No profiles for route")
+    return folded
+
+
+@api_app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse, tags=["admin"], dependencies=[Depends(require_admin)])
+def read_profile(profile_id: int) -> str:
+    """Folded stacks for a single profiled request."""
+    session = PROFILER.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return session.folded()
+
+
+def require_fault_injection(settings: Settings = Depends(get_settings)) -> None:
+    if not settings.fault_injection_enabled:
+        raise HTTPException(status_code=404, detail="Fault injection is disabled (FAULT_INJECTION_ENABLED=false)")
+
+
+@api_app.get("/admin/faults", tags=["admin"], dependencies=[Depends(require_admin), Depends(require_fault_injection)])
+def read_faults() -> dict:
+    """Fault rules currently applied to upstream calls in this worker."""
+    return {"faults": FAULTS.rules()}
+
+
+@api_app.put("/admin/faults", tags=["admin"], dependencies=[Depends(require_admin), Depends(require_fault_injection)])
+def replace_faults(
+    rules: Dict[str, FaultRule],
+    seed: Optional[int] = Query(None, description="Seed for the fault generator, for repeatable runs"),
+) -> dict:
+    """Replace every fault rule in this worker; `{}` turns injection off."""
+    try:
+        FAULTS.configure(rules, seed)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    logger.warning("Fault injection rules replaced for: %s", ", ".join(sorted(rules)) or "none")
+    return {"faults": FAULTS.rules()}
+
+
 # Mount the API app under /api
 app.mount("/api", api_app)
 
@@ -375,3 +988,6 @@ if STATIC_DIR.exists():
             return FileResponse(index_path)
         return {"error": "Frontend not found"}
 
+
+
+STARTUP.mark("app_configured")
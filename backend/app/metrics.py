@@ -0,0 +1,399 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .tracing import start_span
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets (seconds) tuned for upstream calls that range from a few ms (cache) to 10s (timeouts).
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Payload size buckets (bytes) from a tiny JSON error body up to multi-megabyte dashboard payloads.
+DEFAULT_SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.collect())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set, either incremented or read from a running total by a callback."""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = dict(self._values)
+        if self._callback is not None:
+            items.update(self._callback())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items.items()]
+
+
+class Gauge(_Metric):
+    """Point-in-time value, either set explicitly or computed by a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = dict(self._values)
+        if self._callback is not None:
+            items.update(self._callback())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._upper_bounds = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self._upper_bounds) + 1), [0.0])
+                self._series[key] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        lines: List[str] = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self._upper_bounds + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric so a single scrape renders all of them."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, callback))  # type: ignore[return-value]
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests handled, by route template and status code.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    "http_response_body_bytes",
+    "Serialized API response bodies by route template, wire format and whether fields were projected.",
+    ("route", "format", "projected"),
+    buckets=DEFAULT_SIZE_BUCKETS,
+)
+
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "upstream_requests_total", "Calls to upstream services by outcome.", ("upstream", "operation", "outcome")
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "upstream_request_duration_seconds", "Latency of upstream calls.", ("upstream", "operation")
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "upstream_errors_total", "Upstream call failures by exception type.", ("upstream", "operation", "error")
+)
+UPSTREAM_PAYLOAD = REGISTRY.histogram(
+    "upstream_payload_bytes",
+    "Size of upstream response payloads.",
+    ("upstream", "operation"),
+    buckets=DEFAULT_SIZE_BUCKETS,
+)
+
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "Cache lookups by result.", ("cache", "result"))
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    ratios: Dict[LabelValues, float] = {}
+    values = CACHE_REQUESTS.snapshot()
+    caches = {key[0] for key in values}
+    for cache in caches:
+        hits = values.get((cache, "hit"), 0.0)
+        misses = values.get((cache, "miss"), 0.0)
+        if hits + misses:
+            ratios[(cache,)] = hits / (hits + misses)
+    return ratios
+
+
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "cache_hit_ratio", "Fraction of cache lookups served from cache.", ("cache",), callback=_cache_hit_ratios
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_response_size(scope, wire_format: str, projected: bool, size: int) -> None:
+    HTTP_RESPONSE_BYTES.observe(size, route=_route_label(scope), format=wire_format, projected="true" if projected else "false")
+
+
+_LRU_CACHES: Dict[str, Callable] = {}
+
+
+def _lru_cache_stats() -> Dict[LabelValues, float]:
+    values: Dict[LabelValues, float] = {}
+    for cache, cached_function in list(_LRU_CACHES.items()):
+        info = cached_function.cache_info()
+        values[(cache, "hit")] = float(info.hits)
+        values[(cache, "miss")] = float(info.misses)
+    return values
+
+
+# cache_info() counts are cumulative, so they are exported as a counter (a cache_clear() reads as a counter reset).
+LRU_CACHE_REQUESTS = REGISTRY.counter(
+    "lru_cache_requests_total", "Lookups on functools.lru_cache wrapped functions.", ("cache", "result"), callback=_lru_cache_stats
+)
+
+
+def register_lru_cache(cache: str, cached_function: Callable) -> None:
+    """
+    Export hit/miss counts of a ``functools.lru_cache`` wrapped function at scrape time.
+    """
+    _LRU_CACHES[cache] = cached_function
+
+
+class UpstreamCall:
+    """Mutable handle yielded by ``track_upstream`` so callers can attach payload details and span attributes."""
+
+    __slots__ = ("payload_bytes", "outcome", "span")
+
+    def __init__(self, span) -> None:
+        self.payload_bytes: Optional[int] = None
+        self.outcome = "ok"
+        self.span = span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.span.set_attribute(key, value)
+
+
+@contextmanager
+def track_upstream(upstream: str, operation: str) -> Iterator[UpstreamCall]:
+    """
+    Time an upstream call inside a tracing span and record its outcome, errors and payload size.
+
+    Exceptions are recorded and re-raised so the client's own fallback handling still applies.
+    """
+    with start_span(f"{upstream}.{operation}", upstream=upstream, operation=operation) as span:
+        call = UpstreamCall(span)
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException as exc:
+            call.outcome = "error"
+            UPSTREAM_ERRORS.inc(upstream=upstream, operation=operation, error=type(exc).__name__)
+            raise
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, upstream=upstream, operation=operation)
+            UPSTREAM_REQUESTS.inc(upstream=upstream, operation=operation, outcome=call.outcome)
+            if call.payload_bytes is not None:
+                UPSTREAM_PAYLOAD.observe(call.payload_bytes, upstream=upstream, operation=operation)
+                span.set_attribute("payload_bytes", call.payload_bytes)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        # Unmatched requests (404s, static mounts) are bucketed together to keep label cardinality bounded.
+        return "unmatched"
+    return f"{scope.get('root_path', '')}{path}"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency histograms and status counters.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = _route_label(scope)
+            method = scope.get("method", "")
+            HTTP_LATENCY.observe(time.perf_counter() - start, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status["code"]))
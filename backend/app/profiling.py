@@ -0,0 +1,260 @@
+"""
+Opt-in sampling profiler for live requests.
+
+A single background thread periodically reads ``sys._current_frames()`` for the threads serving profiled
+requests and folds their stacks into ``frame;frame;frame count`` lines, which flame graph tools read directly.
+Threads are attributed to a request when the request opens a tracing span on them. That covers the event
+loop (root span) and the threadpool worker running the endpoint (repository and client spans). The event loop
+interleaves every in-flight request, so its samples only count while the profiled request's own coroutine is on
+the stack; time the loop spends on other requests is left out.
+"""
+from __future__ import annotations
+
+import hmac
+import itertools
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Set
+
+from .tracing import TRACER, Span
+
+# Innermost functions that mean a thread is parked rather than doing work for the request.
+IDLE_FUNCTIONS = frozenset({"select", "poll", "epoll", "wait", "_wait_for_tstate_lock", "get", "accept", "_run_once"})
+MAX_STACK_DEPTH = 64
+MAX_STACKS_PER_ROUTE = 5000
+TRUNCATED_STACK = "[other stacks]"
+
+
+class ProfileSession:
+    """Samples collected for one profiled request."""
+
+    __slots__ = (
+        "id", "method", "route", "started_at", "duration_ms", "threads", "stacks", "sample_count", "trigger",
+        "loop_thread", "root_frame",
+    )
+
+    def __init__(self, profile_id: int, method: str, path: str, trigger: str) -> None:
+        self.id = profile_id
+        self.method = method
+        self.route = path
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.threads: Set[int] = set()
+        self.stacks: Counter = Counter()
+        self.sample_count = 0
+        self.trigger = trigger
+        # The event loop thread and the middleware coroutine's frame, which is on that thread's stack only while
+        # this request is the one running.
+        self.loop_thread: Optional[int] = None
+        self.root_frame = None
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": self.sample_count,
+            "distinct_stacks": len(self.stacks),
+            "trigger": self.trigger,
+        }
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_active_session: ContextVar[Optional[ProfileSession]] = ContextVar("active_profile_session", default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _on_stack(frame, target) -> bool:
+    while frame is not None:
+        if frame is target:
+            return True
+        frame = frame.f_back
+    return False
+
+
+def _fold(frame) -> Optional[str]:
+    if frame is None or frame.f_code.co_name in IDLE_FUNCTIONS:
+        return None
+    labels: List[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    """
+    Samples registered threads of active sessions and keeps finished profiles in bounded stores.
+    """
+
+    def __init__(self, interval_ms: float = 5.0, store_size: int = 100, max_concurrent: int = 4) -> None:
+        self.interval = interval_ms / 1000.0
+        self.max_concurrent = max_concurrent
+        self._profiles: Deque[ProfileSession] = deque(maxlen=store_size)
+        self._routes: Dict[str, Counter] = {}
+        self._route_counts: Dict[str, int] = {}
+        self._active: Set[ProfileSession] = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, interval_ms: float, store_size: int, max_concurrent: int) -> None:
+        with self._lock:
+            self.interval = interval_ms / 1000.0
+            self.max_concurrent = max_concurrent
+            self._profiles = deque(self._profiles, maxlen=store_size)
+
+    def begin(self, method: str, path: str, trigger: str) -> Optional[ProfileSession]:
+        with self._lock:
+            if len(self._active) >= self.max_concurrent:
+                return None
+            session = ProfileSession(next(self._ids), method, path, trigger)
+            self._active.add(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return session
+
+    def end(self, session: ProfileSession, route: str) -> None:
+        # The sampler only adds to sessions that are still active, under the same lock, so once the session is
+        # discarded here its stacks no longer change.
+        with self._lock:
+            session.route = route
+            self._active.discard(session)
+            self._profiles.append(session)
+            aggregate = self._routes.setdefault(route, Counter())
+            self._route_counts[route] = self._route_counts.get(route, 0) + 1
+            for stack, count in session.stacks.items():
+                if stack in aggregate or len(aggregate) < MAX_STACKS_PER_ROUTE:
+                    aggregate[stack] += count
+                else:
+                    aggregate[TRUNCATED_STACK] += count
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while True:
+            with self._lock:
+                sessions = list(self._active)
+                if not sessions:
+                    self._wake.clear()
+            if not sessions:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            samples = [(session, self._sample(session, frames, own_ident)) for session in sessions]
+            del frames
+            with self._lock:
+                for session, stacks in samples:
+                    if session not in self._active:
+                        continue
+                    for stack in stacks:
+                        session.stacks[stack] += 1
+                    session.sample_count += len(stacks)
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _sample(session: ProfileSession, frames: Dict[int, object], own_ident: int) -> List[str]:
+        stacks = []
+        for ident in list(session.threads):
+            if ident == own_ident:
+                continue
+            frame = frames.get(ident)
+            if ident == session.loop_thread and not _on_stack(frame, session.root_frame):
+                continue
+            stack = _fold(frame)
+            if stack is not None:
+                stacks.append(stack)
+        return stacks
+
+    def profiles(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return [session.summary() for session in reversed(self._profiles)]
+
+    def get(self, profile_id: int) -> Optional[ProfileSession]:
+        with self._lock:
+            return next((session for session in self._profiles if session.id == profile_id), None)
+
+    def routes(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                route: {"profiles": self._route_counts[route], "samples": sum(stacks.values()), "distinct_stacks": len(stacks)}
+                for route, stacks in self._routes.items()
+            }
+
+    def aggregate(self, route: str) -> Optional[str]:
+        with self._lock:
+            stacks = self._routes.get(route)
+            if stacks is None:
+                return None
+            return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+PROFILER = SamplingProfiler()
+
+
+def _register_thread(span: Span) -> None:
+    session = _active_session.get()
+    if session is not None:
+        session.threads.add(threading.get_ident())
+
+
+TRACER.add_start_listener(_register_thread)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling a random fraction of requests, or requests sent with ``X-Profile: 1`` and a valid
+    ``X-Admin-Token``. Must wrap ``TracingMiddleware`` so the root span registers the event loop thread.
+    """
+
+    def __init__(self, app, sample_rate: float = 0.0, admin_token: str = "") -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self.admin_token:
+            headers = dict(scope.get("headers") or [])
+            if headers.get(b"x-profile") == b"1" and hmac.compare_digest(
+                headers.get(b"x-admin-token", b""), self.admin_token.encode()
+            ):
+                return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        session = PROFILER.begin(scope.get("method", ""), scope.get("path", ""), trigger) if trigger else None
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        session.loop_thread = threading.get_ident()
+        session.root_frame = sys._getframe()
+        token = _active_session.set(session)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _active_session.reset(token)
+            session.root_frame = None
+            session.duration_ms = (time.perf_counter() - start) * 1000.0
+            route = getattr(scope.get("route"), "path", None)
+            PROFILER.end(session, f"{scope.get('root_path', '')}{route}" if route else "unmatched")
@@ -0,0 +1,218 @@
+"""
+Server-side chat sessions with bounded history, a running summary and per-session retrieval reuse.
+
+Sessions live in process memory. With the shared cache tier (``CACHE_BACKEND=shared``) every change is also
+written through to it, and each request reloads the session from there, so a conversation continues whichever
+worker on the host serves its next turn. With the local tier a session is only known to the worker that created
+it; run a single worker, or route a session's requests to one worker, to keep conversations going.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, FrozenSet, List, Optional
+
+from ..cache import CacheBackend
+from ..metrics import REGISTRY
+from ..search.bm25 import tokenize
+
+CHAT_SESSIONS = REGISTRY.gauge("chat_sessions", "Chat sessions currently held in memory.")
+CHAT_RETRIEVAL_REUSE = REGISTRY.counter(
+    "chat_retrieval_reuse_total", "Chat turns that reused the session's previous search results.", ("result",)
+)
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_SHARED_PREFIX = "chat_session:"
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _first_sentence(text: str) -> str:
+    return _SENTENCE_RE.split(text.strip(), maxsplit=1)[0] if text else ""
+
+
+@dataclass
+class ChatTurn:
+    question: str
+    answer: str
+
+
+@dataclass
+class ChatSession:
+    id: str
+    turns: Deque[ChatTurn]
+    summary: str = ""
+    retrieval_terms: FrozenSet[str] = frozenset()
+    retrieval_results: List[Dict[str, Any]] = field(default_factory=list)
+    last_used: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "turns": [[turn.question, turn.answer] for turn in self.turns],
+            "summary": self.summary,
+            "retrieval_terms": sorted(self.retrieval_terms),
+            "retrieval_results": self.retrieval_results,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ChatSession":
+        return cls(
+            id=data["id"],
+            turns=deque(ChatTurn(question=question, answer=answer) for question, answer in data.get("turns") or []),
+            summary=data.get("summary") or "",
+            retrieval_terms=frozenset(data.get("retrieval_terms") or ()),
+            retrieval_results=list(data.get("retrieval_results") or []),
+        )
+
+
+class ChatSessionStore:
+    """
+    LRU + TTL bounded store of chat sessions.
+
+    Each session keeps only its last ``max_turns`` exchanges verbatim. Older turns are folded into an extractive
+    summary capped at ``summary_chars``, so the history sent with a prompt has a fixed upper size however long
+    the conversation runs. With a ``shared`` cache tier, the tier is the source of truth and this store only
+    holds the copy the current request works on; concurrent turns of one session on two workers keep the last
+    write.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 1800.0,
+        max_sessions: int = 10000,
+        max_turns: int = 4,
+        summary_chars: int = 1200,
+        turn_chars: int = 600,
+        reuse_threshold: float = 0.5,
+        shared: Optional[CacheBackend] = None,
+    ) -> None:
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._shared = shared
+        self._ttl = ttl_seconds
+        self._max_sessions = max_sessions
+        self._max_turns = max_turns
+        self._summary_chars = summary_chars
+        self._turn_chars = turn_chars
+        self._reuse_threshold = reuse_threshold
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict_locked(self, now: float) -> None:
+        # The OrderedDict is kept in last-used order, so expired sessions are always at the front.
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used < self._ttl and len(self._sessions) <= self._max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def get_or_create(self, session_id: Optional[str]) -> ChatSession:
+        """
+        Return the live session for ``session_id``, or a new one when it is missing, expired or evicted.
+
+        Ids are only ever issued here. An id this store does not hold is replaced by a fresh random one rather
+        than adopted, so a client cannot pick an id in advance and get another client's conversation to use it.
+        """
+        # Another worker may have advanced (or deleted) the session since this one last saw it.
+        stored = self._load(session_id) if self._shared is not None and session_id else None
+        now = time.monotonic()
+        with self._lock:
+            self._evict_locked(now)
+            if self._shared is not None:
+                session = stored
+                if session is not None:
+                    self._sessions[session.id] = session
+            else:
+                session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ChatSession(id=uuid.uuid4().hex, turns=deque())
+                self._sessions[session.id] = session
+            else:
+                self._sessions.move_to_end(session.id)
+            session.last_used = now
+            self._evict_locked(now)
+            CHAT_SESSIONS.set(len(self._sessions))
+        # Saved on every use so the shared copy's TTL slides like the local one.
+        self._save(session)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            removed = self._sessions.pop(session_id, None) is not None
+            CHAT_SESSIONS.set(len(self._sessions))
+        if self._shared is not None:
+            removed = removed or self._load(session_id) is not None
+            self._shared.delete(_SHARED_PREFIX + session_id)
+        return removed
+
+    def _load(self, session_id: str) -> Optional[ChatSession]:
+        data = self._shared.get(_SHARED_PREFIX + session_id)
+        try:
+            return ChatSession.from_json(data) if data else None
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _save(self, session: ChatSession) -> None:
+        if self._shared is None:
+            return
+        with session.lock:
+            data = session.to_json()
+        self._shared.set(_SHARED_PREFIX + session.id, data, self._ttl)
+
+    def history(self, session: ChatSession) -> List[Dict[str, str]]:
+        """Recent turns as clipped user/assistant messages, oldest first."""
+        messages: List[Dict[str, str]] = []
+        for turn in session.turns:
+            messages.append({"role": "user", "content": _clip(turn.question, self._turn_chars)})
+            messages.append({"role": "assistant", "content": _clip(turn.answer, self._turn_chars)})
+        return messages
+
+    def record_turn(self, session: ChatSession, question: str, answer: str) -> None:
+        """Append a turn and roll any turns beyond ``max_turns`` into the running summary."""
+        with session.lock:
+            session.turns.append(ChatTurn(question=question, answer=answer))
+            while len(session.turns) > self._max_turns:
+                rolled = session.turns.popleft()
+                line = f"- Asked: {_clip(rolled.question, 160)} Answered: {_clip(_first_sentence(rolled.answer), 200)}"
+                lines = (session.summary.splitlines() if session.summary else []) + [line]
+                # Keep the newest lines that fit; the oldest context is the least likely to matter.
+                while len(lines) > 1 and sum(len(existing) + 1 for existing in lines) > self._summary_chars:
+                    lines.pop(0)
+                session.summary = _clip(lines[0], self._summary_chars) if len(lines) == 1 else "\n".join(lines)
+        self._save(session)
+
+    def cached_results(self, session: ChatSession, query: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the session's previous search results when ``query`` stays on the same topic.
+
+        The topic has not changed when the query's terms overlap the last retrieval's terms by at least
+        ``reuse_threshold`` (Jaccard), or when the query has no content terms at all ("why?", "and then?").
+        """
+        terms = frozenset(tokenize(query))
+        with session.lock:
+            if not session.retrieval_results:
+                CHAT_RETRIEVAL_REUSE.inc(result="miss")
+                return None
+            previous = session.retrieval_terms
+            overlap = len(terms & previous) / len(terms | previous) if terms else 1.0
+            if overlap >= self._reuse_threshold:
+                CHAT_RETRIEVAL_REUSE.inc(result="hit")
+                return session.retrieval_results
+        CHAT_RETRIEVAL_REUSE.inc(result="miss")
+        return None
+
+    def remember_results(self, session: ChatSession, query: str, results: List[Dict[str, Any]]) -> None:
+        with session.lock:
+            session.retrieval_terms = frozenset(tokenize(query))
+            session.retrieval_results = results
+        self._save(session)
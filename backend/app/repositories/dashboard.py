@@ -3,14 +3,24 @@ Repository layer orchestrating Cosmos DB and Azure Functions.
 """
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Dict, Optional
 
+from ..cache import CacheBackend, get_cache
 from ..clients.azure_functions import AzureFunctionClient
 from ..clients.cosmos import CosmosDashboardClient
 from ..clients.nyc_calendar import NYCCalendarClient
+from ..config import get_settings
 
 from ..schemas import CommunitySnapshot, DashboardResponse
 from ..sample_data import STUB_DASHBOARD
+from ..snapshot_metrics import SNAPSHOT_METRICS, new_revision
+from ..tracing import current_span, traced
+from ..warm_start import WARM_START
+from .event_merge import merge_events
+
+DASHBOARD_CACHE_KEY = "dashboard:payload"
+WARM_START_SECTION = "dashboard"
+SNAPSHOT_METRICS_SECTION = "snapshot_metrics"
 
 
 class DashboardRepository:
@@ -18,37 +28,80 @@ class DashboardRepository:
     High-level data access facade for the dashboard endpoints.
     """
 
-    def __init__(self, cosmos_client: Optional[CosmosDashboardClient] = None, ai_client: Optional[AzureFunctionClient] = None) -> None:
-        self._cosmos = cosmos_client or CosmosDashboardClient()
-        self._ai = ai_client or AzureFunctionClient()
+    def __init__(
+        self,
+        cosmos_client: Optional[CosmosDashboardClient] = None,
+        ai_client: Optional[AzureFunctionClient] = None,
+        cache: Optional[CacheBackend] = None,
+    ) -> None:
+        # Clients are built on first use: constructing a CosmosClient costs network round trips, and cache hits need none.
+        self._cosmos = cosmos_client
+        self._ai = ai_client
         # NYC calendar client (optional). If no API key/config is present, this client will return None and we fall back to stub/cosmos events.
-        self._nyc = NYCCalendarClient()
+        self._nyc: Optional[NYCCalendarClient] = None
+        self._cache = cache or get_cache()
+        self._cache_ttl = get_settings().dashboard_cache_ttl_seconds
 
+    @traced("dashboard.fetch_dashboard")
     def fetch_dashboard(self) -> DashboardResponse:
-        payload = self._cosmos.fetch_dashboard_payload() or STUB_DASHBOARD
+        payload = self._cache.get_or_compute(DASHBOARD_CACHE_KEY, self._load_payload, self._cache_ttl)
+        # Diffs policies and events into the live metrics only when the payload was refreshed.
+        if SNAPSHOT_METRICS.observe_dashboard(payload):
+            WARM_START.put(SNAPSHOT_METRICS_SECTION, SNAPSHOT_METRICS.policy_state())
+        dashboard = DashboardResponse.model_validate(payload)
+        dashboard.snapshot.metrics = SNAPSHOT_METRICS.metrics(dashboard.snapshot.metrics)
+        return dashboard
+
+    def refresh(self) -> None:
+        """Reload the payload from the upstreams and replace the cached copy, e.g. one seeded from a warm start."""
+        self._cache.set(DASHBOARD_CACHE_KEY, self._load_payload(), self._cache_ttl)
 
-        # Attempt to enrich/replace the events with the NYC calendar feed when available.
+    def _load_payload(self) -> Dict[str, Any]:
+        """Pull the dashboard payload from Cosmos (or the stub) and merge in the NYC events feed."""
+        span = current_span()
+        if self._cosmos is None:
+            self._cosmos = CosmosDashboardClient()
+        payload = self._cosmos.fetch_dashboard_payload()
+        from_cosmos = bool(payload)
+        last_good = None if from_cosmos else WARM_START.get(WARM_START_SECTION)
+        span.set_attribute("dashboard.source", "cosmos" if from_cosmos else "last_good" if last_good else "stub")
+        # While Cosmos is unavailable, the last payload it served beats the stub.
+        payload = payload or last_good or STUB_DASHBOARD
+
+        # Fetch the NYC calendar feed when available; its events are merged with the payload's below.
+        if self._nyc is None:
+            self._nyc = NYCCalendarClient()
         try:
             nyc_events = self._nyc.fetch_events()
         except Exception:
             nyc_events = None
 
-        if nyc_events:
-            # Replace events in the payload with the mapped feed items.
-            # Ensure payload is a dict (it should be from cosmos or STUB_DASHBOARD)
-            if not isinstance(payload, dict):
-                payload = payload.model_dump() if hasattr(payload, "model_dump") else dict(payload)
-            else:
-                payload = dict(payload)  # Create a copy to avoid mutating the original
-            payload["events"] = nyc_events
-
-        return DashboardResponse.model_validate(payload)
+        if not isinstance(payload, dict):
+            payload = payload.model_dump(mode="json") if hasattr(payload, "model_dump") else dict(payload)
+        # Merge the feed with the payload's own events: duplicates are dropped and recurring events become one
+        # series. The stub's placeholder events only show when there is no feed.
+        sources = [nyc_events] if nyc_events else []
+        if from_cosmos or not nyc_events:
+            sources.append(payload.get("events") or [])
+        events = merge_events(*sources)
+        span.set_attribute("events.source", "nyc_calendar" if nyc_events else "payload")
+        span.set_attribute("events.input_count", sum(len(source) for source in sources))
+        span.set_attribute("events.count", len(events))
+        payload = {**{key: value for key, value in payload.items() if key != "revision"}, "events": events}
+        # A stub-based payload is never last-good, even with live feed events merged in: a worker starting from it
+        # would serve placeholder stories as if Cosmos had sent them.
+        if from_cosmos or last_good:
+            WARM_START.put(WARM_START_SECTION, payload)
+        return {**payload, "revision": new_revision()}
 
     def fetch_snapshot(self) -> CommunitySnapshot:
         return self.fetch_dashboard().snapshot
 
+    @traced("dashboard.fetch_ai_summary")
     def fetch_ai_summary(self) -> Optional[dict]:
         dashboard = self.fetch_dashboard()
+        if self._ai is None:
+            self._ai = AzureFunctionClient()
         # Use mode='json' to ensure HttpUrl and datetime objects are serialized to strings
         return self._ai.invoke_ai_suggestions({
             "snapshot": dashboard.snapshot.model_dump(mode="json"),
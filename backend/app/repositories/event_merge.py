@@ -0,0 +1,148 @@
+"""
+Merge stage for dashboard events coming from several sources (the NYC calendar feed, the Cosmos payload).
+
+Events are matched in two hashed passes, so apart from ordering each name and venue bucket by start time the work
+grows linearly with the number of events:
+
+1. By ``id``: the same event delivered by two sources becomes one record. Fields missing from the higher priority
+   source are filled in from the other.
+2. By normalized name and venue: instances of one event whose time windows overlap are duplicates (the same
+   session listed twice under different ids) and are merged. Instances that do not overlap are occurrences of a
+   recurring event and collapse into one series row, whose ``occurrences`` list holds every instance's times.
+   Only instances of the same name and venue are ever compared with each other.
+
+A series row shows its next upcoming occurrence (or its last one, once every occurrence is over) as its own
+``start_time``/``end_time``, so clients that ignore ``occurrences`` still render a sensible single event. Merging
+an already merged list gives the same result, so a cached or warm-start payload can be merged again with fresh data.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Record = Dict[str, Any]
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_text(value: Any) -> str:
+    """Case, accent, punctuation and whitespace insensitive key for names and venues."""
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode("ascii")
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class _Instance:
+    __slots__ = ("record", "start", "end")
+
+    def __init__(self, record: Record, start: datetime, end: datetime) -> None:
+        self.record = record
+        self.start = start
+        self.end = end
+
+
+def _fill(primary: Record, secondary: Record) -> Record:
+    """``primary`` with its empty fields taken from ``secondary``."""
+    merged = dict(primary)
+    for key, value in secondary.items():
+        if key != "occurrences" and value not in (None, "") and merged.get(key) in (None, ""):
+            merged[key] = value
+    return merged
+
+
+def _expand(event: Record) -> Iterable[Record]:
+    """One record per occurrence, so series from an earlier merge are matched like fresh instances."""
+    occurrences = event.get("occurrences")
+    if not occurrences:
+        yield {key: value for key, value in event.items() if key != "occurrences"}
+        return
+    base = {key: value for key, value in event.items() if key != "occurrences"}
+    for index, occurrence in enumerate(occurrences):
+        yield {
+            **base,
+            "id": occurrence.get("id") or f"{base.get('id')}#{index}",
+            "start_time": occurrence.get("start_time"),
+            "end_time": occurrence.get("end_time"),
+        }
+
+
+def merge_events(*sources: Iterable[Record], now: Optional[datetime] = None) -> List[Record]:
+    """
+    Combine event lists, highest priority source first, into deduplicated events and recurring series.
+
+    Order follows each event's (or series') first appearance in the sources.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    # Pass 1: one record per id across all sources.
+    by_id: Dict[str, Record] = {}
+    anonymous: List[Record] = []
+    for source in sources:
+        for event in source or ():
+            for record in _expand(event):
+                event_id = str(record.get("id") or "")
+                if not event_id:
+                    anonymous.append(record)
+                elif event_id in by_id:
+                    by_id[event_id] = _fill(by_id[event_id], record)
+                else:
+                    by_id[event_id] = record
+
+    # Pass 2: bucket by normalized name and venue; events without usable times are kept as they are.
+    groups: Dict[Tuple[str, str], List[_Instance]] = {}
+    order: List[Any] = []
+    for record in [*by_id.values(), *anonymous]:
+        start = _parse_time(record.get("start_time"))
+        name = normalize_text(record.get("name"))
+        if start is None or not name:
+            order.append(record)
+            continue
+        end = _parse_time(record.get("end_time")) or start
+        key = (name, normalize_text(record.get("venue")))
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append(_Instance(record, start, max(start, end)))
+
+    merged: List[Record] = []
+    for entry in order:
+        if isinstance(entry, dict):
+            merged.append(entry)
+            continue
+        instances = sorted(groups[entry], key=lambda instance: instance.start)
+        # Sweep in start order: an instance starting before the previous one ends is the same session.
+        distinct: List[_Instance] = [instances[0]]
+        for instance in instances[1:]:
+            last = distinct[-1]
+            if instance.start < last.end or instance.start == last.start:
+                last.record = _fill(last.record, instance.record)
+                last.end = max(last.end, instance.end)
+            else:
+                distinct.append(instance)
+        if len(distinct) == 1:
+            merged.append(distinct[0].record)
+            continue
+        shown = next((instance for instance in distinct if instance.end >= now), distinct[-1])
+        series = dict(shown.record)
+        for instance in distinct:
+            series = _fill(series, instance.record)
+        series["occurrences"] = [
+            {"id": instance.record.get("id"), "start_time": instance.record.get("start_time"), "end_time": instance.record.get("end_time")}
+            for instance in distinct
+        ]
+        merged.append(series)
+    return merged
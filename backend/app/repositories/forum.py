@@ -3,12 +3,35 @@ Repository layer for forum threads and posts.
 """
 from __future__ import annotations
 
+import logging
 import random
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
 
+from ..config import get_settings
+from ..forum_events import ForumEventHub
+from ..metrics import record_cache_lookup
+from .ids import IdAllocator, IdempotencyStore
+from .locks import StripedLock
+from .post_store import ColumnarPostStore
+from .write_behind import GroupCommitWriter, WriteBackpressureError
 from ..repositories.dashboard import DashboardRepository
-from ..schemas import ForumPost, ForumThread, ForumThreadResponse, ForumResponse
+from ..schemas import Discussion, ForumPost, ForumSearchResponse, ForumThread, ForumThreadResponse, ForumResponse
+from ..search.forum_index import ForumSearchIndex
+from ..tracing import current_span, traced
+
+if TYPE_CHECKING:
+    from .forum_ai import ForumAIPipeline
+
+logger = logging.getLogger(__name__)
+
+# Reads every stored document (posts and the thread's counter document) in one thread's partition.
+ThreadSource = Callable[[str], List[Dict[str, Any]]]
+
+
+class ForumStoreUnavailable(Exception):
+    """The thread's stored posts could not be loaded, or its writes cannot be queued; retry later."""
 
 
 def utc_now() -> datetime:
@@ -60,7 +83,9 @@ def generate_mockup_posts(thread_id: str, topic: str, category: str) -> List[For
     """Generate mockup posts with diverse opinions for a thread."""
     posts = []
     post_count = random.randint(5, 10)
-    base_time = utc_now() - timedelta(hours=random.randint(1, 48))
+    # Seeded posts stay in the past, so posts created later always sort after them.
+    latest = utc_now() - timedelta(minutes=1)
+    base_time = latest - timedelta(hours=random.randint(1, 48))
     
     # First post (OP)
     op_author = random.choice(MOCK_USERS)
@@ -170,7 +195,7 @@ def generate_mockup_posts(thread_id: str, topic: str, category: str) -> List[For
     
     # Generate posts with varied opinions
     for i in range(2, post_count + 1):
-        post_time = base_time + timedelta(minutes=random.randint(10, 1440))
+        post_time = min(base_time + timedelta(minutes=random.randint(10, 1440)), latest)
         opinion_type = random.choice(["supportive", "concerned", "neutral"])
         template = random.choice(opinion_templates[opinion_type])
         reason = random.choice(category_reasons[opinion_type])
@@ -200,7 +225,7 @@ def generate_mockup_posts(thread_id: str, topic: str, category: str) -> List[For
         # Insert AI message after some posts have been made
         insert_position = random.randint(3, len(posts) - 1)
         ai_message = generate_ai_moderator_message(topic, posts[:insert_position])
-        ai_post_time = posts[insert_position - 1].created_at + timedelta(minutes=random.randint(5, 30))
+        ai_post_time = min(posts[insert_position - 1].created_at + timedelta(minutes=random.randint(5, 30)), latest)
         
         posts.insert(insert_position, ForumPost(
             id=f"post-{thread_id}-ai-{ai_idx + 1}",
@@ -212,8 +237,8 @@ def generate_mockup_posts(thread_id: str, topic: str, category: str) -> List[For
             parent_post_id=None,
         ))
     
-    # Sort posts by created_at
-    posts.sort(key=lambda p: p.created_at)
+    # Sort posts by created_at; ids break ties the same way when the thread is loaded back
+    posts.sort(key=lambda p: (p.created_at, p.id))
     
     return posts
 
@@ -232,86 +257,272 @@ def generate_thread_summary(topic: str, posts: List[ForumPost]) -> str:
         return f"Active discussion about {topic.lower()} with {post_count} community contributions. Participants are sharing diverse perspectives, asking questions, and engaging in dialogue about the topic."
 
 
+def _post_document(post: ForumPost) -> Dict[str, object]:
+    return {"type": "post", **post.model_dump(mode="json")}
+
+
+def _thread_document(thread: ForumThread) -> Dict[str, object]:
+    # Only the counters and summary change after seeding; the id doubles as the document id within the thread's partition.
+    return {
+        "type": "thread",
+        "id": thread.id,
+        "thread_id": thread.id,
+        "post_count": thread.post_count,
+        "last_activity": thread.last_activity.isoformat(),
+        "summary": thread.summary,
+    }
+
+
+def _stored_thread(documents: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], List[ForumPost]]:
+    """Split a partition's documents into the thread's counter document and its posts, oldest first."""
+    thread_document = None
+    posts = []
+    for document in documents:
+        if document.get("type") == "thread":
+            thread_document = document
+        elif document.get("type") == "post":
+            posts.append(ForumPost.model_validate(document))
+    posts.sort(key=lambda p: (p.created_at, p.id))
+    return thread_document, posts
+
+
 class ForumRepository:
     """Repository for forum threads and posts."""
 
-    def __init__(self, dashboard_repo: Optional[DashboardRepository] = None) -> None:
+    def __init__(
+        self,
+        dashboard_repo: Optional[DashboardRepository] = None,
+        writer: Optional[GroupCommitWriter] = None,
+        events: Optional[ForumEventHub] = None,
+        ai: Optional["ForumAIPipeline"] = None,
+        load: Optional[ThreadSource] = None,
+    ) -> None:
         self._dashboard_repo = dashboard_repo or DashboardRepository()
-        self._threads_cache: Dict[str, ForumThreadResponse] = {}
+        # Optional write-behind persistence; reads are always served from memory.
+        self._writer = writer
+        # Reads a thread's stored documents the first time this process sees it, before seeding anything.
+        self._load = load
+        # Threads whose stored documents could not be read; retried on the next listing.
+        self._unavailable: Set[str] = set()
+        # Optional live-update hub for SSE subscribers.
+        self._events = events
+        self._threads: Dict[str, ForumThread] = {}
+        self._posts = ColumnarPostStore()
+        self._search_index = ForumSearchIndex()
+        # Guards thread seeding; the repository is shared by every request in the process.
+        self._lock = threading.Lock()
+        # Post writes serialize per thread only, so posts to different threads proceed in parallel.
+        self._thread_locks = StripedLock()
+        self._post_ids = IdAllocator("post")
+        self._idempotency = IdempotencyStore(get_settings().idempotency_ttl_seconds)
+        # Optional background summaries and moderator posts; without it the seeded template summaries stay.
+        self._ai = ai
+        if ai is not None:
+            ai.bind(self)
 
+    @traced("forum.fetch_forum_threads")
     def fetch_forum_threads(self) -> ForumResponse:
         """Fetch all forum threads, generating mockup data from dashboard discussions."""
         dashboard = self._dashboard_repo.fetch_dashboard()
-        threads = []
-        
-        for discussion in dashboard.discussions:
-            thread_id = f"thread-{discussion.id}"
-            
-            # Generate mockup posts for this thread
-            posts = generate_mockup_posts(thread_id, discussion.topic, discussion.category)
-            
-            # Generate thread summary
-            summary = generate_thread_summary(discussion.topic, posts)
-            
-            # Determine last activity
-            last_activity = max(p.created_at for p in posts) if posts else utc_now()
-            
-            # Create thread
-            thread = ForumThread(
-                id=thread_id,
-                topic_id=discussion.id,
-                title=discussion.topic,
-                category=discussion.category,
-                summary=summary,
-                created_at=posts[0].created_at if posts else utc_now(),
-                author=posts[0].author if posts else "Community Member",
-                post_count=len(posts),
-                last_activity=last_activity,
-            )
-            
-            threads.append(thread)
-            
-            # Cache the full thread data for detail view
-            self._threads_cache[thread_id] = ForumThreadResponse(
-                thread=thread,
-                posts=posts,
-            )
+        with self._lock:
+            threads = [self._get_or_seed_thread(discussion) for discussion in dashboard.discussions]
+        threads = [thread for thread in threads if thread is not None]
         
         # Sort by last activity (most recent first)
         threads.sort(key=lambda t: t.last_activity, reverse=True)
+        current_span().set_attribute("thread_count", len(threads))
         
         return ForumResponse(threads=threads)
 
+    def _get_or_seed_thread(self, discussion: Discussion) -> Optional[ForumThread]:
+        """
+        Return the cached thread for a discussion. The first time it is seen, load its stored posts and counters,
+        or seed it with mockup posts (and persist those) if nothing is stored yet. Returns None if the store could
+        not be read, so a thread is never reseeded over posts that exist but are out of reach.
+        """
+        thread_id = f"thread-{discussion.id}"
+        cached = self._threads.get(thread_id)
+        if cached is not None:
+            return cached
+
+        stored: Optional[Dict[str, Any]] = None
+        posts: List[ForumPost] = []
+        if self._load is not None:
+            try:
+                stored, posts = _stored_thread(self._load(thread_id))
+            except Exception as exc:
+                logger.warning("Could not load stored forum thread %s: %s", thread_id, exc)
+                self._unavailable.add(thread_id)
+                return None
+            self._unavailable.discard(thread_id)
+        seeded = not posts
+        if seeded:
+            # Generate mockup posts for this thread
+            posts = generate_mockup_posts(thread_id, discussion.topic, discussion.category)
+        
+        # Generate thread summary
+        summary = (stored or {}).get("summary") or generate_thread_summary(discussion.topic, posts)
+        
+        # Determine last activity; the counter document may be ahead of the posts when a batch was cut short.
+        last_activity = max(p.created_at for p in posts) if posts else utc_now()
+        if stored and stored.get("last_activity"):
+            last_activity = max(last_activity, datetime.fromisoformat(stored["last_activity"]))
+        
+        # Create thread
+        thread = ForumThread(
+            id=thread_id,
+            topic_id=discussion.id,
+            title=discussion.topic,
+            category=discussion.category,
+            summary=summary,
+            created_at=posts[0].created_at if posts else utc_now(),
+            author=posts[0].author if posts else "Community Member",
+            post_count=len(posts),
+            last_activity=last_activity,
+        )
+        
+        # Keep posts in the columnar store; models are rebuilt per detail request
+        self._threads[thread_id] = thread
+        self._posts.extend(posts)
+
+        self._search_index.index_thread(thread)
+        for post in posts:
+            self._search_index.index_post(post)
+        if seeded and self._writer is not None:
+            # Persist the seed so other workers and later runs load these posts instead of inventing their own.
+            try:
+                self._writer.submit(
+                    thread_id,
+                    *[_post_document(post) for post in posts],
+                    _thread_document(thread),
+                    timeout=get_settings().forum_write_submit_timeout_seconds,
+                )
+            except WriteBackpressureError as exc:
+                logger.warning("Forum thread %s seeded in memory only: %s", thread_id, exc)
+        if self._ai is not None:
+            self._ai.thread_seeded(thread_id)
+        return thread
+
+    def _require_thread(self, thread_id: str) -> Optional[ForumThread]:
+        """The thread, seeding threads on first use; raises ``ForumStoreUnavailable`` if its load failed."""
+        if thread_id not in self._threads:
+            self.fetch_forum_threads()
+        thread = self._threads.get(thread_id)
+        if thread is None and thread_id in self._unavailable:
+            raise ForumStoreUnavailable(f"Thread {thread_id} cannot be loaded right now")
+        return thread
+
+    def thread_exists(self, thread_id: str) -> bool:
+        return self._require_thread(thread_id) is not None
+
+    def thread_snapshot(self, thread_id: str) -> Optional[Tuple[ForumThread, List[ForumPost]]]:
+        """A copy of the thread and its posts for background jobs."""
+        thread = self._threads.get(thread_id)
+        if thread is None:
+            return None
+        return thread.model_copy(), self._posts.posts(thread_id)
+
+    def set_summary(self, thread_id: str, summary: str) -> None:
+        thread = self._threads.get(thread_id)
+        if thread is None:
+            return
+        with self._thread_locks(thread_id):
+            thread.summary = summary
+        self._search_index.index_thread(thread)
+
+    @traced("forum.fetch_thread_detail")
     def fetch_thread_detail(self, thread_id: str) -> Optional[ForumThreadResponse]:
         """Fetch detailed thread with all posts."""
         # If not in cache, try to fetch from forum threads first
-        if thread_id not in self._threads_cache:
-            self.fetch_forum_threads()
-        
-        return self._threads_cache.get(thread_id)
+        cached = thread_id in self._threads
+        record_cache_lookup("forum_threads", cached)
+        current_span().set_attribute("cache_hit", cached)
+        thread = self._require_thread(thread_id)
+        if thread is None:
+            return None
+        return ForumThreadResponse(thread=thread, posts=self._posts.posts(thread_id))
+
+    @traced("forum.create_post")
+    def create_post(
+        self,
+        thread_id: str,
+        content: str,
+        author: str = "Current User",
+        parent_post_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        is_ai_moderator: bool = False,
+    ) -> ForumPost:
+        """
+        Create a new post in a thread.
 
-    def create_post(self, thread_id: str, content: str, author: str = "Current User", parent_post_id: Optional[str] = None) -> ForumPost:
-        """Create a new post in a thread."""
-        # Fetch thread to ensure it exists
-        thread_response = self.fetch_thread_detail(thread_id)
-        if not thread_response:
+        With an ``idempotency_key``, a retry of the same request returns the post the first attempt created
+        instead of adding a duplicate; reusing the key for a different post raises ``IdempotencyConflictError``.
+        Raises ``ForumStoreUnavailable``, without creating the post, when the thread's stored posts cannot be loaded
+        or the write-behind queue stays full.
+        """
+        # Ensure the thread exists (seeding threads on first use)
+        thread = self._require_thread(thread_id)
+        if thread is None:
             raise ValueError(f"Thread {thread_id} not found")
-        
-        # Create new post
-        new_post = ForumPost(
-            id=f"post-{thread_id}-{len(thread_response.posts) + 1}",
-            thread_id=thread_id,
-            author=author,
-            content=content,
-            created_at=utc_now(),
-            is_ai_moderator=False,
-            parent_post_id=parent_post_id,
-        )
-        
-        # Add to cached thread
-        thread_response.posts.append(new_post)
-        thread_response.thread.post_count = len(thread_response.posts)
-        thread_response.thread.last_activity = utc_now()
-        
+
+        with self._thread_locks(thread_id):
+            if idempotency_key:
+                key = f"{thread_id}:{idempotency_key}"
+                fingerprint = IdempotencyStore.fingerprint(content, author, parent_post_id)
+                existing_id = self._idempotency.lookup(key, fingerprint)
+                if existing_id is not None:
+                    existing = self._posts.get(existing_id)
+                    if existing is not None:
+                        return existing.to_model()
+            new_post = ForumPost(
+                id=self._post_ids.new_id(),
+                thread_id=thread_id,
+                author=author,
+                content=content,
+                created_at=utc_now(),
+                is_ai_moderator=is_ai_moderator,
+                parent_post_id=parent_post_id,
+            )
+            updated = thread.model_copy(
+                update={
+                    "post_count": self._posts.count(thread_id) + 1,
+                    # Keep last_activity monotonic even if the wall clock steps backwards.
+                    "last_activity": max(thread.last_activity, new_post.created_at),
+                }
+            )
+            if self._writer is not None:
+                # Queued before the post is stored, so a full queue refuses the post instead of losing it later.
+                # Submitted under the thread's lock so each thread's documents are queued in write order.
+                try:
+                    self._writer.submit(
+                        thread_id,
+                        _post_document(new_post),
+                        _thread_document(updated),
+                        timeout=get_settings().forum_write_submit_timeout_seconds,
+                    )
+                except WriteBackpressureError as exc:
+                    raise ForumStoreUnavailable(str(exc)) from exc
+            self._posts.append_model(new_post)
+            thread.post_count = updated.post_count
+            thread.last_activity = updated.last_activity
+            if idempotency_key:
+                self._idempotency.record(key, fingerprint, new_post.id)
+            if self._events is not None:
+                # Published under the same lock so subscribers see a thread's posts in order.
+                self._events.publish_post(new_post, thread)
+        self._search_index.index_post(new_post)
+        if self._ai is not None:
+            self._ai.thread_changed(thread_id, by_moderator=is_ai_moderator)
+
         return new_post
 
+    @traced("forum.search")
+    def search(self, query: str, page: int = 1, page_size: int = 10) -> ForumSearchResponse:
+        """Ranked, highlighted full-text search over thread titles, summaries and post bodies."""
+        if not self._threads:
+            # Seed threads so a search before any listing still has something to match.
+            self.fetch_forum_threads()
+        response = self._search_index.search(query, page, page_size)
+        current_span().set_attribute("result_count", response.total)
+        return response
+
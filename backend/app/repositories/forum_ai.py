@@ -0,0 +1,234 @@
+"""
+Background generation of forum thread summaries and AI moderator posts.
+
+Nothing here runs on the request path. ``create_post`` only calls ``ForumAIPipeline.thread_changed``, which
+marks the thread's summary dirty and pushes back its moderator deadline. A scheduler thread wakes every
+``batch_interval`` seconds and hands the dirty summaries and due moderator posts to a small worker pool that calls
+the model. Threads keep serving their last computed summary until a new one is ready.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from ..clients.azure_openai import AzureOpenAIClient
+from ..clients.scheduler import BACKGROUND, call_priority
+from ..metrics import REGISTRY
+from ..schemas import ForumPost, ForumThread
+from .forum import generate_thread_summary
+
+if TYPE_CHECKING:
+    from .forum import ForumRepository
+
+logger = logging.getLogger(__name__)
+
+AI_JOBS = REGISTRY.counter("forum_ai_jobs_total", "Background forum AI jobs by kind and outcome.", ("kind", "outcome"))
+AI_JOB_SECONDS = REGISTRY.histogram("forum_ai_job_seconds", "Duration of background forum AI jobs.", ("kind",))
+AI_DIRTY = REGISTRY.gauge("forum_ai_dirty_threads", "Threads whose summary is waiting to be regenerated.")
+
+# Only the most recent posts go into a prompt, so prompt size stays flat however long a thread grows.
+PROMPT_POSTS = 30
+PROMPT_POST_CHARS = 400
+
+SUMMARY_PROMPT = (
+    "You summarize NYC community forum threads. Write 2-3 neutral sentences covering the main viewpoints and open "
+    "questions. Do not name individual participants."
+)
+MODERATOR_PROMPT = (
+    "You are a neutral moderator for an NYC community forum. Write one short, friendly message (at most 2 sentences) "
+    "that invites quieter viewpoints or asks a clarifying question about the discussion so far. Never take sides."
+)
+
+
+def _transcript(posts: List[ForumPost]) -> str:
+    recent = [post for post in posts if not post.is_ai_moderator][-PROMPT_POSTS:]
+    return "\n".join(f"- {post.author}: {post.content[:PROMPT_POST_CHARS]}" for post in recent)
+
+
+class ThreadAIGenerator:
+    """
+    Summaries from Azure OpenAI when configured, otherwise from the built-in template. Moderator messages need the
+    model; a canned message in reply to a live discussion reads as noise, so there is no template fallback.
+    """
+
+    def __init__(self, client: Optional[AzureOpenAIClient] = None) -> None:
+        self._client = client
+
+    @property
+    def uses_model(self) -> bool:
+        return self._client is not None and self._client.configured
+
+    def summarize(self, thread: ForumThread, posts: List[ForumPost]) -> str:
+        if self.uses_model:
+            text = self._client.complete_text(
+                SUMMARY_PROMPT, f"Thread: {thread.title}\n\nPosts:\n{_transcript(posts)}", "thread_summary", max_tokens=200
+            )
+            if text:
+                return text.strip()
+        return generate_thread_summary(thread.title, posts)
+
+    def moderate(self, thread: ForumThread, posts: List[ForumPost]) -> Optional[str]:
+        """The model's moderator message, or None without a model or when it returned nothing."""
+        if not self.uses_model:
+            return None
+        text = self._client.complete_text(
+            MODERATOR_PROMPT, f"Thread: {thread.title}\n\nPosts:\n{_transcript(posts)}", "moderator_message", max_tokens=120
+        )
+        return text.strip() if text and text.strip() else None
+
+
+class ForumAIPipeline:
+    """
+    Dirty-set scheduler feeding a bounded worker pool.
+
+    * Summaries: every post marks the thread dirty; each round regenerates all dirty threads, so a burst of posts
+      costs one summary. A thread is never summarized by two workers at once; posts that arrive meanwhile leave it
+      dirty for the next round.
+    * Moderator: only with a model configured. A thread becomes due ``moderator_debounce`` seconds after its latest
+      post (each new post resets the timer), once at least ``moderator_min_posts`` user posts have arrived since
+      the last intervention, and never more often than every ``moderator_cooldown`` seconds.
+    * At most ``workers * 2`` jobs are queued or running; the rest wait in the dirty set.
+    """
+
+    def __init__(
+        self,
+        generator: ThreadAIGenerator,
+        workers: int = 2,
+        batch_interval: float = 2.0,
+        moderator_debounce: float = 30.0,
+        moderator_cooldown: float = 300.0,
+        moderator_min_posts: int = 3,
+    ) -> None:
+        self._generator = generator
+        self._batch_interval = batch_interval
+        self._moderator_debounce = moderator_debounce
+        self._moderator_cooldown = moderator_cooldown
+        self._moderator_min_posts = moderator_min_posts
+        self._max_in_flight = max(1, workers) * 2
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="forum-ai")
+        self._repo: Optional["ForumRepository"] = None
+        self._dirty: Set[str] = set()
+        self._moderator_due: Dict[str, float] = {}
+        self._posts_since_moderator: Dict[str, int] = {}
+        self._last_moderated: Dict[str, float] = {}
+        self._in_flight: Set[Tuple[str, str]] = set()
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="forum-ai-scheduler", daemon=True)
+
+    def bind(self, repo: "ForumRepository") -> None:
+        self._repo = repo
+        self._thread.start()
+
+    def thread_seeded(self, thread_id: str) -> None:
+        """Replace a new thread's template summary with a generated one, when a model is configured."""
+        if self._generator.uses_model:
+            with self._cond:
+                self._dirty.add(thread_id)
+                AI_DIRTY.set(len(self._dirty))
+
+    def thread_changed(self, thread_id: str, by_moderator: bool = False) -> None:
+        """Record a new post; called on the request path, so it only updates in-memory bookkeeping."""
+        now = time.monotonic()
+        with self._cond:
+            self._dirty.add(thread_id)
+            AI_DIRTY.set(len(self._dirty))
+            if not self._generator.uses_model:
+                # Without a model there is nothing to moderate with, as for seeded summaries.
+                return
+            if by_moderator:
+                self._posts_since_moderator[thread_id] = 0
+                self._moderator_due.pop(thread_id, None)
+            else:
+                self._posts_since_moderator[thread_id] = self._posts_since_moderator.get(thread_id, 0) + 1
+                self._moderator_due[thread_id] = now + self._moderator_debounce
+
+    def _collect(self, now: float) -> List[Tuple[str, str]]:
+        """Pick this round's jobs. Caller holds the lock."""
+        jobs: List[Tuple[str, str]] = []
+        capacity = self._max_in_flight - len(self._in_flight)
+        for thread_id, due in list(self._moderator_due.items()):
+            if capacity <= 0:
+                break
+            if due > now or ("moderate", thread_id) in self._in_flight:
+                continue
+            if self._posts_since_moderator.get(thread_id, 0) < self._moderator_min_posts:
+                # Debounce elapsed without enough new voices; wait for more posts.
+                del self._moderator_due[thread_id]
+                continue
+            ready_at = self._last_moderated.get(thread_id, float("-inf")) + self._moderator_cooldown
+            if ready_at > now:
+                self._moderator_due[thread_id] = ready_at
+                continue
+            del self._moderator_due[thread_id]
+            self._posts_since_moderator[thread_id] = 0
+            self._last_moderated[thread_id] = now
+            jobs.append(("moderate", thread_id))
+            capacity -= 1
+        for thread_id in list(self._dirty):
+            if capacity <= 0:
+                break
+            if ("summary", thread_id) in self._in_flight:
+                continue
+            self._dirty.discard(thread_id)
+            jobs.append(("summary", thread_id))
+            capacity -= 1
+        AI_DIRTY.set(len(self._dirty))
+        self._in_flight.update(jobs)
+        return jobs
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait(self._batch_interval)
+                if self._closing:
+                    return
+                jobs = self._collect(time.monotonic())
+            for kind, thread_id in jobs:
+                self._pool.submit(self._job, kind, thread_id)
+
+    def _job(self, kind: str, thread_id: str) -> None:
+        with call_priority(BACKGROUND):
+            self._run_job(kind, thread_id)
+
+    def _run_job(self, kind: str, thread_id: str) -> None:
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            snapshot = self._repo.thread_snapshot(thread_id) if self._repo is not None else None
+            if snapshot is None:
+                outcome = "skipped"
+                return
+            thread, posts = snapshot
+            if kind == "summary":
+                self._repo.set_summary(thread_id, self._generator.summarize(thread, posts))
+            elif posts and posts[-1].is_ai_moderator:
+                outcome = "skipped"
+            else:
+                message = self._generator.moderate(thread, posts)
+                if message is None:
+                    outcome = "skipped"
+                    return
+                self._repo.create_post(thread_id, message, "AI Moderator", is_ai_moderator=True)
+        except Exception:
+            outcome = "error"
+            logger.exception("Forum %s job failed for %s", kind, thread_id)
+            if kind == "summary":
+                # Keep serving the previous summary and try again next round.
+                with self._cond:
+                    self._dirty.add(thread_id)
+        finally:
+            with self._cond:
+                self._in_flight.discard((kind, thread_id))
+            AI_JOBS.inc(kind=kind, outcome=outcome)
+            AI_JOB_SECONDS.observe(time.perf_counter() - start, kind=kind)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        # Summaries are derived data; pending jobs are dropped rather than delaying shutdown.
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,124 @@
+"""
+Collision-free, time-ordered identifiers and idempotency records for writes.
+"""
+from __future__ import annotations
+
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Crockford base32: no I, L, O or U, and ASCII order matches numeric order, so encoded ids sort like the integers.
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_SEQUENCE_BITS = 16
+_NODE_BITS = 32
+_ID_BITS = 48 + _SEQUENCE_BITS + _NODE_BITS
+_ID_CHARS = (_ID_BITS + 4) // 5
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(_ID_CHARS):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+class IdAllocator:
+    """
+    k-sortable 96-bit ids: 48 bits of Unix milliseconds, a 16-bit per-millisecond sequence and a 32-bit random
+    node id chosen per process.
+
+    Within a process ids are strictly increasing even if the wall clock steps backwards: the allocator keeps
+    using its last timestamp and moves to the next millisecond when the sequence is exhausted. Across processes
+    and hosts the node id keeps ids unique without coordination. Encoded ids are fixed-width, so string order is
+    creation order.
+    """
+
+    def __init__(self, prefix: str, node_id: Optional[int] = None) -> None:
+        self.prefix = prefix
+        self.node_id = (node_id if node_id is not None else secrets.randbits(_NODE_BITS)) & ((1 << _NODE_BITS) - 1)
+        self._last_ms = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _next(self) -> Tuple[int, int]:
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                self._sequence += 1
+                if self._sequence >> _SEQUENCE_BITS:
+                    # 65k ids in one millisecond: borrow the next millisecond rather than block.
+                    self._last_ms += 1
+                    self._sequence = 0
+            return self._last_ms, self._sequence
+
+    def new_id(self) -> str:
+        millis, sequence = self._next()
+        value = (millis << (_SEQUENCE_BITS + _NODE_BITS)) | (sequence << _NODE_BITS) | self.node_id
+        return f"{self.prefix}-{_encode(value)}"
+
+    @staticmethod
+    def timestamp_ms(identifier: str) -> int:
+        """Creation time embedded in an id produced by any allocator."""
+        value = 0
+        for char in identifier.rsplit("-", 1)[-1]:
+            value = (value << 5) | _ALPHABET.index(char)
+        return value >> (_SEQUENCE_BITS + _NODE_BITS)
+
+
+class IdempotencyConflictError(Exception):
+    """An idempotency key was reused with a different request body."""
+
+
+class IdempotencyStore:
+    """
+    Remembers which resource each idempotency key created, for ``ttl_seconds``, holding at most ``max_keys``.
+
+    Callers check and record under the same lock that serializes the write, so two concurrent retries with one
+    key create a single resource.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400.0, max_keys: int = 100000) -> None:
+        self._ttl = ttl_seconds
+        self._max_keys = max_keys
+        self._records: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(*parts: Optional[str]) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update((part or "").encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def lookup(self, key: str, fingerprint: str) -> Optional[str]:
+        """Return the resource id recorded for ``key``; raise if the key was used for a different request."""
+        now = time.monotonic()
+        with self._lock:
+            while self._records:
+                oldest_key, (created, _, _) = next(iter(self._records.items()))
+                if now - created < self._ttl:
+                    break
+                del self._records[oldest_key]
+            record = self._records.get(key)
+        if record is None:
+            return None
+        _, recorded_fingerprint, resource_id = record
+        if recorded_fingerprint != fingerprint:
+            raise IdempotencyConflictError("Idempotency-Key was already used with a different request")
+        return resource_id
+
+    def record(self, key: str, fingerprint: str, resource_id: str) -> None:
+        with self._lock:
+            self._records[key] = (time.monotonic(), fingerprint, resource_id)
+            # Keep the dict in record-time order: expiry in ``lookup`` stops at the first live entry.
+            self._records.move_to_end(key)
+            while len(self._records) > self._max_keys:
+                self._records.popitem(last=False)
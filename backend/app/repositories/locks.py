@@ -0,0 +1,21 @@
+"""
+Lock striping for per-key write serialization.
+"""
+from __future__ import annotations
+
+import threading
+import zlib
+from typing import List
+
+
+class StripedLock:
+    """
+    A fixed pool of locks indexed by key hash. Writes to the same key serialize; writes to different keys
+    usually take different locks, without allocating (or ever freeing) one lock per key.
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def __call__(self, key: str) -> threading.Lock:
+        return self._locks[zlib.crc32(key.encode("utf-8")) % len(self._locks)]
@@ -0,0 +1,209 @@
+"""
+Compact columnar storage for forum posts.
+
+A ``ForumPost`` model costs roughly a kilobyte: a Pydantic instance, its ``__dict__``, a ``datetime`` and six
+separate strings, with the thread id and author repeated in every post. ``ColumnarPostStore`` keeps one row per
+post spread over typed columns instead:
+
+* thread ids and authors are interned once and referenced by index (``array('I')``);
+* timestamps are epoch seconds in ``array('d')``;
+* all post bodies share one UTF-8 ``bytearray`` addressed by offsets;
+* parents are row numbers, flags are bytes.
+
+``PostRow`` is a two-slot view over a row, and ``ForumPost`` models are only built at the API boundary.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from ..schemas import ForumPost
+
+NO_PARENT = -1
+
+
+class _Interner:
+    """Bidirectional string <-> small int table."""
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self) -> None:
+        self._index: Dict[str, int] = {}
+        self._values: List[str] = []
+
+    def intern(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self._values)
+            self._values.append(value)
+        return index
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._index.get(value)
+
+    def __getitem__(self, index: int) -> str:
+        return self._values[index]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class PostRow:
+    """Read-only view of one stored post; fields are decoded on access."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "ColumnarPostStore", row: int) -> None:
+        self._store = store
+        self._row = row
+
+    @property
+    def id(self) -> str:
+        return self._store._ids[self._row]
+
+    @property
+    def thread_id(self) -> str:
+        return self._store._threads[self._store._thread_col[self._row]]
+
+    @property
+    def author(self) -> str:
+        return self._store._authors[self._store._author_col[self._row]]
+
+    @property
+    def content(self) -> str:
+        return self._store._content(self._row)
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self._store._created_col[self._row], tz=timezone.utc)
+
+    @property
+    def is_ai_moderator(self) -> bool:
+        return bool(self._store._flag_col[self._row])
+
+    @property
+    def parent_post_id(self) -> Optional[str]:
+        return self._store._parent_id(self._row)
+
+    def to_model(self) -> ForumPost:
+        return ForumPost(
+            id=self.id,
+            thread_id=self.thread_id,
+            author=self.author,
+            content=self.content,
+            created_at=self.created_at,
+            is_ai_moderator=self.is_ai_moderator,
+            parent_post_id=self.parent_post_id,
+        )
+
+
+class ColumnarPostStore:
+    """
+    Append-only post table. Rows are never rewritten, so readers can scan a thread's rows without taking the
+    write lock.
+    """
+
+    def __init__(self) -> None:
+        self._threads = _Interner()
+        self._authors = _Interner()
+        self._ids: List[str] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._thread_col = array("I")
+        self._author_col = array("I")
+        self._created_col = array("d")
+        self._flag_col = array("B")
+        self._parent_col = array("i")
+        # Parent ids that were not (yet) stored as rows when their reply was appended.
+        self._external_parents: Dict[int, str] = {}
+        self._text_buffer = bytearray()
+        self._text_offsets = array("Q", [0])
+        self._rows_by_thread: Dict[int, array] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, post_id: str) -> bool:
+        return post_id in self._row_by_id
+
+    def append(
+        self,
+        post_id: str,
+        thread_id: str,
+        author: str,
+        content: str,
+        created_at: datetime,
+        is_ai_moderator: bool = False,
+        parent_post_id: Optional[str] = None,
+    ) -> PostRow:
+        encoded = content.encode("utf-8")
+        with self._lock:
+            if post_id in self._row_by_id:
+                raise ValueError(f"Duplicate post id {post_id}")
+            row = len(self._ids)
+            thread = self._threads.intern(thread_id)
+            parent = self._row_by_id.get(parent_post_id, NO_PARENT) if parent_post_id else NO_PARENT
+            if parent_post_id and parent == NO_PARENT:
+                self._external_parents[row] = parent_post_id
+            self._thread_col.append(thread)
+            self._author_col.append(self._authors.intern(author))
+            self._created_col.append(created_at.timestamp())
+            self._flag_col.append(1 if is_ai_moderator else 0)
+            self._parent_col.append(parent)
+            self._text_buffer += encoded
+            self._text_offsets.append(len(self._text_buffer))
+            self._ids.append(post_id)
+            self._row_by_id[post_id] = row
+            # Publish the row to thread scans last so they never see a half-written row.
+            self._rows_by_thread.setdefault(thread, array("I")).append(row)
+        return PostRow(self, row)
+
+    def append_model(self, post: ForumPost) -> PostRow:
+        return self.append(
+            post.id, post.thread_id, post.author, post.content, post.created_at, post.is_ai_moderator, post.parent_post_id
+        )
+
+    def extend(self, posts: Iterable[ForumPost]) -> None:
+        for post in posts:
+            self.append_model(post)
+
+    def _content(self, row: int) -> str:
+        return self._text_buffer[self._text_offsets[row]:self._text_offsets[row + 1]].decode("utf-8")
+
+    def _parent_id(self, row: int) -> Optional[str]:
+        parent = self._parent_col[row]
+        if parent != NO_PARENT:
+            return self._ids[parent]
+        return self._external_parents.get(row)
+
+    def get(self, post_id: str) -> Optional[PostRow]:
+        row = self._row_by_id.get(post_id)
+        return PostRow(self, row) if row is not None else None
+
+    def rows(self, thread_id: str) -> List[PostRow]:
+        thread = self._threads.lookup(thread_id)
+        if thread is None:
+            return []
+        return [PostRow(self, row) for row in self._rows_by_thread.get(thread, ())]
+
+    def posts(self, thread_id: str) -> List[ForumPost]:
+        """Materialize a thread's posts, oldest first, for serialization."""
+        return [row.to_model() for row in self.rows(thread_id)]
+
+    def count(self, thread_id: str) -> int:
+        thread = self._threads.lookup(thread_id)
+        return len(self._rows_by_thread.get(thread, ())) if thread is not None else 0
+
+    def nbytes(self) -> int:
+        """Approximate heap footprint of the columns, buffers and lookup tables."""
+        columns = (self._thread_col, self._author_col, self._created_col, self._flag_col, self._parent_col, self._text_offsets)
+        total = sum(sys.getsizeof(column) for column in columns) + sys.getsizeof(self._text_buffer)
+        total += sys.getsizeof(self._ids) + sum(sys.getsizeof(post_id) for post_id in self._ids)
+        total += sys.getsizeof(self._row_by_id) + sys.getsizeof(self._external_parents)
+        total += sum(sys.getsizeof(rows) for rows in self._rows_by_thread.values())
+        for interner in (self._threads, self._authors):
+            total += sys.getsizeof(interner._index) + sum(sys.getsizeof(value) for value in interner._values)
+        return total
@@ -0,0 +1,193 @@
+"""
+Live election polling with sharded in-memory vote counters.
+
+A vote touches exactly one shard, chosen by the hash of (election, voter): that shard's lock covers both the
+duplicate check and the increment, so concurrent voters rarely contend. Voters are remembered as 64-bit hash
+fingerprints in per-shard sets rather than as the submitted strings.
+
+With several workers, or across restarts, the in-memory sets only catch repeats to the same process. A ``claim``
+callback records each new voter in shared storage and reports voters that another worker, or an earlier run of
+this one, already counted. Without one, the counter only works in a single worker process.
+
+Readers never touch the shards. A background thread sums the shards into an immutable tally every
+``refresh_interval`` seconds, so ``/dashboard/elections`` reads a dictionary however heavy the voting is. The same
+thread hands changed per-election totals to the storage sink every ``flush_interval`` seconds, one batch per flush,
+and reads back the totals the other workers flushed through ``load``, which the tally includes.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from ..metrics import REGISTRY
+from ..schemas import Election
+
+logger = logging.getLogger(__name__)
+
+VOTES = REGISTRY.counter("votes_total", "Votes received, by whether they were counted.", ("result",))
+VOTE_FLUSHES = REGISTRY.counter("vote_flushes_total", "Batched vote tally flushes to storage, by outcome.", ("outcome",))
+
+VoteSink = Callable[[Dict[str, int]], None]
+# (election id, voter fingerprint) -> False if the voter is already recorded
+VoterClaim = Callable[[str, int], bool]
+# Totals for the given elections flushed by the other workers, including earlier runs of this one
+VoteSource = Callable[[List[str]], Dict[str, int]]
+
+
+def voter_fingerprint(election_id: str, voter_id: str) -> int:
+    digest = hashlib.blake2b(f"{election_id}\0{voter_id}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class _Shard:
+    __slots__ = ("lock", "counts", "voters")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.voters: Set[int] = set()
+
+
+class VoteCounter:
+    """
+    Sharded per-election counters with per-voter dedupe, an aggregated read tally and batched flushes.
+
+    Votes are counted per worker process and combined with the other workers' stored totals on reads.
+    ``baseline`` votes come from the dashboard payload and are added to the live tally on reads.
+    """
+
+    def __init__(
+        self,
+        shards: int = 16,
+        refresh_interval: float = 0.3,
+        flush_interval: float = 2.0,
+        sink: Optional[VoteSink] = None,
+        claim: Optional[VoterClaim] = None,
+        load: Optional[VoteSource] = None,
+    ) -> None:
+        self._shards: List[_Shard] = [_Shard() for _ in range(max(1, shards))]
+        self._refresh_interval = refresh_interval
+        self._flush_interval = flush_interval
+        self._sink = sink
+        self._claim = claim
+        self._load = load
+        self._baseline: Dict[str, int] = {}
+        self._stored: Dict[str, int] = {}
+        self._tally: Dict[str, int] = {}
+        self._flushed: Dict[str, int] = {}
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vote-tally", daemon=True)
+        self._thread.start()
+
+    def register(self, elections: Iterable[Election]) -> None:
+        """Record the elections open for voting and their payload vote counts."""
+        self._baseline = {**self._baseline, **{election.id: election.votes for election in elections}}
+
+    def knows(self, election_id: str) -> bool:
+        return election_id in self._baseline
+
+    @property
+    def shared(self) -> bool:
+        """Whether duplicate votes are caught across workers and restarts."""
+        return self._claim is not None
+
+    def vote(self, election_id: str, voter_id: str) -> bool:
+        """
+        Count one vote; return False if this voter already voted in this election. Errors from ``claim`` propagate
+        and leave the vote uncounted.
+        """
+        fingerprint = voter_fingerprint(election_id, voter_id)
+        shard = self._shards[fingerprint % len(self._shards)]
+        with shard.lock:
+            if fingerprint in shard.voters:
+                VOTES.inc(result="duplicate")
+                return False
+            # Taken before claiming, so a concurrent repeat to this worker is rejected without a storage call.
+            shard.voters.add(fingerprint)
+        if self._claim is not None:
+            try:
+                claimed = self._claim(election_id, fingerprint)
+            except Exception:
+                with shard.lock:
+                    shard.voters.discard(fingerprint)
+                VOTES.inc(result="error")
+                raise
+            if not claimed:
+                VOTES.inc(result="duplicate")
+                return False
+        with shard.lock:
+            shard.counts[election_id] = shard.counts.get(election_id, 0) + 1
+        VOTES.inc(result="counted")
+        return True
+
+    def votes(self, election_id: str) -> int:
+        """Baseline plus live votes as of the last tally refresh."""
+        return self._baseline.get(election_id, 0) + self._tally.get(election_id, 0)
+
+    def apply(self, elections: List[Election]) -> List[Election]:
+        tally = self._tally
+        return [
+            election.model_copy(update={"votes": election.votes + tally[election.id]}) if election.id in tally else election
+            for election in elections
+        ]
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-sum this worker's shards into the read tally; returns this worker's own totals."""
+        totals: Dict[str, int] = {}
+        for shard in self._shards:
+            with shard.lock:
+                counts = list(shard.counts.items())
+            for election_id, count in counts:
+                totals[election_id] = totals.get(election_id, 0) + count
+        tally = dict(self._stored)
+        for election_id, count in totals.items():
+            tally[election_id] = tally.get(election_id, 0) + count
+        # Readers see either the old or the new dictionary, never a partial sum.
+        self._tally = tally
+        return totals
+
+    def load(self) -> None:
+        """Read the other workers' stored totals; on failure the previous ones are kept."""
+        if self._load is None:
+            return
+        try:
+            self._stored = self._load(sorted(self._baseline))
+        except Exception as exc:
+            logger.warning("Could not read stored vote totals, keeping the previous ones: %s", exc)
+
+    def flush(self) -> None:
+        """Send totals that changed since the last successful flush to the sink, as one batch."""
+        self.load()
+        tally = self.refresh()
+        changed = {election_id: count for election_id, count in tally.items() if self._flushed.get(election_id) != count}
+        self._last_flush = time.monotonic()
+        if not changed or self._sink is None:
+            return
+        try:
+            self._sink(changed)
+        except Exception as exc:
+            VOTE_FLUSHES.inc(outcome="error")
+            logger.warning("Vote flush failed, will retry with the next batch: %s", exc)
+            return
+        self._flushed.update(changed)
+        VOTE_FLUSHES.inc(outcome="ok")
+
+    def _run(self) -> None:
+        # Votes counted before a restart are read back before the first refresh.
+        self.load()
+        self.refresh()
+        while not self._stop.wait(self._refresh_interval):
+            if time.monotonic() - self._last_flush >= self._flush_interval:
+                self.flush()
+            else:
+                self.refresh()
+
+    def close(self) -> None:
+        """Stop the background thread and flush the final totals."""
+        self._stop.set()
+        self._thread.join(timeout=self._refresh_interval + 1.0)
+        self.flush()
@@ -0,0 +1,182 @@
+"""
+Group-commit write-behind queue for forum persistence.
+
+``create_post`` updates the in-memory store (which serves every read, so the poster always sees their own post)
+and hands the post and the thread's new counters to ``GroupCommitWriter``. A single background thread collects
+everything submitted within ``flush_interval`` seconds, or until ``max_batch`` documents are waiting, groups it by
+partition and writes each partition as one batch. Under load, one round trip commits many posts instead of one.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+Document = Dict[str, Any]
+BatchSink = Callable[[str, Sequence[Document]], None]
+
+WRITE_BATCHES = REGISTRY.counter("forum_write_batches_total", "Forum persistence batches by outcome.", ("outcome",))
+WRITE_BATCH_SIZE = REGISTRY.histogram(
+    "forum_write_batch_documents",
+    "Documents per forum persistence batch.",
+    buckets=(1, 2, 5, 10, 20, 50, 100),
+)
+WRITE_DROPPED = REGISTRY.counter(
+    "forum_write_dropped_documents_total", "Forum documents given up on after every write attempt failed."
+)
+WRITE_PENDING = REGISTRY.gauge("forum_write_pending", "Forum documents waiting to be persisted.")
+WRITE_REJECTED = REGISTRY.counter(
+    "forum_write_rejected_total", "Forum writes refused because the queue stayed full for the submit timeout."
+)
+
+
+class WriteBackpressureError(Exception):
+    """Raised by ``submit`` when the queue is still full after its timeout."""
+
+
+class GroupCommitWriter:
+    """
+    Buffers ``(partition, document)`` writes and flushes them in per-partition batches from one thread.
+
+    Documents with the same ``id`` in one flush are coalesced (the last write wins), so a burst of posts to a
+    thread writes its counter document once. ``submit`` blocks when ``max_pending`` documents are queued, pushing
+    back on writers instead of growing without bound while the sink is down. Failed batches are retried with
+    jittered backoff up to ``max_attempts`` times; the sink must therefore be idempotent (upserts).
+    """
+
+    def __init__(
+        self,
+        sink: BatchSink,
+        max_batch: int = 100,
+        flush_interval: float = 0.005,
+        max_pending: int = 10000,
+        max_attempts: int = 5,
+    ) -> None:
+        self._sink = sink
+        self._max_batch = max(1, max_batch)
+        self._flush_interval = flush_interval
+        self._max_pending = max(self._max_batch, max_pending)
+        self._max_attempts = max(1, max_attempts)
+        self._pending: List[Tuple[str, Document]] = []
+        self._oldest = 0.0
+        # Submitted but not yet written (or dropped); flush() waits for this to reach zero.
+        self._unflushed = 0
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="forum-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, partition: str, *documents: Document, timeout: Optional[float] = None) -> None:
+        """
+        Queue documents for ``partition``; returns as soon as they are buffered. Raises ``WriteBackpressureError``
+        if the queue has no room for them within ``timeout`` seconds (``None`` waits for as long as it takes).
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("GroupCommitWriter is closed")
+            while len(self._pending) + len(documents) > self._max_pending and not self._closing:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    WRITE_REJECTED.inc()
+                    raise WriteBackpressureError(f"{len(self._pending)} forum documents are waiting to be persisted")
+                self._cond.wait(remaining)
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.extend((partition, document) for document in documents)
+            self._unflushed += len(documents)
+            WRITE_PENDING.set(self._unflushed)
+            if len(self._pending) >= self._max_batch:
+                self._cond.notify_all()
+            elif len(self._pending) == len(documents):
+                # First documents of a new group: wake the flusher so it starts the flush timer.
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything submitted so far; return False if ``timeout`` expired first."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            self._cond.notify_all()
+            while self._unflushed:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Stop accepting writes, drain the queue and stop the thread. Returns False if documents were left."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            left = self._unflushed
+        if left:
+            logger.error("Forum writer closed with %d documents not persisted", left)
+        return not left
+
+    def _take(self) -> Optional[List[Tuple[str, Document]]]:
+        with self._cond:
+            while not self._pending:
+                if self._closing:
+                    return None
+                self._cond.wait()
+            # Let the group fill up for the rest of the flush interval unless it is already full or we are closing.
+            while len(self._pending) < self._max_batch and not self._closing:
+                remaining = self._oldest + self._flush_interval - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            taken, self._pending = self._pending, []
+            # Room in the queue again: release blocked submitters.
+            self._cond.notify_all()
+            return taken
+
+    def _run(self) -> None:
+        while True:
+            taken = self._take()
+            if taken is None:
+                return
+            for partition, documents in _group(taken).items():
+                for start in range(0, len(documents), self._max_batch):
+                    self._write(partition, documents[start:start + self._max_batch])
+            with self._cond:
+                self._unflushed -= len(taken)
+                WRITE_PENDING.set(self._unflushed)
+                self._cond.notify_all()
+
+    def _write(self, partition: str, documents: List[Document]) -> None:
+        WRITE_BATCH_SIZE.observe(len(documents))
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                self._sink(partition, documents)
+                WRITE_BATCHES.inc(outcome="ok")
+                return
+            except Exception as exc:
+                if attempt == self._max_attempts:
+                    WRITE_BATCHES.inc(outcome="dropped")
+                    WRITE_DROPPED.inc(len(documents))
+                    logger.error(
+                        "Dropping %d forum documents for %s after %d attempts: %s", len(documents), partition, attempt, exc
+                    )
+                    return
+                WRITE_BATCHES.inc(outcome="retried")
+                time.sleep(random.uniform(0.0, min(5.0, 0.1 * (2 ** attempt))))
+
+
+def _group(taken: List[Tuple[str, Document]]) -> "OrderedDict[str, List[Document]]":
+    """Group by partition in submission order, keeping only the last write of each document id."""
+    partitions: "OrderedDict[str, OrderedDict[str, Document]]" = OrderedDict()
+    for partition, document in taken:
+        documents = partitions.setdefault(partition, OrderedDict())
+        documents.pop(document["id"], None)
+        documents[document["id"]] = document
+    return OrderedDict((partition, list(documents.values())) for partition, documents in partitions.items())
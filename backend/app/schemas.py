@@ -2,8 +2,8 @@
 Pydantic schemas for dashboard data contracts.
 """
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, HttpUrl
+from typing import ClassVar, List, Optional, Tuple
+from pydantic import BaseModel, Field, HttpUrl
 
 
 class Metric(BaseModel):
@@ -45,6 +45,12 @@ class Discussion(BaseModel):
     last_active_minutes: int
 
 
+class EventOccurrence(BaseModel):
+    id: Optional[str] = None
+    start_time: datetime
+    end_time: datetime
+
+
 class Event(BaseModel):
     id: str
     name: str
@@ -56,6 +62,8 @@ class Event(BaseModel):
     description: Optional[str] = None
     website_url: Optional[str] = None
     address: Optional[str] = None
+    # Every instance of a recurring event, when this row stands for a series; start_time/end_time show the next one.
+    occurrences: Optional[List[EventOccurrence]] = None
 
 
 class Election(BaseModel):
@@ -66,6 +74,16 @@ class Election(BaseModel):
     votes: int
 
 
+class VoteRequest(BaseModel):
+    voter_id: str = Field(..., min_length=1, max_length=128)
+
+
+class VoteResponse(BaseModel):
+    election_id: str
+    counted: bool
+    votes: int
+
+
 class ServiceAlertItem(BaseModel):
     details: str
     status: str
@@ -99,11 +117,33 @@ class Source(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    # Omit to start a new conversation; send back the id from the previous response to continue it. Unknown or
+    # expired ids start a new conversation under a new id.
+    session_id: Optional[str] = Field(None, max_length=128)
 
 
 class ChatResponse(BaseModel):
     response: str
     sources: List[Source] = []
+    session_id: Optional[str] = None
+
+
+class ChatBatchRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=100)
+    top: int = Field(5, ge=1, le=10)
+
+
+class ChatBatchItem(BaseModel):
+    index: int
+    message: str
+    response: Optional[str] = None
+    sources: List[Source] = []
+    error: Optional[str] = None
+
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+    unique_questions: int
 
 
 class ForumPost(BaseModel):
@@ -142,3 +182,24 @@ class CreatePostRequest(BaseModel):
 class ForumResponse(BaseModel):
     threads: List[ForumThread]
 
+
+class ForumSearchHit(BaseModel):
+    # Hits have no id of their own; these identify one for `fields=` projections.
+    identity_fields: ClassVar[Tuple[str, ...]] = ("kind", "thread_id", "post_id")
+
+    kind: str  # "thread" or "post"
+    thread_id: str
+    thread_title: str
+    post_id: Optional[str] = None
+    author: Optional[str] = None
+    score: float
+    snippet: str  # HTML-escaped with matches wrapped in <mark>
+
+
+class ForumSearchResponse(BaseModel):
+    query: str
+    total: int
+    page: int
+    page_size: int
+    hits: List[ForumSearchHit]
+
@@ -0,0 +1,108 @@
+"""
+Full-text search over forum threads and posts.
+"""
+from __future__ import annotations
+
+import html
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..schemas import ForumPost, ForumSearchHit, ForumSearchResponse, ForumThread
+from .bm25 import BM25Index, tokenize
+
+# Thread titles are indexed this many times so a title match outranks a passing mention in a post.
+TITLE_BOOST = 3
+SNIPPET_CHARS = 180
+
+
+class _Document(NamedTuple):
+    kind: str
+    thread_id: str
+    post_id: Optional[str]
+    author: Optional[str]
+    text: str
+
+
+def highlight(text: str, terms: set, max_chars: int = SNIPPET_CHARS) -> str:
+    """
+    HTML-escaped snippet around the first query term match with every match wrapped in ``<mark>``.
+    """
+    matches = [m for m in re.finditer(r"[A-Za-z0-9]+", text) if m.group(0).lower() in terms]
+    if len(text) <= max_chars:
+        start, end = 0, len(text)
+    else:
+        anchor = matches[0].start() if matches else 0
+        start = max(0, anchor - max_chars // 3)
+        end = min(len(text), start + max_chars)
+        start = max(0, end - max_chars)
+    parts: List[str] = ["…" if start > 0 else ""]
+    cursor = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(html.escape(text[cursor:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        cursor = match.end()
+    parts.append(html.escape(text[cursor:end]))
+    parts.append("…" if end < len(text) else "")
+    return "".join(parts)
+
+
+class ForumSearchIndex:
+    """
+    BM25 index over thread titles, thread summaries and post bodies, updated as threads and posts change.
+    """
+
+    def __init__(self) -> None:
+        self._index = BM25Index()
+        self._documents: Dict[str, _Document] = {}
+        self._thread_titles: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def index_thread(self, thread: ForumThread) -> None:
+        doc_id = f"thread:{thread.id}"
+        tokens = tokenize(thread.title) * TITLE_BOOST + tokenize(thread.summary)
+        with self._lock:
+            self._thread_titles[thread.id] = thread.title
+            self._documents[doc_id] = _Document("thread", thread.id, None, thread.author, f"{thread.title}. {thread.summary}")
+        self._index.add(doc_id, tokens)
+
+    def index_post(self, post: ForumPost) -> None:
+        doc_id = f"post:{post.id}"
+        with self._lock:
+            self._documents[doc_id] = _Document("post", post.thread_id, post.id, post.author, post.content)
+        self._index.add(doc_id, tokenize(post.content))
+
+    def remove_post(self, post_id: str) -> None:
+        doc_id = f"post:{post_id}"
+        self._index.remove(doc_id)
+        with self._lock:
+            self._documents.pop(doc_id, None)
+
+    def search(self, query: str, page: int = 1, page_size: int = 10) -> ForumSearchResponse:
+        terms = tokenize(query)
+        ranked: List[Tuple[str, float]] = self._index.search(terms)
+        start = (page - 1) * page_size
+        term_set = set(terms)
+        hits: List[ForumSearchHit] = []
+        with self._lock:
+            for doc_id, score in ranked[start:start + page_size]:
+                document = self._documents.get(doc_id)
+                if document is None:
+                    continue
+                hits.append(
+                    ForumSearchHit(
+                        kind=document.kind,
+                        thread_id=document.thread_id,
+                        thread_title=self._thread_titles.get(document.thread_id, ""),
+                        post_id=document.post_id,
+                        author=document.author,
+                        score=round(score, 4),
+                        snippet=highlight(document.text, term_set),
+                    )
+                )
+        return ForumSearchResponse(query=query, total=len(ranked), page=page, page_size=page_size, hits=hits)
@@ -0,0 +1,118 @@
+"""
+Build the offline chat retrieval index from civic documents.
+
+Usage (from ``backend/``)::
+
+    python -m app.search.ingest docs/ policies/*.md --out data/local_index
+
+Text, Markdown, HTML and JSON files are split into overlapping word windows and written in the memory-mapped
+layout read by ``app.search.local_retrieval.LocalRetriever``.
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .local_retrieval import DEFAULT_INDEX_DIR, build_index
+
+SUPPORTED_SUFFIXES = {".txt", ".md", ".markdown", ".html", ".htm", ".json"}
+TEXT_FIELDS = ("content", "text", "body", "description", "summary", "chunk")
+TITLE_FIELDS = ("title", "name", "headline")
+
+_TAG_RE = re.compile(r"<(script|style)\b.*?</\1>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+_HEADING_RE = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+_HTML_TITLE_RE = re.compile(r"<title>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+def iter_files(paths: Iterable[str]) -> Iterator[Path]:
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES)
+        elif path.is_file():
+            yield path
+
+
+def _json_documents(data, source: str) -> Iterator[Dict[str, str]]:
+    records = data if isinstance(data, list) else [data]
+    for index, record in enumerate(records):
+        if isinstance(record, str):
+            yield {"title": f"{source} #{index + 1}", "source": source, "text": record}
+            continue
+        if not isinstance(record, dict):
+            continue
+        text = next((record[field] for field in TEXT_FIELDS if isinstance(record.get(field), str)), "")
+        title = next((record[field] for field in TITLE_FIELDS if isinstance(record.get(field), str)), "")
+        if text:
+            yield {"title": title or f"{source} #{index + 1}", "source": record.get("url") or source, "text": text}
+
+
+def load_documents(path: Path) -> Iterator[Dict[str, str]]:
+    """Yield ``{title, source, text}`` documents from one file."""
+    raw = path.read_text(encoding="utf-8", errors="replace")
+    suffix = path.suffix.lower()
+    source = path.name
+    if suffix == ".json":
+        yield from _json_documents(json.loads(raw), source)
+        return
+    if suffix in {".html", ".htm"}:
+        title_match = _HTML_TITLE_RE.search(raw)
+        title = html.unescape(title_match.group(1)).strip() if title_match else path.stem
+        text = html.unescape(_TAG_RE.sub(" ", raw))
+    else:
+        heading = _HEADING_RE.search(raw) if suffix in {".md", ".markdown"} else None
+        title = heading.group(1).strip() if heading else path.stem.replace("_", " ").replace("-", " ")
+        text = raw
+    yield {"title": title, "source": source, "text": text}
+
+
+def chunk_document(document: Dict[str, str], chunk_size: int, overlap: int) -> List[Dict[str, str]]:
+    """Split a document into windows of ``chunk_size`` words that share ``overlap`` words with their neighbour."""
+    words = document["text"].split()
+    if not words:
+        return []
+    step = max(1, chunk_size - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append({"title": document["title"], "source": document["source"], "text": " ".join(words[start:start + chunk_size])})
+        if start + chunk_size >= len(words):
+            break
+    return chunks
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Files or directories to ingest")
+    parser.add_argument("--out", default=str(DEFAULT_INDEX_DIR), help=f"Index directory (default: {DEFAULT_INDEX_DIR})")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Words per chunk (default: 200)")
+    parser.add_argument("--overlap", type=int, default=40, help="Words shared by consecutive chunks (default: 40)")
+    parser.add_argument("--dim", type=int, default=1024, help="Hashed vector dimensions (default: 1024)")
+    args = parser.parse_args(argv)
+    if args.overlap >= args.chunk_size:
+        parser.error("--overlap must be smaller than --chunk-size")
+
+    start = time.perf_counter()
+    chunks: List[Dict[str, str]] = []
+    files = 0
+    for path in iter_files(args.paths):
+        files += 1
+        for document in load_documents(path):
+            chunks.extend(chunk_document(document, args.chunk_size, args.overlap))
+    if not chunks:
+        print("No documents found", file=sys.stderr)
+        return 1
+
+    manifest = build_index(chunks, Path(args.out), dim=args.dim)
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {manifest['chunks']} chunks from {files} files ({manifest['terms']} terms) into {args.out} in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Offline retrieval over civic documents: hashed TF-IDF vectors plus BM25, fused with reciprocal-rank fusion.
+
+The index is a directory of ``.npy`` arrays opened with ``mmap_mode="r"``. Workers share the OS page cache
+instead of each loading a private copy, and a query only touches the pages it scores. Build it with
+``python -m app.search.ingest``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import mmap
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+
+from ..config import get_settings
+from .bm25 import tokenize
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DEFAULT_INDEX_DIR = Path(__file__).resolve().parents[2] / "data" / "local_index"
+RRF_K = 60
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def features(tokens: Sequence[str]) -> Iterable[str]:
+    """Unigrams plus adjacent bigrams so phrases like "rent stabilization" carry their own signal."""
+    yield from tokens
+    for left, right in zip(tokens, tokens[1:]):
+        yield f"{left} {right}"
+
+
+def hash_features(tokens: Sequence[str], dim: int) -> Dict[int, float]:
+    """
+    Signed feature hashing (crc32, stable across processes) with sublinear term frequency.
+    """
+    counts: Dict[int, float] = {}
+    for feature in features(tokens):
+        digest = zlib.crc32(feature.encode("utf-8"))
+        bucket = digest % dim
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        counts[bucket] = counts.get(bucket, 0.0) + sign
+    return {bucket: math.copysign(1.0 + math.log(abs(value)), value) for bucket, value in counts.items() if value}
+
+
+def build_index(chunks: List[Dict[str, str]], out_dir: Path, dim: int = 1024) -> Dict[str, Any]:
+    """
+    Write the dense matrix, BM25 postings and chunk store for ``chunks`` (dicts with title, source, text).
+    """
+    import numpy as np
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tokenized = [tokenize(chunk["text"]) for chunk in chunks]
+    count = len(chunks)
+
+    # Dense hashed TF-IDF matrix
+    hashed = [hash_features(tokens, dim) for tokens in tokenized]
+    df = np.zeros(dim, dtype=np.float64)
+    for row in hashed:
+        df[list(row)] += 1
+    idf = (np.log((1.0 + count) / (1.0 + df)) + 1.0).astype(np.float32)
+    matrix = np.zeros((count, dim), dtype=np.float32)
+    for index, row in enumerate(hashed):
+        if row:
+            buckets = np.fromiter(row.keys(), dtype=np.int64)
+            matrix[index, buckets] = np.fromiter(row.values(), dtype=np.float32) * idf[buckets]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1.0, norms)
+    np.save(out_dir / "vectors.npy", matrix)
+    np.save(out_dir / "idf.npy", idf)
+
+    # BM25 postings in CSR layout: term -> slice of (doc, tf)
+    postings: Dict[str, Dict[int, int]] = {}
+    for doc_index, tokens in enumerate(tokenized):
+        for token in tokens:
+            doc_tf = postings.setdefault(token, {})
+            doc_tf[doc_index] = doc_tf.get(doc_index, 0) + 1
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    docs: List[int] = []
+    tfs: List[int] = []
+    for term_index, term in enumerate(terms):
+        for doc_index, tf in sorted(postings[term].items()):
+            docs.append(doc_index)
+            tfs.append(tf)
+        offsets[term_index + 1] = len(docs)
+    np.save(out_dir / "bm25_offsets.npy", offsets)
+    np.save(out_dir / "bm25_docs.npy", np.asarray(docs, dtype=np.int32))
+    np.save(out_dir / "bm25_tf.npy", np.asarray(tfs, dtype=np.float32))
+    np.save(out_dir / "doc_lengths.npy", np.asarray([len(tokens) for tokens in tokenized], dtype=np.float32))
+    (out_dir / "bm25_terms.json").write_text(json.dumps({term: index for index, term in enumerate(terms)}), encoding="utf-8")
+
+    # Chunk store: JSON lines plus byte offsets for random access through mmap
+    chunk_offsets = [0]
+    with open(out_dir / "chunks.jsonl", "wb") as handle:
+        for chunk in chunks:
+            line = json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n"
+            handle.write(line)
+            chunk_offsets.append(chunk_offsets[-1] + len(line))
+    np.save(out_dir / "chunk_offsets.npy", np.asarray(chunk_offsets, dtype=np.int64))
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "dim": dim,
+        "chunks": count,
+        "terms": len(terms),
+        "avg_doc_length": float(sum(len(tokens) for tokens in tokenized) / count) if count else 0.0,
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+class LocalRetriever:
+    """
+    Memory-mapped hybrid retriever: dense cosine top-k and BM25 top-k fused with reciprocal-rank fusion.
+    """
+
+    def __init__(self, index_dir: Path) -> None:
+        import numpy as np
+
+        self._np = np
+        manifest = json.loads((index_dir / "manifest.json").read_text(encoding="utf-8"))
+        if manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported local index version {manifest.get('version')}")
+        self.dim = int(manifest["dim"])
+        self.count = int(manifest["chunks"])
+        self._avg_length = float(manifest["avg_doc_length"]) or 1.0
+        self._vectors = np.load(index_dir / "vectors.npy", mmap_mode="r")
+        self._idf = np.load(index_dir / "idf.npy")
+        self._offsets = np.load(index_dir / "bm25_offsets.npy", mmap_mode="r")
+        self._docs = np.load(index_dir / "bm25_docs.npy", mmap_mode="r")
+        self._tfs = np.load(index_dir / "bm25_tf.npy", mmap_mode="r")
+        self._doc_lengths = np.load(index_dir / "doc_lengths.npy", mmap_mode="r")
+        self._terms: Dict[str, int] = json.loads((index_dir / "bm25_terms.json").read_text(encoding="utf-8"))
+        self._chunk_offsets = np.load(index_dir / "chunk_offsets.npy")
+        self._chunks_file = open(index_dir / "chunks.jsonl", "rb")
+        self._chunks = mmap.mmap(self._chunks_file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+
+    def _top_k(self, scores: "np.ndarray", k: int) -> "np.ndarray":
+        np = self._np
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[scores[candidates] > 0]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def dense_scores(self, tokens: Sequence[str]) -> "np.ndarray":
+        np = self._np
+        query = np.zeros(self.dim, dtype=np.float32)
+        for bucket, value in hash_features(tokens, self.dim).items():
+            query[bucket] = value * self._idf[bucket]
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return np.zeros(self.count, dtype=np.float32)
+        return self._vectors @ (query / norm)
+
+    def bm25_scores(self, tokens: Sequence[str]) -> "np.ndarray":
+        np = self._np
+        scores = np.zeros(self.count, dtype=np.float32)
+        for term in set(tokens):
+            term_index = self._terms.get(term)
+            if term_index is None:
+                continue
+            start, end = int(self._offsets[term_index]), int(self._offsets[term_index + 1])
+            docs = self._docs[start:end]
+            tf = self._tfs[start:end]
+            df = end - start
+            idf = math.log(1.0 + (self.count - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_lengths[docs] / self._avg_length)
+            # Postings hold each doc at most once per term, so a fancy-indexed add is safe here.
+            scores[docs] += idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return scores
+
+    def chunk(self, index: int) -> Dict[str, Any]:
+        start, end = int(self._chunk_offsets[index]), int(self._chunk_offsets[index + 1])
+        return json.loads(self._chunks[start:end])
+
+    def search(self, query: str, top: int = 5, candidates: int = 50) -> List[Dict[str, Any]]:
+        """
+        Return up to ``top`` chunks shaped like Azure Search results so the chat endpoint can use them as-is.
+        """
+        tokens = tokenize(query)
+        if not tokens or not self.count:
+            return []
+        fused: Dict[int, float] = {}
+        for ranking in (self._top_k(self.dense_scores(tokens), candidates), self._top_k(self.bm25_scores(tokens), candidates)):
+            for rank, doc_index in enumerate(ranking.tolist()):
+                fused[doc_index] = fused.get(doc_index, 0.0) + 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top]
+        results = []
+        for doc_index, score in best:
+            chunk = self.chunk(doc_index)
+            results.append(
+                {
+                    "title": chunk.get("title") or chunk.get("source"),
+                    "sourcefile": chunk.get("source"),
+                    "content": chunk.get("text", ""),
+                    "score": round(score, 6),
+                    "retrieval": "local",
+                }
+            )
+        return results
+
+
+@lru_cache
+def get_local_retriever() -> Optional[LocalRetriever]:
+    """
+    Open the configured local index once per process; None when it has not been built or NumPy is missing.
+    """
+    configured = get_settings().local_retrieval_dir
+    index_dir = Path(configured) if configured else DEFAULT_INDEX_DIR
+    if not (index_dir / "manifest.json").exists():
+        return None
+    try:
+        return LocalRetriever(index_dir)
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning("Local retrieval index at %s unavailable: %s", index_dir, e)
+        return None
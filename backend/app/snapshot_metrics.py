@@ -0,0 +1,283 @@
+"""
+Incrementally maintained community snapshot metrics.
+
+Policies, events and service alert days are diffed into per-day counters when a source is refreshed, not on
+each request. Reading the snapshot looks up a result precomputed from a fixed number of day buckets. That result
+is recomputed only when a source changes or the date rolls over.
+
+* **Local Policy Changes**: policies added, or whose status or title changed, in the last ``window_days`` days,
+  compared with the window before. Policies carry no timestamps, so the first refresh a worker sees is only recorded
+  as the baseline to diff later refreshes against. The baseline and the counted changes are kept in the warm-start
+  snapshot, so a restarted or newly started worker carries on from them instead of starting over.
+* **Nearby Events**: events starting in the next ``window_days`` days, compared with events that started in the
+  last ``window_days`` days.
+* **Service Alerts**: alert items that are not running normally (schools closed, alternate side parking
+  suspended, collection delayed, ...) in the last ``window_days`` days, compared with the window before.
+
+A metric whose source has not been seen yet keeps the value from the dashboard payload.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .metrics import REGISTRY
+from .schemas import Metric
+
+POLICY_CHANGES = "Local Policy Changes"
+NEARBY_EVENTS = "Nearby Events"
+SERVICE_ALERTS = "Service Alerts"
+
+# Same statuses the frontend's service alert timeline shows as normal.
+_NORMAL_ALERT_STATUSES = ("IN EFFECT", "ON SCHEDULE", "OPEN")
+
+SNAPSHOT_INGESTS = REGISTRY.counter(
+    "snapshot_metric_ingests_total", "Source refreshes diffed into the snapshot metrics.", ("source",)
+)
+
+
+class DayCounts:
+    """Counts per calendar day, summed over short windows."""
+
+    __slots__ = ("_counts",)
+
+    def __init__(self) -> None:
+        self._counts: Dict[date, int] = {}
+
+    def add(self, day: date, delta: int = 1) -> None:
+        value = self._counts.get(day, 0) + delta
+        if value:
+            self._counts[day] = value
+        else:
+            self._counts.pop(day, None)
+
+    def set(self, day: date, value: int) -> None:
+        self.add(day, value - self._counts.get(day, 0))
+
+    def total(self, start: date, days: int) -> int:
+        return sum(self._counts.get(start + timedelta(days=offset), 0) for offset in range(days))
+
+    def items(self) -> Iterable[Tuple[date, int]]:
+        return list(self._counts.items())
+
+    def prune(self, before: date) -> None:
+        for day in [day for day in self._counts if day < before]:
+            del self._counts[day]
+
+
+def format_trend(current: int, previous: int) -> str:
+    if previous == 0:
+        return "+100%" if current else "0%"
+    change = round((current - previous) * 100.0 / previous)
+    return f"{change:+d}%"
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+        except ValueError:
+            return None
+    return None
+
+
+def _alert_day(today_id: Any) -> Optional[date]:
+    try:
+        return datetime.strptime(str(today_id), "%Y%m%d").date()
+    except ValueError:
+        return _as_date(today_id)
+
+
+def _event_instances(events: Iterable[Mapping[str, Any]]) -> Iterable[Tuple[str, Any]]:
+    """``(id, start_time)`` per event, with a recurring series counted once per occurrence."""
+    for event in events:
+        occurrences = event.get("occurrences")
+        if occurrences:
+            for index, occurrence in enumerate(occurrences):
+                yield str(occurrence.get("id") or f"{event.get('id')}#{index}"), occurrence.get("start_time")
+        else:
+            yield str(event.get("id")), event.get("start_time")
+
+
+def is_disruption(status: str) -> bool:
+    status = (status or "").upper()
+    return status.startswith("NOT ") or not any(normal in status for normal in _NORMAL_ALERT_STATUSES)
+
+
+class SnapshotMetricsAggregator:
+    """
+    Process-wide aggregator fed by the dashboard payload and service alert refreshes.
+
+    ``observe_*`` calls carry the refreshed data's ``revision`` stamp, so re-reading the same cached payload on
+    every request costs a dictionary lookup, and workers sharing one cache tier each ingest a refresh once.
+    """
+
+    def __init__(self, window_days: int = 7, retention_days: int = 60, today: Callable[[], date] = date.today) -> None:
+        self.window_days = window_days
+        self.retention_days = retention_days
+        self._today = today
+        self._policies: Dict[str, Tuple[str, str]] = {}
+        self._policies_baselined = False
+        self._policy_changes = DayCounts()
+        self._events: Dict[str, date] = {}
+        self._event_starts = DayCounts()
+        self._alerts = DayCounts()
+        # Last revision ingested per source, and the sources ingested at least once.
+        self._seen: Dict[str, Any] = {}
+        self._sources: Set[str] = set()
+        self._computed: Dict[str, Metric] = {}
+        self._computed_for: Optional[date] = None
+        self._lock = threading.Lock()
+
+    def configure(self, window_days: int) -> None:
+        with self._lock:
+            self.window_days = window_days
+            self._computed_for = None
+
+    # Ingestion: O(items in the refresh), once per refresh.
+
+    def ingest_policies(self, policies: Iterable[Mapping[str, Any]]) -> None:
+        today = self._today()
+        with self._lock:
+            for policy in policies:
+                key = (str(policy.get("status", "")), str(policy.get("title", "")))
+                policy_id = str(policy.get("id"))
+                if self._policies.get(policy_id) != key:
+                    self._policies[policy_id] = key
+                    if self._policies_baselined:
+                        self._policy_changes.add(today)
+            # Every policy is new to the first refresh; the payload's metric stays until there is a diff to count.
+            if self._policies_baselined:
+                self._invalidate("policies")
+            self._policies_baselined = True
+
+    def policy_state(self) -> Dict[str, Any]:
+        """The policy baseline and counted changes, as JSON for the warm-start snapshot."""
+        with self._lock:
+            return {
+                "policies": {policy_id: list(key) for policy_id, key in self._policies.items()},
+                "changes": {day.isoformat(): count for day, count in self._policy_changes.items()},
+            }
+
+    def restore_policies(self, state: Mapping[str, Any]) -> None:
+        """Continue from a ``policy_state`` saved by an earlier worker, unless this one has ingested policies already."""
+        with self._lock:
+            if self._policies_baselined:
+                return
+            for policy_id, key in (state.get("policies") or {}).items():
+                self._policies[str(policy_id)] = (str(key[0]), str(key[1]))
+            for day, count in (state.get("changes") or {}).items():
+                parsed = _as_date(day)
+                if parsed is not None:
+                    self._policy_changes.add(parsed, int(count))
+            self._policies_baselined = True
+            self._invalidate("policies")
+
+    def ingest_events(self, events: Iterable[Mapping[str, Any]]) -> None:
+        today = self._today()
+        with self._lock:
+            current = set()
+            for event_id, start_time in _event_instances(events):
+                start = _as_date(start_time)
+                if start is None:
+                    continue
+                current.add(event_id)
+                previous = self._events.get(event_id)
+                if previous == start:
+                    continue
+                if previous is not None:
+                    self._event_starts.add(previous, -1)
+                self._events[event_id] = start
+                self._event_starts.add(start)
+            # Events that left the feed before starting were cancelled; past events stay counted for the trend.
+            for event_id in [event_id for event_id, start in self._events.items() if start >= today and event_id not in current]:
+                self._event_starts.add(self._events.pop(event_id), -1)
+            self._invalidate("events")
+
+    def ingest_alert_days(self, days: Iterable[Mapping[str, Any]]) -> None:
+        with self._lock:
+            for alert_day in days:
+                day = _alert_day(alert_day.get("today_id"))
+                if day is None:
+                    continue
+                items = alert_day.get("items") or []
+                self._alerts.set(day, sum(1 for item in items if is_disruption(item.get("status", ""))))
+            self._invalidate("service_alerts")
+
+    def observe_dashboard(self, payload: Mapping[str, Any]) -> bool:
+        """Ingest a refreshed payload; returns whether it was new."""
+        if not self._is_new("dashboard", payload.get("revision")):
+            return False
+        self.ingest_policies(payload.get("policies") or [])
+        self.ingest_events(payload.get("events") or [])
+        return True
+
+    def observe_service_alerts(self, data: Optional[Mapping[str, Any]]) -> None:
+        if data and self._is_new("service_alerts", data.get("revision")):
+            self.ingest_alert_days(data.get("days") or [])
+
+    def _is_new(self, source: str, revision: Any) -> bool:
+        if revision is not None and self._seen.get(source) == revision:
+            return False
+        self._seen[source] = revision
+        SNAPSHOT_INGESTS.inc(source=source)
+        return True
+
+    def _invalidate(self, source: str) -> None:
+        self._sources.add(source)
+        self._computed_for = None
+
+    # Reads: O(1) unless a refresh or the date changed since the last read.
+
+    def metrics(self, fallback: List[Metric]) -> List[Metric]:
+        """``fallback`` (the payload's metrics) with every metric we have data for replaced by its live value."""
+        today = self._today()
+        computed = self._computed
+        if self._computed_for != today:
+            with self._lock:
+                computed = self._recompute(today)
+        return [computed.get(metric.label, metric) for metric in fallback]
+
+    def _recompute(self, today: date) -> Dict[str, Metric]:
+        window = self.window_days
+        recent_start = today - timedelta(days=window - 1)
+        previous_start = recent_start - timedelta(days=window)
+        computed: Dict[str, Metric] = {}
+        if "policies" in self._sources:
+            current = self._policy_changes.total(recent_start, window)
+            computed[POLICY_CHANGES] = Metric(
+                label=POLICY_CHANGES, value=current, trend=format_trend(current, self._policy_changes.total(previous_start, window))
+            )
+        if "events" in self._sources:
+            upcoming = self._event_starts.total(today, window)
+            computed[NEARBY_EVENTS] = Metric(
+                label=NEARBY_EVENTS, value=upcoming, trend=format_trend(upcoming, self._event_starts.total(recent_start - timedelta(days=1), window))
+            )
+        if "service_alerts" in self._sources:
+            current = self._alerts.total(recent_start, window)
+            computed[SERVICE_ALERTS] = Metric(
+                label=SERVICE_ALERTS, value=current, trend=format_trend(current, self._alerts.total(previous_start, window))
+            )
+        horizon = today - timedelta(days=self.retention_days)
+        for counts in (self._policy_changes, self._event_starts, self._alerts):
+            counts.prune(horizon)
+        for event_id in [event_id for event_id, start in self._events.items() if start < horizon]:
+            del self._events[event_id]
+        # Publish the dict before the date so a lock-free reader never pairs a new date with stale values.
+        self._computed = computed
+        self._computed_for = today
+        return computed
+
+
+def new_revision() -> int:
+    """Stamp for a freshly loaded payload; readers ingest each stamp once."""
+    return time.time_ns()
+
+
+SNAPSHOT_METRICS = SnapshotMetricsAggregator()
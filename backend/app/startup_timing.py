@@ -0,0 +1,140 @@
+"""
+Cold-start timing: per-module import durations and time until the app is ready to serve.
+"""
+from __future__ import annotations
+
+import importlib.abc
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module's real loader for the duration of ``exec_module`` only."""
+
+    def __init__(self, loader: Any, timer: "ImportTimer") -> None:
+        self._loader = loader
+        self._timer = timer
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        # Put the real loader back so pkgutil/importlib.resources never see the wrapper.
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._timer._enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._exit(module.__name__)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta path hook recording inclusive and self time of every module imported while installed.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.modules: Dict[str, Dict[str, float]] = {}
+        self._local = threading.local()
+        self._installed = False
+
+    def install(self) -> None:
+        if not self._installed:
+            sys.meta_path.insert(0, self)
+            self._installed = True
+
+    def uninstall(self) -> None:
+        if self._installed:
+            try:
+                sys.meta_path.remove(self)
+            except ValueError:
+                pass
+            self._installed = False
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def _enter(self) -> None:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        # [start, accumulated child time]
+        stack.append([time.perf_counter(), 0.0])
+
+    def _exit(self, name: str) -> None:
+        stack = self._local.stack
+        start, children = stack.pop()
+        inclusive = time.perf_counter() - start
+        if stack:
+            stack[-1][1] += inclusive
+        self.modules[name] = {"inclusive_ms": inclusive * 1000.0, "self_ms": (inclusive - children) * 1000.0}
+
+    def top_modules(self, limit: int = 25, key: str = "self_ms") -> List[Dict[str, Any]]:
+        ranked = sorted(self.modules.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+        return [{"module": name, "self_ms": round(t["self_ms"], 3), "inclusive_ms": round(t["inclusive_ms"], 3)} for name, t in ranked]
+
+    def top_packages(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Self time rolled up by top-level package (e.g. ``openai``, ``azure``, ``fastapi``)."""
+        totals: Dict[str, float] = {}
+        for name, timing in self.modules.items():
+            package = name.split(".", 1)[0]
+            totals[package] = totals.get(package, 0.0) + timing["self_ms"]
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{"package": name, "self_ms": round(total, 3)} for name, total in ranked]
+
+
+class StartupReport:
+    """Collects cold-start milestones for the current worker."""
+
+    def __init__(self) -> None:
+        self.timer = ImportTimer()
+        self.milestones: Dict[str, float] = {}
+        self.ready_ms: Optional[float] = None
+
+    def mark(self, name: str) -> None:
+        self.milestones[name] = (time.perf_counter() - self.timer.started_at) * 1000.0
+
+    def ready(self) -> None:
+        """Stop timing imports once the app can serve requests; later lazy imports are not counted."""
+        if self.ready_ms is None:
+            self.mark("ready")
+            self.ready_ms = self.milestones["ready"]
+            self.timer.uninstall()
+
+    def as_dict(self, limit: int = 25) -> Dict[str, Any]:
+        return {
+            "ready_ms": round(self.ready_ms, 3) if self.ready_ms is not None else None,
+            "milestones_ms": {name: round(value, 3) for name, value in self.milestones.items()},
+            "modules_imported": len(self.timer.modules),
+            "import_ms": round(sum(t["self_ms"] for t in self.timer.modules.values()), 3),
+            "top_packages": self.timer.top_packages(),
+            "top_modules": self.timer.top_modules(limit),
+        }
+
+
+STARTUP = StartupReport()
@@ -0,0 +1,155 @@
+"""
+Non-blocking structured logging.
+
+``configure_logging`` puts a single ``LogQueueHandler`` on the root logger. On the request thread a log call only
+builds the ``LogRecord``, runs the sampling check, stamps the current trace and span ids and appends the record to
+a bounded queue. Formatting (``%`` interpolation, JSON encoding, tracebacks) and the stream write happen on a
+``QueueListener`` thread. When the queue is full the record is dropped and counted rather than blocking the
+request.
+
+Records are plain ``time level logger: message`` lines by default. With ``log_format="json"`` they are JSON
+objects with ``ts``, ``level``, ``logger``, ``message``, the trace and span ids when the call ran inside a trace,
+and any ``extra={...}`` fields. Call sites must use lazy ``%s`` arguments, not f-strings, so that sampled-out and
+disabled records are never formatted at all.
+
+``sample_rates`` maps logger names to the fraction of their DEBUG and INFO records that are kept; it applies to
+child loggers too, and the longest matching name wins. Warnings and errors are never sampled.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Mapping, Optional
+
+from .metrics import REGISTRY
+from .tracing import current_span
+
+LOG_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "Log records not written, because they were sampled out or the queue was full.", ("reason",)
+)
+
+# Third-party loggers that log every HTTP request at INFO; kept at WARNING so the root level does not enable them.
+QUIET_LOGGERS = ("httpx", "httpcore", "azure", "openai")
+
+# Attributes every LogRecord has; anything else on a record came from ``extra=`` and is emitted as a field.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "trace_id", "span_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+            entry["span_id"] = getattr(record, "span_id", None)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a configured fraction of DEBUG/INFO records per logger name prefix."""
+
+    def __init__(self, rates: Optional[Mapping[str, float]] = None) -> None:
+        super().__init__()
+        self._rates = dict(rates or {})
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            best = -1
+            for prefix, value in self._rates.items():
+                if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                    rate, best = value, len(prefix)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self._rates:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        LOG_DROPPED.inc(reason="sampled")
+        return False
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Enqueues records without formatting them, stamped with the caller's trace context.
+
+    The stock ``QueueHandler.prepare`` formats the message on the calling thread; here the record travels as is
+    (``exc_info`` included) and the listener's handler formats it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        span = current_span()
+        trace_id = getattr(span, "trace_id", None)
+        if trace_id is not None:
+            record.trace_id = trace_id
+            record.span_id = span.span_id
+        try:
+            self.enqueue(record)
+        except queue.Full:
+            LOG_DROPPED.inc(reason="queue_full")
+
+
+_LISTENER: Optional[QueueListener] = None
+
+
+def configure_logging(
+    level: str = "INFO",
+    log_format: str = "text",
+    queue_size: int = 10000,
+    sample_rates: Optional[Mapping[str, float]] = None,
+) -> None:
+    """Route the root logger through the background queue; calling it again replaces the previous pipeline."""
+    global _LISTENER
+    shutdown_logging()
+    output = logging.StreamHandler(sys.stdout)
+    if log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=max(1, queue_size))
+    handler = LogQueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rates))
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, LogQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    _LISTENER = QueueListener(records, output, respect_handler_level=True)
+    _LISTENER.start()
+
+
+def shutdown_logging() -> None:
+    """Write out everything still queued and stop the listener thread."""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
@@ -0,0 +1,281 @@
+"""
+Lightweight request-scoped tracing with in-memory and OTLP/JSON file exporters.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+WATERFALL_WIDTH = 40
+
+
+class Span:
+    """A timed unit of work inside a trace."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "start_unix_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.start_unix_ns = time.time_ns()
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000.0
+
+
+class _NoopSpan:
+    """Returned by ``current_span`` outside a trace so callers never need a None check."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class RingBufferExporter:
+    """Keeps the most recent completed traces in memory."""
+
+    def __init__(self, capacity: int = 200) -> None:
+        self._traces: Deque[List[Span]] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        with self._lock:
+            self._traces.append(spans)
+
+    def slowest(self, limit: int = 10, name_prefix: Optional[str] = None) -> List[List[Span]]:
+        with self._lock:
+            traces = list(self._traces)
+        if name_prefix:
+            traces = [trace for trace in traces if trace[-1].name.startswith(name_prefix)]
+        traces.sort(key=lambda trace: trace[-1].duration_ms, reverse=True)
+        return traces[:limit]
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPFileExporter:
+    """
+    Appends each completed trace as one OTLP/JSON ``ExportTraceServiceRequest`` line so collectors can tail the file.
+    """
+
+    def __init__(self, path: str, service_name: str) -> None:
+        self._path = path
+        self._service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        otlp_spans = []
+        for span in spans:
+            otlp_spans.append(
+                {
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_unix_ns),
+                    "endTimeUnixNano": str(span.start_unix_ns + int(span.duration_ms * 1_000_000)),
+                    "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+                    "status": {"code": 2 if span.status == "error" else 1},
+                }
+            )
+        record = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self._service_name}}]},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+                }
+            ]
+        }
+        line = json.dumps(record, separators=(",", ":"))
+        try:
+            with self._lock, open(self._path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+        except OSError:
+            # Tracing must never break a request; a bad path just means no file export.
+            pass
+
+
+class Tracer:
+    """
+    Collects spans per trace and hands the finished trace to every exporter once its root span ends.
+    """
+
+    def __init__(self) -> None:
+        self.ring_buffer = RingBufferExporter()
+        self._exporters: List[Any] = [self.ring_buffer]
+        self._pending: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+        self._start_listeners: List[Callable[[Span], None]] = []
+
+    def configure(self, buffer_size: int, otlp_file: str = "", service_name: str = "ny-civic-sphere") -> None:
+        self.ring_buffer = RingBufferExporter(buffer_size)
+        self._exporters = [self.ring_buffer]
+        if otlp_file:
+            self._exporters.append(OTLPFileExporter(otlp_file, service_name))
+
+    def add_start_listener(self, listener: Callable[[Span], None]) -> None:
+        """Call ``listener`` on the starting thread whenever a span opens."""
+        self._start_listeners.append(listener)
+
+    @contextmanager
+    def start_span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        if parent is None:
+            span = Span(name, os.urandom(16).hex(), None, attributes)
+            with self._lock:
+                self._pending[span.trace_id] = []
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+        for listener in self._start_listeners:
+            listener(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.status = "error"
+            span.attributes.setdefault("error", type(exc).__name__)
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            spans = self._pending.get(span.trace_id)
+            if spans is None:
+                # The root already finished (e.g. work that outlived its request); drop the straggler.
+                return
+            spans.append(span)
+            if span.parent_id is not None:
+                return
+            del self._pending[span.trace_id]
+        for exporter in self._exporters:
+            exporter.export(spans)
+
+
+TRACER = Tracer()
+
+
+def start_span(name: str, **attributes: Any):
+    """Open a child of the current span (or a new trace when there is none)."""
+    return TRACER.start_span(name, **attributes)
+
+
+def current_span():
+    """Return the active span, or a no-op stand-in outside a trace."""
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(name: str) -> Callable:
+    """Decorator wrapping a function call in a span."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.start_span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def render_waterfall(spans: List[Span]) -> Dict[str, Any]:
+    """
+    Lay out a finished trace as offsets from the root so slow segments stand out.
+    """
+    root = spans[-1]
+    total_ms = max(root.duration_ms, 1e-6)
+    depth_by_id: Dict[str, int] = {root.span_id: 0}
+    ordered = sorted(spans, key=lambda span: span.start)
+    rows = []
+    lines = []
+    for span in ordered:
+        depth = depth_by_id.get(span.parent_id, -1) + 1 if span.parent_id else 0
+        depth_by_id[span.span_id] = depth
+        offset_ms = (span.start - root.start) * 1000.0
+        rows.append(
+            {
+                "name": span.name,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "depth": depth,
+                "offset_ms": round(offset_ms, 3),
+                "duration_ms": round(span.duration_ms, 3),
+                "status": span.status,
+                "attributes": span.attributes,
+            }
+        )
+        lead = min(int(offset_ms / total_ms * WATERFALL_WIDTH), WATERFALL_WIDTH - 1)
+        width = max(1, min(WATERFALL_WIDTH - lead, round(span.duration_ms / total_ms * WATERFALL_WIDTH)))
+        bar = " " * lead + "█" * width
+        lines.append(f"{bar:<{WATERFALL_WIDTH}} {span.duration_ms:9.2f}ms {'  ' * depth}{span.name}")
+    return {
+        "trace_id": root.trace_id,
+        "name": root.name,
+        "duration_ms": round(root.duration_ms, 3),
+        "spans": rows,
+        "waterfall": lines,
+    }
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span for each HTTP request.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.status = "error"
+            await send(message)
+
+        with TRACER.start_span(f"{method} {scope.get('path', '')}", **{"http.method": method}) as span:
+            await self.app(scope, receive, send_wrapper)
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                span.name = f"{method} {scope.get('root_path', '')}{route}"
+                span.set_attribute("http.route", f"{scope.get('root_path', '')}{route}")
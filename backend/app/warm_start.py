@@ -0,0 +1,220 @@
+"""
+Versioned on-disk snapshot of the last good dashboard and service alert data, for warm worker starts.
+
+A freshly started worker has an empty cache and would otherwise block its first requests on Cosmos and the NYC
+APIs, or serve ``STUB_DASHBOARD`` while they are down. ``WarmStartStore`` remembers the last payloads that came
+from a real upstream and periodically writes them to one file. The next worker loads that file synchronously at
+startup, seeds its cache from it and refreshes from the upstreams in the background.
+
+File layout (little endian)::
+
+    header   magic "NYCWARM\\0", u16 format version, u16 section count, f64 written-at (unix seconds)
+    table    per section: 16-byte name, u64 offset, u64 length, u32 CRC-32 of the stored bytes
+    bodies   per section: zlib-compressed compact JSON
+
+The file is memory-mapped on load and each section is checked and inflated on its own, so a corrupt or unknown
+section costs only that section. Files with a different magic or format version are ignored.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, Mapping, Optional
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NYCWARM\0"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sHHd")
+_SECTION = struct.Struct("<16sQQI")
+
+WARM_START_WRITES = REGISTRY.counter("warm_start_snapshot_writes_total", "Warm-start snapshot file writes by outcome.", ("outcome",))
+WARM_START_LOADS = REGISTRY.counter("warm_start_snapshot_loads_total", "Warm-start snapshot loads at startup by outcome.", ("outcome",))
+WARM_START_AGE = REGISTRY.gauge("warm_start_snapshot_age_seconds", "Age of the snapshot this worker started from.")
+
+
+class SnapshotFormatError(ValueError):
+    """The file is not a warm-start snapshot this version can read."""
+
+
+def encode_snapshot(sections: Mapping[str, Any], written_at: Optional[float] = None) -> bytes:
+    bodies = []
+    for name, value in sections.items():
+        encoded = name.encode("utf-8")
+        if len(encoded) > 16:
+            raise ValueError(f"Section name {name!r} is longer than 16 bytes")
+        body = zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode("utf-8"), 6)
+        bodies.append((encoded, body))
+    offset = _HEADER.size + _SECTION.size * len(bodies)
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(bodies), time.time() if written_at is None else written_at)]
+    for name, body in bodies:
+        parts.append(_SECTION.pack(name, offset, len(body), zlib.crc32(body)))
+        offset += len(body)
+    parts.extend(body for _, body in bodies)
+    return b"".join(parts)
+
+
+def decode_snapshot(data: Any) -> "tuple[float, Dict[str, Any]]":
+    """Return ``(written_at, sections)`` from snapshot bytes or a memory map; bad sections are skipped."""
+    if len(data) < _HEADER.size:
+        raise SnapshotFormatError("File is shorter than the snapshot header")
+    magic, version, count, written_at = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SnapshotFormatError("Not a warm-start snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotFormatError(f"Snapshot format version {version} is not {FORMAT_VERSION}")
+    if len(data) < _HEADER.size + _SECTION.size * count:
+        raise SnapshotFormatError("Section table is truncated")
+    sections: Dict[str, Any] = {}
+    for index in range(count):
+        raw_name, offset, length, checksum = _SECTION.unpack_from(data, _HEADER.size + _SECTION.size * index)
+        name = raw_name.rstrip(b"\0").decode("utf-8", "replace")
+        body = data[offset:offset + length]
+        if len(body) != length or zlib.crc32(body) != checksum:
+            logger.warning("Skipping corrupt warm-start section %s", name)
+            continue
+        try:
+            sections[name] = json.loads(zlib.decompress(body))
+        except (zlib.error, ValueError) as exc:
+            logger.warning("Skipping unreadable warm-start section %s: %s", name, exc)
+    return written_at, sections
+
+
+def read_snapshot(path: str) -> "tuple[float, Dict[str, Any]]":
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size == 0:
+            raise SnapshotFormatError("File is empty")
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return decode_snapshot(view)
+
+
+def write_snapshot(path: str, sections: Mapping[str, Any]) -> None:
+    """Write atomically: readers (and other workers writing concurrently) only ever see a complete file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".warm-start-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(encode_snapshot(sections))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class WarmStartStore:
+    """
+    Last-known-good values by section name, mirrored to disk every ``interval`` seconds when they changed.
+
+    ``put`` only swaps a dictionary entry, so it is safe on the request path; file writes happen on a background
+    thread and once more on ``close``.
+    """
+
+    def __init__(self) -> None:
+        self.path = ""
+        self.interval = 60.0
+        self.max_age = 86400.0
+        self._sections: Dict[str, Any] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def configure(self, path: str, interval: float, max_age: float) -> None:
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+
+    def load(self) -> Dict[str, Any]:
+        """Read the snapshot file into memory; a missing, stale or unreadable file starts the worker cold."""
+        if not self.enabled:
+            return {}
+        try:
+            written_at, sections = read_snapshot(self.path)
+        except FileNotFoundError:
+            WARM_START_LOADS.inc(outcome="missing")
+            return {}
+        except (OSError, ValueError) as exc:
+            WARM_START_LOADS.inc(outcome="invalid")
+            logger.warning("Ignoring warm-start snapshot %s: %s", self.path, exc)
+            return {}
+        age = max(0.0, time.time() - written_at)
+        if self.max_age > 0 and age > self.max_age:
+            WARM_START_LOADS.inc(outcome="stale")
+            logger.info("Ignoring warm-start snapshot %s written %.0f s ago", self.path, age)
+            return {}
+        WARM_START_LOADS.inc(outcome="ok")
+        WARM_START_AGE.set(age)
+        with self._lock:
+            # Anything recorded since startup is newer than the file.
+            self._sections = {**sections, **self._sections}
+        logger.info("Loaded warm-start snapshot %s (%s) written %.0f s ago", self.path, ", ".join(sorted(sections)), age)
+        return sections
+
+    def get(self, name: str) -> Optional[Any]:
+        return self._sections.get(name)
+
+    def put(self, name: str, value: Any) -> None:
+        with self._lock:
+            self._sections = {**self._sections, name: value}
+            self._dirty = True
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="warm-start-writer", daemon=True)
+        self._thread.start()
+
+    def save(self) -> bool:
+        """Write the snapshot if anything changed since the last write."""
+        with self._lock:
+            if not self._dirty or not self.enabled:
+                return False
+            sections, self._dirty = self._sections, False
+        try:
+            write_snapshot(self.path, sections)
+        except (OSError, TypeError, ValueError) as exc:
+            with self._lock:
+                self._dirty = True
+            WARM_START_WRITES.inc(outcome="error")
+            logger.warning("Could not write warm-start snapshot %s: %s", self.path, exc)
+            return False
+        WARM_START_WRITES.inc(outcome="ok")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.save()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        self.save()
+
+
+def default_snapshot_path() -> str:
+    return os.path.join(tempfile.gettempdir(), "ny-civic-sphere-warm-start.bin")
+
+
+WARM_START = WarmStartStore()
@@ -0,0 +1,131 @@
+"""
+Response shaping for API reads: ``fields=`` projection and JSON or MessagePack bodies negotiated by ``Accept``.
+
+Projection is applied while serializing, not afterwards: the response type's pydantic-core serializer is given an
+``include`` set and never visits the dropped fields, so leaving out ``description`` or ``summary`` saves the
+serialization work as well as the bytes. JSON bodies come straight from ``TypeAdapter.dump_json``. MessagePack
+bodies are produced only when the client asks for them and ``msgpack`` is installed; otherwise the response is JSON.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+from .metrics import record_response_size
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ACCEPTED = frozenset({MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"})
+
+# Identifies the item even when a client projects everything else away. Models without an ``id`` name the fields
+# that identify them in an ``identity_fields`` class variable.
+ALWAYS_INCLUDED = ("id",)
+
+FIELDS_QUERY = Query(
+    None,
+    description=(
+        "Comma-separated item fields to return, e.g. `id,title`. The fields identifying an item (`id`, or "
+        "`kind,thread_id,post_id` for search hits) are always included."
+    ),
+    examples=["id,title,category"],
+)
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+@lru_cache(maxsize=1)
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """Validate a ``fields=`` value against ``model``; None means every field."""
+    if fields is None or not fields.strip():
+        return None
+    requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(model.model_fields)}",
+        )
+    return requested | frozenset(identity_fields(model))
+
+
+def identity_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """Fields ``parse_fields`` always keeps for ``model``."""
+    return getattr(model, "identity_fields", None) or tuple(name for name in ALWAYS_INCLUDED if name in model.model_fields)
+
+
+def _quality(params: str) -> float:
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when ``Accept`` lists a MessagePack type with at least the quality it gives ``application/json``."""
+    if not accept:
+        return False
+    msgpack_quality = json_quality = 0.0
+    for entry in accept.split(","):
+        media_type, _, params = entry.partition(";")
+        media_type = media_type.strip().lower()
+        if media_type in _MSGPACK_ACCEPTED:
+            msgpack_quality = max(msgpack_quality, _quality(params))
+        elif media_type == "application/json":
+            json_quality = max(json_quality, _quality(params))
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def shaped_response(
+    request: Request,
+    value: Any,
+    response_type: Any,
+    item_model: Optional[Type[BaseModel]] = None,
+    fields: Optional[str] = None,
+    items: Optional[str] = None,
+) -> Response:
+    """
+    Serialize ``value`` (an instance of ``response_type``) for ``request``.
+
+    ``fields`` projects each ``item_model`` in the response: the response itself when it is a list, otherwise its
+    list attribute named ``items`` (other attributes of the wrapper are kept whole).
+    """
+    include: Optional[Dict[Any, Any]] = None
+    selected = parse_fields(fields, item_model) if item_model is not None else None
+    if selected is not None:
+        projection = {"__all__": set(selected)}
+        if items is None:
+            include = projection
+        else:
+            include = {name: True for name in response_type.model_fields if name != items}
+            include[items] = projection
+
+    adapter = _adapter(response_type)
+    msgpack = _msgpack() if wants_msgpack(request.headers.get("accept")) else None
+    if msgpack is not None:
+        body = msgpack.packb(adapter.dump_python(value, mode="json", include=include), use_bin_type=True)
+        media_type, wire_format = MSGPACK_MEDIA_TYPE, "msgpack"
+    else:
+        body = adapter.dump_json(value, include=include)
+        media_type, wire_format = "application/json", "json"
+    record_response_size(request.scope, wire_format, include is not None, len(body))
+    # Without msgpack every client gets the same JSON, so caches need not key on Accept.
+    headers = {"Vary": "Accept"} if _msgpack() is not None else None
+    return Response(body, media_type=media_type, headers=headers)
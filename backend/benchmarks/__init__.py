@@ -0,0 +1,6 @@
+"""
+Offline benchmark harness for the NY Civic Sphere backend.
+
+Run ``python -m benchmarks.load`` from ``backend/`` to drive every ``/api/*`` route against local
+stand-ins for Cosmos DB, the NYC calendar APIs, Azure Functions, Azure AI Search and Azure OpenAI.
+"""
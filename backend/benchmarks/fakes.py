@@ -0,0 +1,308 @@
+"""
+Local HTTP stand-ins for every upstream the backend talks to.
+
+A single threaded server answers the Cosmos DB REST calls made by ``azure-cosmos``, the NYC discover and
+GetCalendar APIs, the Azure Function summary endpoint, Azure AI Search and Azure OpenAI chat completions.
+Each upstream has its own latency distribution and failure rate so tail behaviour can be reproduced offline.
+
+The dashboard container always answers with the fixture dashboard. Every other container keeps the documents
+written to it (transactional batches, creates and upserts) in memory and answers single-partition queries with
+them, so the forum and vote write paths can be exercised and read back.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from app.clients.faults import LatencyDistribution
+
+from . import fixtures
+
+UPSTREAMS = ("cosmos", "nyc_calendar", "nyc_calendar_alerts", "azure_functions", "azure_search", "azure_openai")
+
+# Partition key paths of the containers the backend writes to; any other container is partitioned by ``/type``.
+COSMOS_PARTITION_PATHS = {"forum": "/thread_id", "votes": "/election_id"}
+COSMOS_DASHBOARD_CONTAINER = "dashboard"
+
+
+@dataclass
+class UpstreamProfile:
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    failure_rate: float = 0.0
+    failure_status: int = 503
+
+
+class FakeUpstreams:
+    """
+    Threaded HTTP server hosting every fake upstream on one local port.
+    """
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, UpstreamProfile]] = None,
+        event_count: int = 50,
+        seed: int = 1,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.profiles = {name: UpstreamProfile() for name in UPSTREAMS}
+        self.profiles.update(profiles or {})
+        self.calls: Dict[str, int] = {name: 0 for name in UPSTREAMS}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._events_body = json.dumps(fixtures.nyc_discover_items(event_count)).encode()
+        # Stored Cosmos documents per container, keyed by (partition key, id).
+        self.documents: Dict[str, Dict[Tuple[Any, str], Dict[str, Any]]] = {}
+        self._documents_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeUpstreams":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-upstreams", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeUpstreams":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables pointing ``Settings`` at this server."""
+        base = self.base_url
+        return {
+            "COSMOS_ENDPOINT": f"{base}/",
+            "COSMOS_KEY": base64.b64encode(b"benchmark-cosmos-key".ljust(32, b"0")).decode(),
+            "COSMOS_DATABASE": "ny-civic-sphere",
+            "COSMOS_CONTAINER": "dashboard",
+            "AZURE_FUNCTIONS_BASE_URL": base,
+            "AI_SUGGESTION_FUNCTION_KEY": "benchmark",
+            "AZURE_SEARCH_ENDPOINT": base,
+            "AZURE_SEARCH_KEY": "benchmark",
+            "AZURE_SEARCH_INDEX_NAME": "civic-docs",
+            "AZURE_OPENAI_ENDPOINT": base,
+            "AZURE_OPENAI_KEY": "benchmark",
+            "AZURE_OPENAI_DEPLOYMENT": "gpt-benchmark",
+            "NYC_CALENDAR_BASE_URL": f"{base}/calendar/discover",
+            "NYC_CALENDAR_KEY": "benchmark",
+            "NYC_CALENDAR_ALERTS_BASE_URL": f"{base}/public/api/GetCalendar",
+            "NYC_CALENDAR_ALERTS_KEY": "benchmark",
+        }
+
+    def _delay_and_fail(self, upstream: str) -> Optional[int]:
+        """Sleep for a sampled latency and return a status code when this call should fail."""
+        profile = self.profiles[upstream]
+        with self._rng_lock:
+            self.calls[upstream] += 1
+            delay_ms = profile.latency.sample_ms(self._rng)
+            failed = self._rng.random() < profile.failure_rate
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+        return profile.failure_status if failed else None
+
+    def cosmos_docs(self, container: str, headers: Mapping[str, str], body: bytes) -> Tuple[int, Any]:
+        """Answer a POST to a container's ``docs``: a query, a transactional batch, an upsert or a create."""
+        request = json.loads(body or b"null")
+        if _header_flag(headers, "x-ms-documentdb-isquery"):
+            if container == COSMOS_DASHBOARD_CONTAINER:
+                return 200, _cosmos_query()
+            return 200, _cosmos_documents(self._query(container, _partition(headers), request))
+        if _header_flag(headers, "x-ms-cosmos-is-batch-request"):
+            partition = _partition(headers)
+            with self._documents_lock:
+                results = [self._apply(container, partition, operation) for operation in request]
+                if any(status >= 400 for status, _ in results):
+                    # Atomic: a failed operation rolls the batch back, and the rest report 424 (failed dependency).
+                    return 207, [{"statusCode": status if status >= 400 else 424} for status, _ in results]
+            return 200, [{"statusCode": status, "resourceBody": document} for status, document in results]
+        operation = "Upsert" if _header_flag(headers, "x-ms-documentdb-is-upsert") else "Create"
+        with self._documents_lock:
+            status, document = self._apply(container, _partition(headers), {"operationType": operation, "resourceBody": request})
+        if status >= 400:
+            return status, {"code": "Conflict", "message": f"Entity with the specified id already exists: {request.get('id')}"}
+        return status, document
+
+    def _apply(self, container: str, partition: Any, operation: Mapping[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        # Called with the documents lock held.
+        documents = self.documents.setdefault(container, {})
+        document = dict(operation.get("resourceBody") or {})
+        key = (partition, str(document.get("id")))
+        if operation.get("operationType") == "Create" and key in documents:
+            return 409, {}
+        created = key not in documents
+        document.update({"_rid": "YmVuY2g=", "_ts": int(time.time()), "_etag": f'"{time.time_ns()}"'})
+        documents[key] = document
+        return (201 if created else 200), document
+
+    def _query(self, container: str, partition: Any, request: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        parameters = {parameter["name"]: parameter["value"] for parameter in request.get("parameters") or []}
+        with self._documents_lock:
+            rows = [
+                document for (key, _), document in self.documents.get(container, {}).items() if partition is None or key == partition
+            ]
+        if "@node" in parameters:
+            # The stored vote totals query: documents written by a node other than the caller.
+            rows = [row for row in rows if "node" in row and row["node"] != parameters["@node"]]
+        return rows
+
+    def _handler_class(self):
+        fakes = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this, Nagle holds the body for the delayed ACK.
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler signature
+                return None
+
+            def _read_body(self) -> bytes:
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _send(self, status: int, body: Any) -> None:
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _dispatch(self, routes: Tuple[Tuple[str, str, Callable[..., Any]], ...]) -> None:
+                parsed = urlparse(self.path)
+                body = self._read_body()
+                for upstream, pattern, handler in routes:
+                    match = re.fullmatch(pattern, parsed.path)
+                    if match is None:
+                        continue
+                    failure = fakes._delay_and_fail(upstream)
+                    if failure is not None:
+                        self._send(failure, {"error": {"code": "InjectedFailure", "message": f"fake {upstream} failure"}})
+                        return
+                    result = handler(match, parse_qs(parsed.query), body)
+                    # Handlers return a body, or a ``(status, body)`` pair when the call can fail.
+                    self._send(*(result if isinstance(result, tuple) else (200, result)))
+                    return
+                self._send(404, {"error": {"code": "NotFound", "message": parsed.path}})
+
+            def do_GET(self) -> None:
+                self._dispatch(
+                    (
+                        ("nyc_calendar", r"/calendar/discover/?", lambda m, q, b: fakes._events_body),
+                        (
+                            "nyc_calendar_alerts",
+                            r"/public/api/GetCalendar/?",
+                            lambda m, q, b: fixtures.nyc_calendar_days(q.get("fromdate", [""])[0], q.get("todate", [""])[0]),
+                        ),
+                        ("cosmos", r"/dbs/([^/]+)/colls/([^/]+)/?", lambda m, q, b: _cosmos_collection(m.group(2))),
+                        ("cosmos", r"/", lambda m, q, b: _cosmos_account(fakes.base_url)),
+                    )
+                )
+
+            def do_POST(self) -> None:
+                self._dispatch(
+                    (
+                        ("cosmos", r"/dbs/([^/]+)/colls/([^/]+)/docs/?", lambda m, q, b: fakes.cosmos_docs(m.group(2), self.headers, b)),
+                        ("azure_functions", r"/api/generate-dashboard-summary", lambda m, q, b: fixtures.dashboard_summary()),
+                        ("azure_search", r"/indexes\('?([^')]+)'?\)/docs/search\.post\.search", lambda m, q, b: _search(b)),
+                        (
+                            "azure_openai",
+                            r"/openai/deployments/([^/]+)/chat/completions",
+                            lambda m, q, b: fixtures.chat_completion(m.group(1), len(b)),
+                        ),
+                    )
+                )
+
+        return Handler
+
+
+def _cosmos_account(base_url: str) -> Dict[str, Any]:
+    location = [{"name": "local", "databaseAccountEndpoint": f"{base_url}/"}]
+    return {
+        "id": "benchmark",
+        "_rid": "benchmark",
+        "_self": "",
+        "writableLocations": location,
+        "readableLocations": location,
+        "enableMultipleWriteLocations": False,
+        "userConsistencyPolicy": {"defaultConsistencyLevel": "Session"},
+        "userReplicationPolicy": {},
+        "systemReplicationPolicy": {},
+        "readPolicy": {},
+        "queryEngineConfiguration": "{}",
+    }
+
+
+def _cosmos_collection(name: str) -> Dict[str, Any]:
+    path = COSMOS_PARTITION_PATHS.get(name, "/type")
+    return {"id": name, "_rid": "YmVuY2g=", "_self": f"colls/{name}/", "partitionKey": {"paths": [path], "kind": "Hash", "version": 2}}
+
+
+def _cosmos_query() -> Dict[str, Any]:
+    return _cosmos_documents([fixtures.dashboard_document()])
+
+
+def _cosmos_documents(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"_rid": "YmVuY2g=", "Documents": documents, "_count": len(documents)}
+
+
+def _header_flag(headers: Mapping[str, str], name: str) -> bool:
+    return str(headers.get(name, "")).lower() == "true"
+
+
+def _partition(headers: Mapping[str, str]) -> Any:
+    """The single partition key value sent as ``x-ms-documentdb-partitionkey: ["value"]``, or None."""
+    value = headers.get("x-ms-documentdb-partitionkey")
+    if not value:
+        return None
+    parsed = json.loads(value)
+    return parsed[0] if isinstance(parsed, list) and parsed else parsed
+
+
+def _search(body: bytes) -> Dict[str, Any]:
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError:
+        request = {}
+    return fixtures.search_documents(str(request.get("search", "")), int(request.get("top") or 5))
+
+
+def parse_profiles(latency_specs: Tuple[str, ...], failure_specs: Tuple[str, ...]) -> Dict[str, UpstreamProfile]:
+    """
+    Build per-upstream profiles from ``upstream=spec`` strings; ``*`` applies to every upstream.
+    """
+    profiles = {name: UpstreamProfile() for name in UPSTREAMS}
+    for spec in latency_specs:
+        name, _, value = spec.partition("=")
+        for upstream in (UPSTREAMS if name == "*" else (name,)):
+            profiles[_known(upstream)].latency = LatencyDistribution.parse(value)
+    for spec in failure_specs:
+        name, _, value = spec.partition("=")
+        for upstream in (UPSTREAMS if name == "*" else (name,)):
+            profiles[_known(upstream)].failure_rate = float(value)
+    return profiles
+
+
+def _known(upstream: str) -> str:
+    if upstream not in UPSTREAMS:
+        raise ValueError(f"Unknown upstream '{upstream}', expected one of {', '.join(UPSTREAMS)}")
+    return upstream
@@ -0,0 +1,101 @@
+"""
+Deterministic payloads served by the fake upstreams.
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from app.sample_data import STUB_DASHBOARD
+
+CATEGORIES = "Free,Parks & Recreation,General Events"
+VENUES = ["Civic Hall", "Harlem REC", "Prospect Park Bandshell", "Queens Library", "Staten Island Ferry Terminal"]
+ALERT_TYPES = ["Alternate Side Parking", "Collections", "Schools"]
+TOPICS = ["congestion pricing", "bike lanes", "rent stabilization", "composting", "school zoning", "park permits"]
+
+
+def dashboard_document() -> Dict[str, Any]:
+    """Cosmos query row shaped like ``SELECT TOP 1 c.payload``."""
+    return {"payload": STUB_DASHBOARD}
+
+
+def nyc_discover_items(count: int, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    start = datetime.now(tz=timezone.utc).replace(minute=0, second=0, microsecond=0)
+    items = []
+    for index in range(count):
+        begins = start + timedelta(hours=rng.randint(1, 24 * 14))
+        items.append(
+            {
+                "id": 100000 + index,
+                "name": f"Community Event {index}",
+                "location": rng.choice(VENUES),
+                "address": f"{rng.randint(1, 999)} Broadway, New York, NY",
+                "startDate": begins.isoformat(),
+                "endDate": (begins + timedelta(hours=rng.randint(1, 4))).isoformat(),
+                "categories": CATEGORIES,
+                "imageUrl": "https://placehold.co/320x200",
+                "desc": "<p>" + " ".join(rng.choice(TOPICS) for _ in range(40)) + "</p>",
+                "website": "https://www.nyc.gov/events",
+            }
+        )
+    return {"items": items}
+
+
+def nyc_calendar_days(fromdate: str, todate: str) -> Dict[str, Any]:
+    try:
+        first = date.fromisoformat(fromdate)
+        last = date.fromisoformat(todate)
+    except ValueError:
+        first = last = date.today()
+    days = []
+    current = first
+    while current <= last:
+        days.append(
+            {
+                "today_id": current.strftime("%Y%m%d"),
+                "items": [
+                    {"details": f"{kind} rules are in effect.", "status": "IN EFFECT", "type": kind}
+                    for kind in ALERT_TYPES
+                ],
+            }
+        )
+        current += timedelta(days=1)
+    return {"days": days}
+
+
+def search_documents(query: str, top: int, seed: int = 11) -> Dict[str, Any]:
+    rng = random.Random(f"{seed}:{query}")
+    value = []
+    for index in range(top):
+        topic = rng.choice(TOPICS)
+        value.append(
+            {
+                "@search.score": round(10.0 / (index + 1), 3),
+                "@search.rerankerScore": round(3.0 - index * 0.3, 3),
+                "sourcepage": f"{topic.replace(' ', '-')}-{index}.pdf",
+                "chunk": f"Guidance on {topic} for New York City residents. " * 20,
+            }
+        )
+    return {"value": value}
+
+
+def chat_completion(deployment: str, prompt_chars: int) -> Dict[str, Any]:
+    content = "Based on the NYC civic documents provided, here is a summary of the relevant policy. " * 6
+    return {
+        "id": "chatcmpl-benchmark",
+        "object": "chat.completion",
+        "created": 0,
+        "model": deployment,
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4, "total_tokens": 0},
+    }
+
+
+def dashboard_summary() -> Dict[str, Any]:
+    return {"summary": "Transit upgrades and housing affordability are the top issues today."}
+
+
+def search_queries() -> List[str]:
+    return [f"What is the city doing about {topic}?" for topic in TOPICS]
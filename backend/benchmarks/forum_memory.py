@@ -0,0 +1,123 @@
+"""
+Compare the memory held by forum posts as lists of ``ForumPost`` models against ``ColumnarPostStore``.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.forum_memory --threads 200 --posts-per-thread 250
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.repositories.forum import MOCK_USERS
+from app.repositories.post_store import ColumnarPostStore
+from app.schemas import ForumPost
+
+WORDS = (
+    "bike lane parking council budget housing rent transit school park safety noise hearing proposal community "
+    "neighborhood street traffic bus subway zoning tenants landlord library permit sidewalk tree"
+).split()
+
+
+def synthetic_posts(threads: int, posts_per_thread: int, seed: int = 7) -> List[Tuple[str, str, str, str, datetime, bool, Optional[str]]]:
+    """Plain tuples so both representations are built from identical, freshly allocated strings."""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for t in range(threads):
+        thread_id = f"thread-disc-{t}"
+        for p in range(posts_per_thread):
+            post_id = f"post-{thread_id}-{p + 1}"
+            parent = f"post-{thread_id}-{rng.randint(1, p)}" if p > 1 and rng.random() < 0.4 else None
+            content = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60)))
+            rows.append((post_id, thread_id, rng.choice(MOCK_USERS), content, base + timedelta(minutes=p), p % 9 == 0, parent))
+    return rows
+
+
+def build_models(rows) -> Dict[str, List[ForumPost]]:
+    threads: Dict[str, List[ForumPost]] = {}
+    for post_id, thread_id, author, content, created_at, is_ai, parent in rows:
+        threads.setdefault(thread_id, []).append(
+            ForumPost(
+                id=post_id,
+                # Copies mimic request parsing, where every post carries its own thread id and author strings.
+                thread_id="".join(thread_id),
+                author="".join(author),
+                content=content,
+                created_at=created_at,
+                is_ai_moderator=is_ai,
+                parent_post_id=parent,
+            )
+        )
+    return threads
+
+
+def build_store(rows) -> ColumnarPostStore:
+    store = ColumnarPostStore()
+    for row in rows:
+        store.append(*row)
+    return store
+
+
+def measure(build: Callable[[], object]) -> Tuple[int, float, object]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, elapsed, built
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=100)
+    parser.add_argument("--posts-per-thread", type=int, default=200)
+    parser.add_argument("--json", dest="json_path", help="Also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    total = args.threads * args.posts_per_thread
+    # Each representation gets its own freshly generated inputs so neither is charged for the other's strings.
+    models_bytes, models_seconds, models = measure(lambda: build_models(synthetic_posts(args.threads, args.posts_per_thread)))
+    store_bytes, store_seconds, store = measure(lambda: build_store(synthetic_posts(args.threads, args.posts_per_thread)))
+
+    sample_thread = f"thread-disc-{args.threads // 2}"
+    start = time.perf_counter()
+    materialized = store.posts(sample_thread)
+    materialize_ms = (time.perf_counter() - start) * 1000.0
+    assert [post.model_dump() for post in materialized] == [post.model_dump() for post in models[sample_thread]]
+
+    results = {
+        "posts": total,
+        "models_bytes": models_bytes,
+        "store_bytes": store_bytes,
+        "models_bytes_per_post": round(models_bytes / total, 1),
+        "store_bytes_per_post": round(store_bytes / total, 1),
+        "reduction": round(models_bytes / store_bytes, 2) if store_bytes else None,
+        "models_build_seconds": round(models_seconds, 3),
+        "store_build_seconds": round(store_seconds, 3),
+        "materialize_thread_ms": round(materialize_ms, 3),
+    }
+    print(f"{'':<24}{'ForumPost lists':>18}{'ColumnarPostStore':>20}")
+    print(f"{'bytes per post':<24}{results['models_bytes_per_post']:>18}{results['store_bytes_per_post']:>20}")
+    print(f"{'total MiB':<24}{models_bytes / 2**20:>18.1f}{store_bytes / 2**20:>20.1f}")
+    print(f"{'build seconds':<24}{models_seconds:>18.3f}{store_seconds:>20.3f}")
+    print(f"\n{total} posts, {results['reduction']}x smaller; materializing one {args.posts_per_thread}-post thread takes {materialize_ms:.2f} ms")
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump(results, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
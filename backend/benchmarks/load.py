@@ -0,0 +1,274 @@
+"""
+Closed-loop load driver that exercises every ``/api/*`` route and reports throughput and latency percentiles.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.load --duration 15 --concurrency 16 --latency "*=lognormal:30,0.5" --failure-rate nyc_calendar=0.05
+
+By default the fakes and a ``uvicorn app.asgi:app`` process wired to them are started automatically;
+pass ``--target http://host:port`` to drive an already running server instead.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from . import fixtures
+from .fakes import FakeUpstreams, parse_profiles
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+@dataclass(frozen=True)
+class RouteSpec:
+    name: str
+    method: str
+    path: str
+    json: Optional[Dict[str, Any]] = None
+    weight: int = 1
+    # A ``json`` field given a fresh value on every request, e.g. so each vote comes from a new voter.
+    unique_field: Optional[str] = None
+
+
+ROUTES: List[RouteSpec] = [
+    RouteSpec("health", "GET", "/api/health"),
+    RouteSpec("dashboard", "GET", "/api/dashboard", weight=4),
+    RouteSpec("dashboard.snapshot", "GET", "/api/dashboard/snapshot"),
+    RouteSpec("dashboard.stories", "GET", "/api/dashboard/stories"),
+    RouteSpec("dashboard.policies", "GET", "/api/dashboard/policies"),
+    RouteSpec("dashboard.discussions", "GET", "/api/dashboard/discussions"),
+    RouteSpec("dashboard.events", "GET", "/api/dashboard/events", weight=2),
+    RouteSpec("dashboard.elections", "GET", "/api/dashboard/elections"),
+    RouteSpec(
+        "dashboard.vote",
+        "POST",
+        "/api/dashboard/elections/elex-1/votes",
+        json={"voter_id": "load-driver"},
+        unique_field="voter_id",
+    ),
+    RouteSpec("dashboard.ai-summary", "POST", "/api/dashboard/ai-summary"),
+    RouteSpec("dashboard.service-alerts", "GET", "/api/dashboard/service-alerts"),
+    RouteSpec("chat", "POST", "/api/chat", json={"message": fixtures.search_queries()[0]}, weight=2),
+    RouteSpec("chat.batch", "POST", "/api/chat/batch", json={"questions": fixtures.search_queries()[:4]}),
+    RouteSpec("chat.debug", "GET", "/api/chat/debug?query=bike+lanes"),
+    RouteSpec("forum.threads", "GET", "/api/forum/threads", weight=2),
+    RouteSpec("forum.search", "GET", "/api/forum/search?q=bike+lane+parking"),
+    RouteSpec("forum.thread", "GET", "/api/forum/threads/thread-disc-1", weight=2),
+    RouteSpec(
+        "forum.create-post",
+        "POST",
+        "/api/forum/threads/thread-disc-1/posts",
+        json={"content": "Benchmark post about the bike lane proposal.", "author": "Load Driver"},
+    ),
+]
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_healthy(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+def start_app(env: Dict[str, str], workers: int = 1, server: str = "uvicorn") -> "tuple[subprocess.Popen, str]":
+    port = _free_port()
+    if server == "gunicorn":
+        command = [
+            sys.executable, "-m", "gunicorn", "app.asgi:app",
+            "--worker-class", "uvicorn.workers.UvicornWorker",
+            "--workers", str(workers),
+            "--bind", f"127.0.0.1:{port}",
+            "--log-level", "warning",
+        ]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.asgi:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+        if workers > 1:
+            command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **env})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_healthy(base_url)
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process, base_url
+
+
+def run_load(base_url: str, routes: List[RouteSpec], duration: float, concurrency: int, warmup: float = 2.0) -> Dict[str, RouteStats]:
+    schedule = [route for route in routes for _ in range(route.weight)]
+    cursor = itertools.count()
+    sequence = itertools.count()
+    run_id = f"{os.getpid()}-{time.time_ns()}"
+    stats: Dict[str, RouteStats] = {route.name: RouteStats() for route in routes}
+    lock = threading.Lock()
+    measure_from = time.monotonic() + warmup
+    deadline = measure_from + duration
+
+    def worker() -> None:
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    return
+                route = schedule[next(cursor) % len(schedule)]
+                body = route.json
+                if route.unique_field is not None:
+                    body = {**body, route.unique_field: f"{body[route.unique_field]}-{run_id}-{next(sequence)}"}
+                start = time.perf_counter()
+                try:
+                    response = client.request(route.method, route.path, json=body)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                if now < measure_from:
+                    continue
+                with lock:
+                    route_stats = stats[route.name]
+                    route_stats.latencies_ms.append(elapsed_ms)
+                    route_stats.statuses[status] = route_stats.statuses.get(status, 0) + 1
+                    if status == 0 or status >= 500:
+                        route_stats.errors += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def summarize(stats: Dict[str, RouteStats], duration: float) -> List[Dict[str, Any]]:
+    rows = []
+    for name, route_stats in stats.items():
+        latencies = sorted(route_stats.latencies_ms)
+        rows.append(
+            {
+                "route": name,
+                "requests": len(latencies),
+                "errors": route_stats.errors,
+                "rps": round(len(latencies) / duration, 2),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "statuses": route_stats.statuses,
+            }
+        )
+    total = sorted(latency for route_stats in stats.values() for latency in route_stats.latencies_ms)
+    rows.append(
+        {
+            "route": "TOTAL",
+            "requests": len(total),
+            "errors": sum(route_stats.errors for route_stats in stats.values()),
+            "rps": round(len(total) / duration, 2),
+            "p50_ms": round(percentile(total, 50), 2),
+            "p95_ms": round(percentile(total, 95), 2),
+            "p99_ms": round(percentile(total, 99), 2),
+            "statuses": {},
+        }
+    )
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    header = f"{'route':<28}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['route']:<28}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Base URL of an already running server; skips starting fakes and the app")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds of load (default: 10)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured warm-up seconds (default: 2)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent closed-loop clients (default: 8)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for the spawned app")
+    parser.add_argument("--server", choices=("uvicorn", "gunicorn"), default="uvicorn", help="How to launch the spawned app")
+    parser.add_argument("--cache-backend", choices=("local", "shared"), help="CACHE_BACKEND for the spawned app")
+    parser.add_argument("--routes", nargs="*", help="Only drive these route names")
+    parser.add_argument("--latency", action="append", default=[], metavar="UPSTREAM=SPEC", help="e.g. nyc_calendar=lognormal:80,0.6")
+    parser.add_argument("--failure-rate", action="append", default=[], metavar="UPSTREAM=RATE", help="e.g. azure_search=0.1")
+    parser.add_argument("--events", type=int, default=50, help="Events served by the fake NYC discover API")
+    parser.add_argument("--json", dest="json_path", help="Also write the summary as JSON to this path")
+    args = parser.parse_args(argv)
+
+    routes = [route for route in ROUTES if not args.routes or route.name in args.routes]
+    if not routes:
+        parser.error("No matching routes")
+
+    fakes: Optional[FakeUpstreams] = None
+    process: Optional[subprocess.Popen] = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            fakes = FakeUpstreams(parse_profiles(tuple(args.latency), tuple(args.failure_rate)), event_count=args.events).start()
+            env = fakes.env()
+            # Every simulated client shares one IP, so per-client rate limits would only measure the limiter.
+            env.setdefault("ADMISSION_CHAT_RATE_PER_MINUTE", "0")
+            env.setdefault("ADMISSION_AI_SUMMARY_RATE_PER_MINUTE", "0")
+            if args.cache_backend:
+                env["CACHE_BACKEND"] = args.cache_backend
+            process, base_url = start_app(env, workers=args.workers, server=args.server)
+        stats = run_load(base_url, routes, args.duration, args.concurrency, args.warmup)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if fakes is not None:
+            fakes.stop()
+
+    rows = summarize(stats, args.duration)
+    print_table(rows)
+    if fakes is not None:
+        print(f"\nupstream calls: {json.dumps(fakes.calls)}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({"routes": rows, "upstream_calls": fakes.calls if fakes else {}}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
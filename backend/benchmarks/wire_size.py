@@ -0,0 +1,129 @@
+"""
+Measure response body sizes per endpoint for full JSON, ``fields=`` projected JSON and MessagePack.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.wire_size --events 200 --repeat 20
+
+The fakes and a ``uvicorn app.asgi:app`` process wired to them are started automatically, as for
+``benchmarks.load``; pass ``--target http://host:port`` to measure an already running server instead.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from .fakes import FakeUpstreams, parse_profiles
+from .load import start_app
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+# (name, path, fields a card view needs); endpoints without a projection only compare wire formats.
+ENDPOINTS: List[Tuple[str, str, Optional[str]]] = [
+    ("dashboard", "/api/dashboard", None),
+    ("stories", "/api/dashboard/stories", "title,category,image_url"),
+    ("policies", "/api/dashboard/policies", "title,status,tags"),
+    ("discussions", "/api/dashboard/discussions", "topic,category,replies_count"),
+    ("events", "/api/dashboard/events", "name,venue,start_time,category"),
+    ("elections", "/api/dashboard/elections", "title,votes"),
+    ("forum_threads", "/api/forum/threads", "title,category,post_count,last_activity"),
+]
+
+
+def _measure(client: httpx.Client, path: str, accept: str, fields: Optional[str], repeat: int) -> Dict[str, Any]:
+    params = {"fields": fields} if fields else None
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path, params=params, headers={"Accept": accept, "Accept-Encoding": "identity"})
+        timings.append((time.perf_counter() - start) * 1000.0)
+        response.raise_for_status()
+        size = len(response.content)
+        if not response.headers.get("content-type", "").startswith(accept):
+            raise RuntimeError(f"{path} answered {response.headers.get('content-type')} for Accept: {accept}")
+    return {"bytes": size, "p50_ms": round(statistics.median(timings), 2)}
+
+
+def measure(base_url: str, repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        for name, path, fields in ENDPOINTS:
+            variants = {"json": _measure(client, path, JSON, None, repeat), "msgpack": _measure(client, path, MSGPACK, None, repeat)}
+            if fields:
+                variants["json_fields"] = _measure(client, path, JSON, fields, repeat)
+                variants["msgpack_fields"] = _measure(client, path, MSGPACK, fields, repeat)
+            full = variants["json"]["bytes"] or 1
+            rows.append(
+                {
+                    "endpoint": name,
+                    "fields": fields or "",
+                    **{f"{variant}_bytes": result["bytes"] for variant, result in variants.items()},
+                    **{f"{variant}_p50_ms": result["p50_ms"] for variant, result in variants.items()},
+                    **{
+                        f"{variant}_saved_pct": round(100.0 * (1 - result["bytes"] / full), 1)
+                        for variant, result in variants.items()
+                        if variant != "json"
+                    },
+                }
+            )
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    header = f"{'endpoint':<14} {'json':>9} {'msgpack':>9} {'fields':>9} {'both':>9} {'saved':>22}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        saved = f"{row['msgpack_saved_pct']:.0f}% / " + (
+            f"{row['json_fields_saved_pct']:.0f}% / {row['msgpack_fields_saved_pct']:.0f}%" if row["fields"] else "- / -"
+        )
+        print(
+            f"{row['endpoint']:<14} {row['json_bytes']:>9} {row['msgpack_bytes']:>9} "
+            f"{row.get('json_fields_bytes', '-'):>9} {row.get('msgpack_fields_bytes', '-'):>9} {saved:>22}"
+        )
+    print("\nsaved = msgpack / fields / fields + msgpack, relative to full JSON")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Base URL of an already running server; skips starting fakes and the app")
+    parser.add_argument("--events", type=int, default=200, help="Events served by the fake NYC discover API")
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per endpoint and variant (default: 20)")
+    parser.add_argument("--json", dest="json_path", help="Also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    fakes: Optional[FakeUpstreams] = None
+    process: Optional[subprocess.Popen] = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            fakes = FakeUpstreams(parse_profiles((), ()), event_count=args.events).start()
+            env = {**fakes.env(), "WARM_START_ENABLED": "false"}
+            process, base_url = start_app(env)
+        rows = measure(base_url, args.repeat)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if fakes is not None:
+            fakes.stop()
+
+    print_table(rows)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({"endpoints": rows}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
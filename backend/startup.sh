@@ -7,5 +7,24 @@ pip install -r requirements.txt
 # Start the application
 # Azure App Service provides PORT environment variable, default to 8000 if not set
 PORT=${PORT:-8000}
-uvicorn app.main:app --host 0.0.0.0 --port $PORT
+# WEB_CONCURRENCY > 1 switches to gunicorn managing several uvicorn workers on this host. Exported so the app
+# knows: live voting refuses votes it cannot deduplicate across workers.
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-1}
+# App Service terminates requests at its front end, so the peer address is the proxy's. Set FORWARDED_ALLOW_IPS to
+# the front end's addresses so X-Forwarded-For / X-Forwarded-Proto from them give request.client (and the
+# per-client rate limits) the caller's address. uvicorn and gunicorn read it from the environment; unset, only
+# 127.0.0.1 is trusted, so callers that reach the app directly cannot spoof their address. Use "*" only when
+# access restrictions make the front end the sole way in.
 
+if [ "$WEB_CONCURRENCY" -gt 1 ]; then
+    # Share expensive upstream results between workers unless a backend was chosen explicitly
+    export CACHE_BACKEND=${CACHE_BACKEND:-shared}
+    gunicorn app.asgi:app \
+        --worker-class uvicorn.workers.UvicornWorker \
+        --workers "$WEB_CONCURRENCY" \
+        --bind 0.0.0.0:$PORT \
+        --timeout ${GUNICORN_TIMEOUT:-120} \
+        --graceful-timeout ${GUNICORN_GRACEFUL_TIMEOUT:-30}
+else
+    uvicorn app.asgi:app --host 0.0.0.0 --port $PORT --proxy-headers
+fi
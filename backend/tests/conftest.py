@@ -0,0 +1,50 @@
+"""
+Shared fixtures.
+
+Client tests run against the local upstream stand-ins from ``benchmarks.fakes``, with short timeouts, a fresh
+resilience layer (breakers, budgets, limiters) per test and fault injection cleared afterwards.
+"""
+from __future__ import annotations
+
+import os
+from typing import Iterator
+
+import pytest
+
+# Set before any test imports ``app.main``, whose middleware and background stores are built at import time.
+os.environ.setdefault("WARM_START_ENABLED", "false")
+os.environ.setdefault("ADMISSION_CHAT_RATE_PER_MINUTE", "0")
+os.environ.setdefault("ADMISSION_AI_SUMMARY_RATE_PER_MINUTE", "0")
+
+from app.clients import resilience  # noqa: E402
+from app.clients.faults import FAULTS  # noqa: E402
+from app.config import get_settings  # noqa: E402
+from benchmarks.fakes import FakeUpstreams, parse_profiles  # noqa: E402
+
+FAST_UPSTREAM_ENV = {
+    "UPSTREAM_TIMEOUT_SECONDS": "0.3",
+    "OPENAI_TIMEOUT_SECONDS": "0.3",
+    "NYC_TIMEOUT_SECONDS": "0.3",
+    "NYC_DEADLINE_SECONDS": "0.6",
+    "UPSTREAM_RETRY_BASE_MS": "1",
+    "UPSTREAM_RETRY_MAX_MS": "5",
+}
+
+
+@pytest.fixture(scope="session")
+def fakes() -> Iterator[FakeUpstreams]:
+    with FakeUpstreams(parse_profiles((), ())) as server:
+        yield server
+
+
+@pytest.fixture
+def upstreams(fakes: FakeUpstreams, monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeUpstreams]:
+    """Every client configured against the fakes, with a clean resilience layer."""
+    for name, value in {**fakes.env(), **FAST_UPSTREAM_ENV}.items():
+        monkeypatch.setenv(name, value)
+    get_settings.cache_clear()
+    resilience._UPSTREAMS.clear()
+    yield fakes
+    FAULTS.configure({})
+    resilience._UPSTREAMS.clear()
+    get_settings.cache_clear()
@@ -0,0 +1,70 @@
+"""
+Admission control: per-client bursts and keys.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional
+
+from app.admission import AdmissionMiddleware, AdmissionPolicy, client_key, hash_api_key, policies_from_settings
+from app.config import Settings
+
+AI_SUMMARY = ("POST", "/api/dashboard/ai-summary")
+
+
+def _statuses(middleware: AdmissionMiddleware, clients: List[str], api_keys: Optional[List[str]] = None) -> List[int]:
+    statuses: List[int] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def run(client: str, api_key: Optional[str]) -> None:
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        headers = [(b"x-api-key", api_key.encode("ascii"))] if api_key else []
+        scope = {"type": "http", "method": AI_SUMMARY[0], "path": AI_SUMMARY[1], "headers": headers, "client": (client, 1234)}
+        await middleware(scope, receive, send)
+
+    async def main():
+        for client, api_key in zip(clients, api_keys or [None] * len(clients)):
+            await run(client, api_key)
+
+    asyncio.run(main())
+    return statuses
+
+
+async def _ok(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_a_low_rate_still_allows_a_burst_of_page_loads():
+    policies = policies_from_settings(Settings(admission_ai_summary_rate_per_minute=10.0))
+    middleware = AdmissionMiddleware(_ok, policies)
+    assert _statuses(middleware, ["198.51.100.1"] * 6) == [200] * 5 + [429]
+
+
+def test_each_client_address_has_its_own_bucket():
+    policy = AdmissionPolicy("ai_summary", (AI_SUMMARY,), max_concurrency=0, queue_size=0, rate_per_minute=6.0, min_burst=1.0)
+    middleware = AdmissionMiddleware(_ok, [policy])
+    assert _statuses(middleware, ["198.51.100.1", "198.51.100.1", "198.51.100.2"]) == [200, 429, 200]
+
+
+def test_client_key_prefers_a_configured_api_key_over_the_address():
+    scope = {"headers": [(b"x-api-key", b"secret")], "client": ("198.51.100.1", 1234)}
+    configured = frozenset({hash_api_key(b"secret")})
+    assert client_key(scope, api_keys=configured).startswith("key:")
+    assert "secret" not in client_key(scope, api_keys=configured)
+    assert client_key(scope) == "ip:198.51.100.1"
+    assert client_key({"headers": [], "client": ("198.51.100.1", 1234)}) == "ip:198.51.100.1"
+
+
+def test_rotating_unknown_api_keys_does_not_escape_the_address_limit():
+    policy = AdmissionPolicy("ai_summary", (AI_SUMMARY,), max_concurrency=0, queue_size=0, rate_per_minute=6.0, min_burst=2.0)
+    middleware = AdmissionMiddleware(_ok, [policy], api_keys=["partner-key"])
+    keys = [f"random-{index}" for index in range(4)]
+    assert _statuses(middleware, ["198.51.100.1"] * 4, keys) == [200, 200, 429, 429]
+    # A configured key has its own bucket.
+    assert _statuses(middleware, ["198.51.100.1"], ["partner-key"]) == [200]
@@ -0,0 +1,140 @@
+"""
+Cache tiers: expiry, the shared tier's cleanup of /dev/shm files, and single-flight computation across processes.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.cache import LocalCacheBackend, SharedMemoryCacheBackend
+
+pytest.importorskip("fcntl")
+
+
+def files(directory: Path) -> list:
+    return sorted(path.name for path in directory.iterdir())
+
+
+def test_local_entries_expire():
+    cache = LocalCacheBackend()
+    cache.set("k", {"v": 1}, ttl=60)
+    cache.set("gone", 1, ttl=-1)
+    assert cache.get("k") == {"v": 1}
+    assert cache.get("gone") is None
+
+
+def test_shared_entries_round_trip_between_instances(tmp_path):
+    SharedMemoryCacheBackend(str(tmp_path)).set("dashboard:v1", {"stories": [1, 2]}, ttl=60)
+    assert SharedMemoryCacheBackend(str(tmp_path)).get("dashboard:v1") == {"stories": [1, 2]}
+
+
+def test_reading_an_expired_shared_entry_deletes_its_file(tmp_path):
+    cache = SharedMemoryCacheBackend(str(tmp_path))
+    cache.set("k", 1, ttl=-1)
+    assert len(files(tmp_path)) == 1
+    assert cache.get("k") is None
+    assert files(tmp_path) == []
+
+
+def test_none_results_are_not_cached(tmp_path):
+    cache = SharedMemoryCacheBackend(str(tmp_path))
+    calls = []
+    assert cache.get_or_compute("k", lambda: calls.append(1), ttl=60) is None
+    assert cache.get_or_compute("k", lambda: calls.append(1) or "v", ttl=60) == "v"
+    assert cache.get_or_compute("k", lambda: calls.append(1) or "w", ttl=60) == "v"
+    assert len(calls) == 2
+
+
+def test_the_sweep_removes_expired_entries_idle_locks_and_stale_temp_files(tmp_path):
+    cache = SharedMemoryCacheBackend(str(tmp_path), sweep_interval=60.0)
+    cache.set("live", 1, ttl=60)
+    cache.set("expired", 1, ttl=-1)
+    cache.get_or_compute("computed", lambda: 1, ttl=60)
+    stale = tmp_path / ".tmp-crashed"
+    stale.write_bytes(b"")
+    os.utime(stale, (time.time() - 3600, time.time() - 3600))
+    fresh = tmp_path / ".tmp-writing"
+    fresh.write_bytes(b"")
+    assert any(name.endswith(".lock") for name in files(tmp_path))
+
+    assert cache.sweep() == 3
+    assert files(tmp_path) == sorted([cache._path("live").name, cache._path("computed").name, ".tmp-writing"])
+    assert cache.get("live") == 1
+
+
+def test_the_sweep_leaves_held_locks_alone(tmp_path):
+    cache = SharedMemoryCacheBackend(str(tmp_path))
+    with cache._compute_lock("busy"):
+        cache.sweep()
+        assert cache._path("busy").with_suffix(".lock").name in files(tmp_path)
+
+
+def test_set_sweeps_once_the_interval_has_passed(tmp_path):
+    cache = SharedMemoryCacheBackend(str(tmp_path), sweep_interval=0.0)
+    cache.set("expired", 1, ttl=-1)
+    cache.set("live", 1, ttl=60)
+    assert files(tmp_path) == [cache._path("live").name]
+
+
+def test_a_waiter_whose_lock_file_was_swept_locks_the_live_file(tmp_path, monkeypatch):
+    import fcntl
+
+    cache = SharedMemoryCacheBackend(str(tmp_path), lock_timeout=0.2)
+    lock_path = cache._path("k").with_suffix(".lock")
+    holder = SharedMemoryCacheBackend(str(tmp_path))._compute_lock("k")
+    real_flock = fcntl.flock
+    swept = []
+
+    def flock(fd: int, operation: int) -> None:
+        if not swept:
+            # Between the waiter opening the lock file and locking it, a sweep in another worker deletes it and a
+            # third worker creates a new one and takes it.
+            swept.append(True)
+            lock_path.unlink()
+            holder.__enter__()
+        real_flock(fd, operation)
+
+    monkeypatch.setattr(fcntl, "flock", flock)
+    waiter = cache._compute_lock("k")
+    try:
+        started = time.monotonic()
+        waiter.__enter__()
+        # It waited on the live file rather than taking the orphaned one straight away.
+        assert time.monotonic() - started >= 0.2
+        assert os.fstat(waiter._fd).st_ino == os.fstat(holder._fd).st_ino
+        waiter.__exit__(None, None, None)
+    finally:
+        holder.__exit__(None, None, None)
+
+
+def _compute_in_process(directory: str, counter: str, start: float) -> None:
+    cache = SharedMemoryCacheBackend(directory)
+
+    def compute() -> str:
+        with open(counter, "a") as handle:
+            handle.write("x")
+        time.sleep(0.3)
+        return "value"
+
+    time.sleep(max(0.0, start - time.time()))
+    assert cache.get_or_compute("shared:key", compute, ttl=60) == "value"
+
+
+def test_only_one_process_computes_a_missing_value(tmp_path):
+    directory = tmp_path / "cache"
+    counter = tmp_path / "computed"
+    context = multiprocessing.get_context("spawn")
+    start = time.time() + 1.5
+    processes = [
+        context.Process(target=_compute_in_process, args=(str(directory), str(counter), start)) for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    assert [process.exitcode for process in processes] == [0, 0, 0, 0]
+    assert counter.read_text() == "x"
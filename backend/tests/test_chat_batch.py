@@ -0,0 +1,164 @@
+"""
+Batch chat: deduplicated concurrent answers, per-item errors, NDJSON streaming, the 100-question cap and admission.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.admission import AdmissionMiddleware, policies_from_settings
+from app.clients.scheduler import BATCH, current_priority
+from app.config import Settings
+from app.schemas import ChatResponse
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def answered(monkeypatch) -> List[str]:
+    """Replace search + completion with a recorder; a question containing "fail" raises."""
+    messages: List[str] = []
+    lock = threading.Lock()
+
+    def answer(message, top, search_client, openai_client) -> ChatResponse:
+        with lock:
+            messages.append(message)
+        if "fail" in message:
+            raise TimeoutError("completion timed out")
+        return ChatResponse(response=f"{current_priority()}: {message}", sources=[])
+
+    monkeypatch.setattr(main, "_answer_question", answer)
+    return messages
+
+
+def test_identical_questions_are_answered_once_and_returned_in_order(client, answered):
+    questions = ["Where do I vote?", "When is trash pickup?", "  where do I VOTE? "]
+    response = client.post("/api/chat/batch", json={"questions": questions})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["unique_questions"] == 2
+    assert sorted(answered) == ["When is trash pickup?", "Where do I vote?"]
+    assert [item["index"] for item in body["results"]] == [0, 1, 2]
+    assert [item["message"] for item in body["results"]] == questions
+    # Duplicates share the first occurrence's answer, which ran as batch-priority upstream work.
+    assert body["results"][2]["response"] == body["results"][0]["response"] == f"{BATCH}: Where do I vote?"
+
+
+def test_a_failing_question_reports_an_error_without_failing_the_batch(client, answered):
+    body = client.post("/api/chat/batch", json={"questions": ["please fail", "Where do I vote?"]}).json()
+    failed, ok = body["results"]
+    assert failed["response"] is None
+    assert failed["error"] == "TimeoutError: completion timed out"
+    assert ok["error"] is None
+    assert ok["response"]
+
+
+def test_distinct_questions_run_concurrently(client, monkeypatch):
+    both_running = threading.Barrier(2, timeout=5.0)
+
+    def answer(message, top, search_client, openai_client) -> ChatResponse:
+        # Only passes when the other question is being answered at the same time.
+        both_running.wait()
+        return ChatResponse(response=message, sources=[])
+
+    monkeypatch.setattr(main, "_answer_question", answer)
+    body = client.post("/api/chat/batch", json={"questions": ["first", "second"]}).json()
+    assert [item["error"] for item in body["results"]] == [None, None]
+
+
+def test_streamed_items_arrive_as_ndjson_lines(client, answered):
+    questions = ["Where do I vote?", "please fail", "where do i vote?"]
+    response = client.post("/api/chat/batch", params={"stream": "true"}, json={"questions": questions})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(item["index"] for item in items) == [0, 1, 2]
+    # Both copies of a duplicate are written together, as soon as its one answer is ready.
+    positions = {item["index"]: position for position, item in enumerate(items)}
+    assert abs(positions[0] - positions[2]) == 1
+
+
+@pytest.mark.parametrize("count, status", [(0, 422), (1, 200), (100, 200), (101, 422)])
+def test_a_batch_holds_at_most_100_questions(client, answered, count, status):
+    response = client.post("/api/chat/batch", json={"questions": [f"Question {n}" for n in range(count)]})
+    assert response.status_code == status
+
+
+def test_the_fakes_answer_a_real_batch(upstreams, client):
+    body = client.post("/api/chat/batch", json={"questions": ["Where do I vote?", "Parking rules"], "top": 2}).json()
+    assert body["unique_questions"] == 2
+    for item in body["results"]:
+        assert item["error"] is None
+        assert item["response"] not in (main.NO_COMPLETION_RESPONSE, main.NO_RESULTS_RESPONSE)
+        assert item["sources"]
+
+
+def _admit(middleware: AdmissionMiddleware, paths: List[str], questions: int) -> List[int]:
+    statuses: List[int] = []
+    body = json.dumps({"questions": [f"Question {n}" for n in range(questions)]}).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body}
+
+    async def send(message) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    async def run() -> None:
+        for path in paths:
+            scope = {"type": "http", "method": "POST", "path": path, "headers": [], "client": ("198.51.100.7", 1234)}
+            await middleware(scope, receive, send)
+
+    asyncio.run(run())
+    return statuses
+
+
+async def _ok(scope, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_admission_counts_a_batch_as_one_chat_request():
+    settings = Settings(admission_chat_rate_per_minute=6.0, admission_min_burst=2.0)
+    middleware = AdmissionMiddleware(_ok, policies_from_settings(settings))
+    # However many questions it carries, a batch takes one token from the client's chat bucket, which it shares
+    # with single chat requests.
+    assert _admit(middleware, ["/api/chat/batch", "/api/chat/", "/api/chat/batch"], questions=100) == [200, 200, 429]
+
+
+def test_a_running_batch_holds_one_chat_concurrency_slot():
+    release = asyncio.Event()
+    statuses: List[int] = []
+
+    async def slow(scope, receive, send) -> None:
+        await release.wait()
+        await _ok(scope, receive, send)
+
+    async def run() -> None:
+        settings = Settings(admission_chat_concurrency=1, admission_chat_queue=0, admission_chat_rate_per_minute=0.0)
+        middleware = AdmissionMiddleware(slow, policies_from_settings(settings))
+
+        def request(path: str):
+            async def send(message) -> None:
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            scope = {"type": "http", "method": "POST", "path": path, "headers": [], "client": ("198.51.100.7", 1234)}
+            return middleware(scope, None, send)
+
+        batch = asyncio.create_task(request("/api/chat/batch"))
+        await asyncio.sleep(0)
+        await request("/api/chat")
+        release.set()
+        await batch
+
+    asyncio.run(run())
+    assert statuses == [503, 200]
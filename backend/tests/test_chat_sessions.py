@@ -0,0 +1,59 @@
+"""
+Chat sessions: server-issued ids, and sessions shared between workers through the shared cache tier.
+"""
+from __future__ import annotations
+
+from app.cache import SharedMemoryCacheBackend
+from app.repositories.chat_sessions import ChatSessionStore
+
+
+def test_sessions_continue_under_the_id_the_server_issued():
+    store = ChatSessionStore()
+    session = store.get_or_create(None)
+    store.record_turn(session, "Where do I vote?", "At your polling place.")
+    assert store.get_or_create(session.id) is session
+
+
+def test_unknown_ids_get_a_new_session_with_a_new_id():
+    store = ChatSessionStore()
+    chosen = "attacker-chosen-id"
+    session = store.get_or_create(chosen)
+    assert session.id != chosen
+    again = store.get_or_create(chosen)
+    assert again is not session
+    assert again.id != chosen
+
+
+def test_expired_sessions_are_replaced():
+    store = ChatSessionStore(ttl_seconds=0.0)
+    session = store.get_or_create(None)
+    assert store.get_or_create(session.id).id != session.id
+
+
+def test_a_session_continues_on_another_worker_through_the_shared_tier(tmp_path):
+    first = ChatSessionStore(max_turns=1, shared=SharedMemoryCacheBackend(str(tmp_path)))
+    second = ChatSessionStore(max_turns=1, shared=SharedMemoryCacheBackend(str(tmp_path)))
+    session = first.get_or_create(None)
+    first.record_turn(session, "Where do I vote?", "At your polling place. It opens at 6am.")
+    first.remember_results(session, "polling place", [{"title": "Poll sites"}])
+
+    resumed = second.get_or_create(session.id)
+    assert resumed.id == session.id
+    assert [(turn.question, turn.answer) for turn in resumed.turns] == [("Where do I vote?", "At your polling place. It opens at 6am.")]
+    assert second.cached_results(resumed, "polling place") == [{"title": "Poll sites"}]
+
+    # The turn recorded on the second worker is what the first one sees next, summary included.
+    second.record_turn(resumed, "And parking?", "Street parking only.")
+    latest = first.get_or_create(session.id)
+    assert [turn.question for turn in latest.turns] == ["And parking?"]
+    assert "Where do I vote?" in latest.summary
+
+
+def test_deleting_on_one_worker_ends_the_session_everywhere(tmp_path):
+    first = ChatSessionStore(shared=SharedMemoryCacheBackend(str(tmp_path)))
+    second = ChatSessionStore(shared=SharedMemoryCacheBackend(str(tmp_path)))
+    session = first.get_or_create(None)
+    assert second.get_or_create(session.id).id == session.id
+    assert first.delete(session.id)
+    assert second.get_or_create(session.id).id != session.id
+    assert not first.delete("never-issued")
@@ -0,0 +1,36 @@
+"""
+Debug endpoints: admin token required.
+"""
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+
+DEBUG_PATHS = ("/api/debug/traces", "/api/debug/startup", "/api/debug/upstreams")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    get_settings.cache_clear()
+    yield TestClient(app)
+    get_settings.cache_clear()
+
+
+@pytest.mark.parametrize("path", DEBUG_PATHS)
+def test_debug_endpoints_need_the_admin_token(client, path):
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get(path, headers={"X-Admin-Token": "secret"}).status_code == 200
+
+
+def test_debug_endpoints_are_off_without_a_configured_token(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    get_settings.cache_clear()
+    try:
+        assert TestClient(app).get("/api/debug/upstreams", headers={"X-Admin-Token": ""}).status_code == 403
+    finally:
+        get_settings.cache_clear()
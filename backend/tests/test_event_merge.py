@@ -0,0 +1,77 @@
+"""
+Event merge: id dedupe, overlapping duplicates, recurring series and idempotence.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.repositories.event_merge import merge_events, normalize_text
+
+NOW = datetime(2024, 6, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _event(event_id: str, start: str, end: str, name: str = "Summer Streets", venue: str = "Park Ave", **extra):
+    return {"id": event_id, "name": name, "venue": venue, "start_time": start, "end_time": end, **extra}
+
+
+def test_names_and_venues_match_regardless_of_case_accents_and_punctuation():
+    assert normalize_text("  Café - Concert!  ") == normalize_text("cafe concert")
+
+
+def test_the_same_id_from_two_sources_is_one_event_filled_from_both():
+    primary = [_event("evt-1", "2024-06-15T10:00:00Z", "2024-06-15T12:00:00Z", description="")]
+    secondary = [_event("evt-1", "2024-06-15T10:00:00Z", "2024-06-15T12:00:00Z", description="Car-free streets", address="Park Ave")]
+    merged = merge_events(primary, secondary, now=NOW)
+    assert len(merged) == 1
+    assert merged[0]["description"] == "Car-free streets"
+    assert merged[0]["address"] == "Park Ave"
+
+
+def test_overlapping_instances_under_different_ids_are_duplicates():
+    merged = merge_events(
+        [_event("nyc-1", "2024-06-15T10:00:00Z", "2024-06-15T12:00:00Z")],
+        [_event("cosmos-9", "2024-06-15T11:00:00Z", "2024-06-15T13:00:00Z", name="SUMMER STREETS", venue="park ave.")],
+        now=NOW,
+    )
+    assert [event["id"] for event in merged] == ["nyc-1"]
+    assert "occurrences" not in merged[0]
+
+
+def test_separate_instances_collapse_into_a_series_showing_the_next_one():
+    events = [
+        _event("evt-a", "2024-06-01T10:00:00Z", "2024-06-01T12:00:00Z"),
+        _event("evt-b", "2024-06-08T10:00:00Z", "2024-06-08T12:00:00Z"),
+        _event("evt-c", "2024-06-15T10:00:00Z", "2024-06-15T12:00:00Z"),
+        _event("other", "2024-06-15T10:00:00Z", "2024-06-15T12:00:00Z", name="Jazz Night"),
+    ]
+    merged = merge_events(events, now=NOW)
+    assert len(merged) == 2
+    series = merged[0]
+    assert series["start_time"] == "2024-06-15T10:00:00Z"
+    assert [occurrence["id"] for occurrence in series["occurrences"]] == ["evt-a", "evt-b", "evt-c"]
+    assert merged[1]["id"] == "other"
+
+
+def test_a_finished_series_shows_its_last_occurrence():
+    events = [
+        _event("evt-a", "2024-05-01T10:00:00Z", "2024-05-01T12:00:00Z"),
+        _event("evt-b", "2024-05-08T10:00:00Z", "2024-05-08T12:00:00Z"),
+    ]
+    assert merge_events(events, now=NOW)[0]["start_time"] == "2024-05-08T10:00:00Z"
+
+
+def test_merging_a_merged_list_again_changes_nothing():
+    events = [
+        _event("evt-a", "2024-06-01T10:00:00Z", "2024-06-01T12:00:00Z"),
+        _event("evt-b", "2024-06-08T10:00:00Z", "2024-06-08T12:00:00Z"),
+        _event("dup", "2024-06-08T11:00:00Z", "2024-06-08T11:30:00Z"),
+        {"id": "no-time", "name": "TBD"},
+    ]
+    merged = merge_events(events, now=NOW)
+    assert merge_events(merged, now=NOW) == merged
+    assert merge_events(merged, events, now=NOW) == merged
+
+
+def test_events_without_a_usable_time_are_kept_as_they_are():
+    events = [{"id": "tbd", "name": "Town hall", "start_time": "soon"}, {"name": "", "start_time": "2024-06-15T10:00:00Z"}]
+    assert merge_events(events, now=NOW) == events
@@ -0,0 +1,221 @@
+"""
+Fault injection: rule handling, and every client's fallback under every injected fault and resilience-layer error.
+"""
+from __future__ import annotations
+
+import json
+import random
+import time
+from typing import Any, Callable, Dict, Tuple
+
+import httpx
+import pytest
+
+from app.clients.azure_functions import AzureFunctionClient
+from app.clients.azure_openai import AzureOpenAIClient
+from app.clients.azure_search import AzureSearchClient
+from app.clients.cosmos import CosmosDashboardClient
+from app.clients.faults import FAULTS, FaultInjector, LatencyDistribution
+from app.clients.nyc_calendar import NYCCalendarClient
+from app.clients.nyc_calendar_alerts import NYCCalendarAlertsClient
+from app.clients.resilience import get_upstream
+from app.clients.scheduler import INTERACTIVE, PriorityLimiter
+from app.config import get_settings
+
+QUERY = "parking rules"
+
+
+def _search_fallback() -> Any:
+    return AzureSearchClient()._local_search(QUERY, 3)
+
+
+# upstream -> (the client call an endpoint makes, the value it serves when the upstream fails)
+CLIENTS: Dict[str, Tuple[Callable[[], Any], Callable[[], Any]]] = {
+    "cosmos": (lambda: CosmosDashboardClient().fetch_dashboard_payload(), lambda: None),
+    "nyc_calendar": (lambda: NYCCalendarClient().fetch_events(), lambda: None),
+    "nyc_calendar_alerts": (lambda: NYCCalendarAlertsClient().fetch_alerts("2024-01-01", "2024-01-07"), lambda: None),
+    "azure_functions": (lambda: AzureFunctionClient().invoke_ai_suggestions({"snapshot": {}, "stories": []}), lambda: None),
+    "azure_search": (lambda: AzureSearchClient().search(QUERY, 3), _search_fallback),
+    "azure_openai": (lambda: AzureOpenAIClient().generate_rag_response(QUERY, [{"title": "Doc", "content": "text"}]), lambda: None),
+}
+
+FAULT_RULES: Dict[str, Dict[str, Any]] = {
+    "latency_over_timeout": {"latency": "fixed:100000"},
+    "timeout": {"error_rate": 1.0, "error": "timeout"},
+    "connect": {"error_rate": 1.0, "error": "connect"},
+    "status_503": {"error_rate": 1.0, "error": "status", "status_code": 503},
+    "status_400": {"error_rate": 1.0, "error": "status", "status_code": 400},
+    "malformed": {"malformed_rate": 1.0},
+}
+
+
+@pytest.mark.parametrize("upstream", sorted(CLIENTS))
+def test_clients_answer_from_the_fakes_without_faults(upstreams, upstream):
+    call, fallback = CLIENTS[upstream]
+    result = call()
+    assert result
+    assert result != fallback()
+
+
+@pytest.mark.parametrize("fault", sorted(FAULT_RULES))
+@pytest.mark.parametrize("upstream", sorted(CLIENTS))
+def test_clients_fall_back_under_every_fault(upstreams, upstream, fault):
+    call, fallback = CLIENTS[upstream]
+    expected = fallback()
+    FAULTS.configure({upstream: FAULT_RULES[fault]}, seed=1)
+    started = time.monotonic()
+    assert call() == expected
+    # Injected latency is cut off at the attempt timeout instead of being slept in full.
+    assert time.monotonic() - started < 5.0
+
+
+@pytest.mark.parametrize("upstream", sorted(CLIENTS))
+def test_clients_fall_back_while_the_circuit_is_open(upstreams, upstream):
+    call, fallback = CLIENTS[upstream]
+    expected = fallback()
+    breaker = get_upstream(upstream).breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    calls = upstreams.calls[upstream]
+    assert call() == expected
+    if upstream != "cosmos":  # The Cosmos SDK reads account metadata when the client is built.
+        assert upstreams.calls[upstream] == calls
+
+
+@pytest.mark.parametrize("upstream", sorted(CLIENTS))
+def test_clients_fall_back_when_no_slot_frees_up(upstreams, upstream):
+    call, fallback = CLIENTS[upstream]
+    expected = fallback()
+    limiter = get_upstream(upstream).limiter = PriorityLimiter(upstream, 1, 0)
+    limiter.acquire(INTERACTIVE)
+    try:
+        assert call() == expected
+    finally:
+        limiter.release(INTERACTIVE)
+
+
+def test_partial_results_keep_the_leading_share(upstreams):
+    events = NYCCalendarClient().fetch_events()
+    FAULTS.configure({"nyc_calendar": {"partial_rate": 1.0, "partial_fraction": 0.2}})
+    partial = NYCCalendarClient().fetch_events()
+    assert partial == events[: int(len(events) * 0.2)]
+
+
+def test_partial_search_results_are_served_as_is(upstreams):
+    results = AzureSearchClient().search(QUERY, 4)
+    FAULTS.configure({"azure_search": {"partial_rate": 1.0, "partial_fraction": 0.5}})
+    assert AzureSearchClient().search(QUERY, 4) == results[: len(results) // 2]
+
+
+def test_injected_errors_are_the_http_clients_exception_types():
+    injector = FaultInjector()
+    never_called = lambda timeout: pytest.fail("the upstream should not be called")  # noqa: E731
+    expected = {
+        "timeout": httpx.TimeoutException,
+        "connect": httpx.ConnectError,
+        "status": httpx.HTTPStatusError,
+    }
+    for error, exc_type in expected.items():
+        injector.configure({"cosmos": {"error_rate": 1.0, "error": error}})
+        with pytest.raises(exc_type):
+            injector.wrap("cosmos", never_called)(1.0)
+
+    injector.configure({"cosmos": {"latency": "fixed:60000"}})
+    started = time.monotonic()
+    with pytest.raises(httpx.TimeoutException):
+        injector.wrap("cosmos", never_called)(0.05)
+    assert time.monotonic() - started < 1.0
+
+    injector.configure({"cosmos": {"malformed_rate": 1.0}})
+    with pytest.raises(json.JSONDecodeError):
+        injector.wrap("cosmos", lambda timeout: [])(1.0)
+
+
+def test_injected_latency_counts_against_the_attempt_timeout():
+    injector = FaultInjector()
+    timeouts = []
+    injector.configure({"cosmos": {"latency": "fixed:300"}})
+    injector.wrap("cosmos", timeouts.append)(1.0)
+    injector.configure({"cosmos": {"latency": "fixed:980"}})
+    injector.wrap("cosmos", timeouts.append)(1.0)
+    assert timeouts == [pytest.approx(0.7), 0.05]
+
+
+def test_upstreams_without_a_rule_get_their_attempt_back():
+    injector = FaultInjector()
+    injector.configure({"cosmos": {"error_rate": 1.0}})
+
+    def attempt(timeout: float) -> int:
+        return 1
+
+    assert injector.wrap("azure_search", attempt) is attempt
+
+
+def test_unknown_upstreams_and_latency_specs_are_rejected():
+    injector = FaultInjector()
+    with pytest.raises(ValueError, match="Unknown upstreams"):
+        injector.configure({"nope": {}})
+    with pytest.raises(ValueError):
+        injector.configure({"cosmos": {"latency": "weird:1"}})
+    with pytest.raises(ValueError):
+        injector.configure({"cosmos": {"latency": "uniform:5"}})
+
+
+def test_a_seed_makes_the_fault_sequence_repeatable():
+    def outcomes(seed: int):
+        injector = FaultInjector()
+        injector.configure({"cosmos": {"error_rate": 0.5}}, seed=seed)
+        wrapped = injector.wrap("cosmos", lambda timeout: "ok")
+        results = []
+        for _ in range(40):
+            try:
+                results.append(wrapped(1.0))
+            except httpx.HTTPStatusError:
+                results.append("error")
+        return results
+
+    assert outcomes(7) == outcomes(7)
+    assert "ok" in outcomes(7) and "error" in outcomes(7)
+
+
+def test_latency_distributions_sample_around_their_parameters():
+    rng = random.Random(3)
+    assert LatencyDistribution.parse("fixed:20").sample_ms(rng) == 20.0
+    samples = [LatencyDistribution.parse("uniform:5,50").sample_ms(rng) for _ in range(200)]
+    assert all(5.0 <= sample <= 50.0 for sample in samples)
+    samples = sorted(LatencyDistribution.parse("lognormal:40,0.6").sample_ms(rng) for _ in range(2001))
+    assert 30.0 < samples[1000] < 55.0
+
+
+def test_admin_faults_endpoint_keeps_ai_summary_on_its_fallback(upstreams, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    monkeypatch.setenv("FAULT_INJECTION_ENABLED", "true")
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    get_settings.cache_clear()
+    client = TestClient(app)
+    headers = {"X-Admin-Token": "secret"}
+    assert client.get("/api/admin/faults").status_code == 403
+    assert client.put("/api/admin/faults", json={"nope": {}}, headers=headers).status_code == 400
+
+    for rule in ({"error_rate": 1.0, "error": "timeout"}, {"latency": "fixed:100000"}):
+        response = client.put("/api/admin/faults", json={"azure_functions": rule}, headers=headers)
+        assert response.status_code == 200
+        summary = client.post("/api/dashboard/ai-summary")
+        assert summary.status_code == 200
+        assert summary.json()["status"] == "fallback"
+
+    assert client.put("/api/admin/faults", json={}, headers=headers).json() == {"faults": {}}
+
+
+def test_admin_faults_endpoint_is_off_unless_enabled(upstreams, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    get_settings.cache_clear()
+    response = TestClient(app).put("/api/admin/faults", json={}, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 404
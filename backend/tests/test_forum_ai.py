@@ -0,0 +1,170 @@
+"""
+Background forum AI: dirty-set summaries, moderator debounce and cooldown, and the bounded job queue.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from app.repositories.forum_ai import ForumAIPipeline, ThreadAIGenerator
+from app.schemas import ForumPost, ForumThread
+
+
+class FakeGenerator:
+    def __init__(self, uses_model: bool = True) -> None:
+        self.uses_model = uses_model
+        self.summaries: List[str] = []
+
+    def summarize(self, thread: ForumThread, posts: List[ForumPost]) -> str:
+        self.summaries.append(thread.id)
+        return f"summary of {len(posts)} posts"
+
+    def moderate(self, thread: ForumThread, posts: List[ForumPost]) -> Optional[str]:
+        return "What would help everyone decide?" if self.uses_model else None
+
+
+class FakeRepo:
+    def __init__(self) -> None:
+        now = datetime.now(tz=timezone.utc)
+        self.thread = ForumThread(
+            id="t1", topic_id="d1", title="Bike lanes", category="Transportation", summary="", created_at=now,
+            author="Sarah Chen", post_count=1, last_activity=now,
+        )
+        self.posts = [ForumPost(id="p1", thread_id="t1", author="Sarah Chen", content="Thoughts?", created_at=now)]
+        self.summaries: Dict[str, str] = {}
+        self.moderator_posts: List[Tuple[str, str]] = []
+        self.changed = threading.Event()
+
+    def thread_snapshot(self, thread_id: str):
+        return (self.thread, list(self.posts)) if thread_id == "t1" else None
+
+    def set_summary(self, thread_id: str, summary: str) -> None:
+        self.summaries[thread_id] = summary
+        self.changed.set()
+
+    def create_post(self, thread_id: str, content: str, author: str, is_ai_moderator: bool = False) -> None:
+        self.moderator_posts.append((thread_id, content))
+        self.changed.set()
+
+
+def pipeline(uses_model: bool = True, **options) -> ForumAIPipeline:
+    settings = dict(workers=1, batch_interval=60.0, moderator_debounce=10.0, moderator_cooldown=100.0, moderator_min_posts=2)
+    settings.update(options)
+    return ForumAIPipeline(FakeGenerator(uses_model), **settings)
+
+
+def test_a_burst_of_posts_costs_one_summary():
+    ai = pipeline()
+    for _ in range(5):
+        ai.thread_changed("t1")
+    jobs = ai._collect(time.monotonic())
+    assert jobs.count(("summary", "t1")) == 1
+    assert not ai._dirty
+
+
+def test_a_summary_in_flight_is_not_started_twice():
+    ai = pipeline()
+    ai.thread_changed("t1")
+    assert ("summary", "t1") in ai._collect(time.monotonic())
+    ai.thread_changed("t1")
+    assert ("summary", "t1") not in ai._collect(time.monotonic())
+    # Posts that arrived meanwhile leave the thread dirty for the next round.
+    assert "t1" in ai._dirty
+
+
+def test_the_moderator_waits_for_the_debounce_after_the_latest_post():
+    ai = pipeline()
+    ai.thread_changed("t1")
+    ai.thread_changed("t1")
+    due = ai._moderator_due["t1"]
+    assert ("moderate", "t1") not in ai._collect(due - 1.0)
+    ai._in_flight.clear()
+    # A new post pushes the deadline back.
+    ai.thread_changed("t1")
+    assert ai._moderator_due["t1"] > due
+    assert ("moderate", "t1") in ai._collect(ai._moderator_due["t1"])
+
+
+def test_the_moderator_needs_enough_new_posts():
+    ai = pipeline(moderator_min_posts=3)
+    ai.thread_changed("t1")
+    ai.thread_changed("t1")
+    assert ("moderate", "t1") not in ai._collect(ai._moderator_due["t1"])
+    assert "t1" not in ai._moderator_due
+
+
+def test_the_moderator_respects_the_cooldown():
+    ai = pipeline(moderator_min_posts=1)
+    ai.thread_changed("t1")
+    first = ai._moderator_due["t1"]
+    assert ("moderate", "t1") in ai._collect(first)
+    ai._in_flight.clear()
+    ai.thread_changed("t1")
+    assert ("moderate", "t1") not in ai._collect(ai._moderator_due["t1"])
+    # Deferred to the end of the cooldown rather than dropped.
+    assert ai._moderator_due["t1"] == pytest.approx(first + 100.0)
+    ai._in_flight.clear()
+    assert ("moderate", "t1") in ai._collect(first + 100.0)
+
+
+def test_a_moderator_post_resets_the_count():
+    ai = pipeline(moderator_min_posts=1)
+    ai.thread_changed("t1")
+    ai.thread_changed("t1", by_moderator=True)
+    assert "t1" not in ai._moderator_due
+    assert ai._posts_since_moderator["t1"] == 0
+
+
+def test_without_a_model_no_moderator_is_scheduled():
+    ai = pipeline(uses_model=False, moderator_min_posts=1)
+    ai.thread_changed("t1")
+    ai.thread_changed("t1")
+    assert not ai._moderator_due
+    assert ai._collect(time.monotonic() + 1000.0) == [("summary", "t1")]
+
+
+def test_seeded_threads_are_only_summarized_with_a_model():
+    with_model, without_model = pipeline(), pipeline(uses_model=False)
+    with_model.thread_seeded("t1")
+    without_model.thread_seeded("t1")
+    assert with_model._dirty == {"t1"}
+    assert not without_model._dirty
+
+
+def test_queued_and_running_jobs_are_bounded():
+    ai = pipeline(workers=1)
+    for index in range(5):
+        ai.thread_changed(f"t{index}")
+    jobs = ai._collect(time.monotonic())
+    assert len(jobs) == 2
+    assert len(ai._dirty) == 3
+    # Nothing more is handed out until a job finishes.
+    assert ai._collect(time.monotonic()) == []
+    ai._in_flight.discard(jobs[0])
+    assert len(ai._collect(time.monotonic())) == 1
+
+
+def test_the_generator_has_no_canned_moderator_fallback():
+    thread = FakeRepo().thread
+    assert ThreadAIGenerator(None).moderate(thread, []) is None
+    assert ThreadAIGenerator(None).summarize(thread, []) == "Discussion about bike lanes."
+
+
+def test_jobs_run_in_the_background():
+    repo = FakeRepo()
+    ai = pipeline(batch_interval=0.05, moderator_debounce=0.0, moderator_min_posts=1, moderator_cooldown=0.0)
+    ai.bind(repo)
+    try:
+        ai.thread_changed("t1")
+        deadline = time.monotonic() + 5.0
+        while (not repo.summaries or not repo.moderator_posts) and time.monotonic() < deadline:
+            repo.changed.wait(0.1)
+            repo.changed.clear()
+        assert repo.summaries == {"t1": "summary of 1 posts"}
+        assert repo.moderator_posts == [("t1", "What would help everyone decide?")]
+    finally:
+        ai.close()
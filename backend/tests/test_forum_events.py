@@ -0,0 +1,148 @@
+"""
+Live forum updates: event ids, Last-Event-ID replay and resync, slow subscribers and the SSE endpoints.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, List
+
+import pytest
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.forum_events import ForumEventHub
+
+TOPIC = "thread:t1"
+
+
+async def take(stream: AsyncIterator[str], count: int) -> List[str]:
+    return [await asyncio.wait_for(stream.__anext__(), 2.0) for _ in range(count)]
+
+
+def event_id(chunk: str) -> str:
+    return chunk.split("\n", 1)[0].removeprefix("id: ")
+
+
+def test_event_ids_differ_between_hubs():
+    first, second = ForumEventHub(), ForumEventHub()
+    assert first.epoch != second.epoch
+    first.publish("post", (TOPIC,), {})
+    second.publish("post", (TOPIC,), {})
+    assert first._history[0].id != second._history[0].id
+
+
+def test_a_known_last_event_id_replays_what_was_missed_on_the_topic():
+    async def main() -> None:
+        hub = ForumEventHub()
+        hub.publish("post", (TOPIC,), {"n": 1})
+        hub.publish("post", ("thread:other",), {"n": 2})
+        hub.publish("post", (TOPIC,), {"n": 3})
+        stream = hub.stream((TOPIC,), hub._history[0].id)
+        retry, replayed = await take(stream, 2)
+        assert retry == "retry: 3000\n\n"
+        assert replayed == hub._history[2].encode()
+        assert hub._history[2].id.startswith(f"{hub.epoch}-")
+        await stream.aclose()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("last_event_id", ["1", "not-an-id", "deadbeef-1"])
+def test_an_unknown_last_event_id_gets_a_resync_and_then_live_events(last_event_id):
+    async def main() -> None:
+        hub = ForumEventHub()
+        hub.publish("post", (TOPIC,), {"n": 1})
+        stream = hub.stream((TOPIC,), last_event_id)
+        _, resync = await take(stream, 2)
+        assert "event: resync" in resync
+        # Reconnecting from the resync's id is a clean resume.
+        assert event_id(resync) == hub._history[-1].id
+        hub.publish("post", (TOPIC,), {"n": 2})
+        (live,) = await take(stream, 1)
+        assert live == hub._history[-1].encode()
+        await stream.aclose()
+
+    asyncio.run(main())
+
+
+def test_an_id_from_a_previous_boot_is_unknown():
+    async def main() -> None:
+        before = ForumEventHub()
+        before.publish("post", (TOPIC,), {})
+        after = ForumEventHub()
+        after.publish("post", (TOPIC,), {})
+        stream = after.stream((TOPIC,), before._history[0].id)
+        _, resync = await take(stream, 2)
+        assert "event: resync" in resync
+        await stream.aclose()
+
+    asyncio.run(main())
+
+
+def test_a_gap_older_than_the_history_gets_a_resync():
+    async def main() -> None:
+        hub = ForumEventHub(history=2)
+        for n in range(4):
+            hub.publish("post", (TOPIC,), {"n": n})
+        stream = hub.stream((TOPIC,), f"{hub.epoch}-1")
+        _, resync = await take(stream, 2)
+        assert "event: resync" in resync
+        assert event_id(resync) == f"{hub.epoch}-4"
+        await stream.aclose()
+
+    asyncio.run(main())
+
+
+def test_a_subscriber_that_falls_behind_is_resynced_and_closed():
+    async def main() -> None:
+        hub = ForumEventHub(queue_size=1)
+        stream = hub.stream((TOPIC,))
+        await take(stream, 1)
+        for n in range(3):
+            hub.publish("post", (TOPIC,), {"n": n})
+        # Deliveries are scheduled on the loop; let them run.
+        await asyncio.sleep(0.05)
+        chunks = [chunk async for chunk in stream]
+        assert "event: resync" in chunks[-1]
+        assert hub._count == 0
+
+    asyncio.run(main())
+
+
+def test_the_subscriber_limit_is_enforced():
+    async def main() -> None:
+        hub = ForumEventHub(max_subscribers=1)
+        first = hub.stream((TOPIC,))
+        await take(first, 1)
+        assert hub.full()
+        second = [chunk async for chunk in hub.stream((TOPIC,))]
+        assert second == ["event: resync\ndata: {}\n\n"]
+        await first.aclose()
+        assert not hub.full()
+
+    asyncio.run(main())
+
+
+def test_the_thread_stream_endpoint_resyncs_and_streams_new_posts():
+    from app.main import get_forum_repo, stream_thread
+
+    async def main() -> None:
+        repo = get_forum_repo()
+        threads = await run_in_threadpool(repo.fetch_forum_threads)
+        thread_id = threads.threads[0].id
+        with pytest.raises(HTTPException) as missing:
+            await stream_thread("thread-missing", None)
+        assert missing.value.status_code == 404
+
+        response = await stream_thread(thread_id, "0-0")
+        assert response.media_type == "text/event-stream"
+        body = response.body_iterator
+        _, resync = await take(body, 2)
+        assert "event: resync" in resync
+        post = await run_in_threadpool(repo.create_post, thread_id, "Streamed")
+        post_event, thread_event = await take(body, 2)
+        assert "event: post" in post_event and post.id in post_event
+        assert "event: thread" in thread_event
+        await body.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Forum search: BM25 ranking, incremental updates, highlighted snippets and the search endpoint.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from app.schemas import ForumPost, ForumThread
+from app.search.bm25 import BM25Index, tokenize
+from app.search.forum_index import ForumSearchIndex, highlight
+
+NOW = datetime(2026, 5, 1, tzinfo=timezone.utc)
+
+
+def thread(thread_id: str, title: str, summary: str = "") -> ForumThread:
+    return ForumThread(
+        id=thread_id, topic_id="d1", title=title, category="Transportation", summary=summary, created_at=NOW,
+        author="Sarah Chen", post_count=0, last_activity=NOW,
+    )
+
+
+def post(post_id: str, thread_id: str, content: str) -> ForumPost:
+    return ForumPost(id=post_id, thread_id=thread_id, author="Marcus Johnson", content=content, created_at=NOW)
+
+
+def ranked(index: BM25Index, query: str) -> list:
+    return [doc_id for doc_id, _ in index.search(tokenize(query))]
+
+
+def test_tokens_are_lowercase_without_stopwords():
+    assert tokenize("Where are the NEW bike-lanes on 5th Ave?") == ["new", "bike", "lanes", "5th", "ave"]
+
+
+def test_more_occurrences_and_rarer_terms_rank_higher():
+    index = BM25Index()
+    index.add("once", tokenize("bike lanes downtown and some other words here"))
+    index.add("twice", tokenize("bike lanes bike lanes downtown and other words"))
+    index.add("none", tokenize("library hours downtown"))
+    assert ranked(index, "bike") == ["twice", "once"]
+
+    index.add("common", tokenize("downtown downtown plaza"))
+    index.add("rare", tokenize("branch library plaza"))
+    # "downtown" is in most documents, so two mentions of it are worth less than one of the rarer "branch".
+    assert ranked(index, "downtown branch")[0] == "rare"
+
+
+def test_shorter_documents_win_at_equal_term_frequency():
+    index = BM25Index()
+    index.add("short", tokenize("composting program"))
+    index.add("long", tokenize("composting program details schedule locations pickup days bins neighborhoods"))
+    assert ranked(index, "composting") == ["short", "long"]
+
+
+def test_documents_can_be_replaced_and_removed():
+    index = BM25Index()
+    index.add("doc", tokenize("bike lanes"))
+    index.add("doc", tokenize("library hours"))
+    assert len(index) == 1
+    assert ranked(index, "bike") == []
+    assert ranked(index, "library") == ["doc"]
+    index.remove("doc")
+    index.remove("never-added")
+    assert len(index) == 0
+    assert index.search(tokenize("library")) == []
+
+
+def test_a_limit_keeps_the_best_scores():
+    index = BM25Index()
+    for count in range(1, 6):
+        index.add(f"doc-{count}", ["park"] * count + ["filler"] * (6 - count))
+    assert [doc_id for doc_id, _ in index.search(["park"], limit=2)] == ["doc-5", "doc-4"]
+
+
+def test_title_matches_outrank_passing_mentions_in_posts():
+    index = ForumSearchIndex()
+    index.index_thread(thread("t1", "Protected bike lanes on Broadway"))
+    index.index_thread(thread("t2", "Library hours"))
+    index.index_post(post("p1", "t2", "I usually bike to the library, but the hours changed again this week."))
+    results = index.search("bike")
+    assert [(hit.kind, hit.thread_id) for hit in results.hits] == [("thread", "t1"), ("post", "t2")]
+    assert results.hits[1].thread_title == "Library hours"
+    assert results.hits[1].post_id == "p1"
+
+
+def test_results_are_paginated_with_the_full_total():
+    index = ForumSearchIndex()
+    index.index_thread(thread("t1", "Parks"))
+    for number in range(5):
+        index.index_post(post(f"p{number}", "t1", f"Park cleanup number {number}"))
+    second = index.search("park", page=2, page_size=2)
+    assert second.total == 5
+    assert len(second.hits) == 2
+    assert {hit.post_id for hit in second.hits}.isdisjoint({hit.post_id for hit in index.search("park", 1, 2).hits})
+
+
+def test_removed_posts_stop_matching():
+    index = ForumSearchIndex()
+    index.index_post(post("p1", "t1", "Snow removal on side streets"))
+    index.remove_post("p1")
+    assert index.search("snow").total == 0
+
+
+def test_snippets_escape_html_and_mark_every_match():
+    assert highlight("Bike <lanes> & more bike", {"bike"}) == "<mark>Bike</mark> &lt;lanes&gt; &amp; more <mark>bike</mark>"
+
+
+def test_long_snippets_are_cut_around_the_first_match():
+    text = "Intro sentence. " * 20 + "The crosswalk at Main Street needs a signal." + " Trailing words." * 20
+    snippet = highlight(text, {"crosswalk"}, max_chars=80)
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<mark>crosswalk</mark>" in snippet
+    assert len(snippet.replace("<mark>", "").replace("</mark>", "")) == 82
+
+
+def test_the_search_endpoint_finds_a_new_post():
+    from app.main import app, get_forum_repo
+
+    repo = get_forum_repo()
+    thread_id = repo.fetch_forum_threads().threads[0].id
+    created = repo.create_post(thread_id, "Has anyone tried the zucchinifest booth schedule?")
+    client = TestClient(app)
+    response = client.get("/api/forum/search", params={"q": "zucchinifest"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    assert body["hits"][0]["post_id"] == created.id
+    assert "<mark>zucchinifest</mark>" in body["hits"][0]["snippet"]
+    assert client.get("/api/forum/search", params={"q": ""}).status_code == 422
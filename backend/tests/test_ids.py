@@ -0,0 +1,104 @@
+"""
+Write identifiers and idempotency records.
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.repositories.ids import IdAllocator, IdempotencyConflictError, IdempotencyStore
+
+
+def test_ids_sort_in_creation_order_and_are_unique():
+    allocator = IdAllocator("post")
+    ids = [allocator.new_id() for _ in range(5000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(identifier.startswith("post-") and len(identifier) == len(ids[0]) for identifier in ids)
+
+
+def test_ids_stay_increasing_when_the_clock_steps_back(monkeypatch):
+    allocator = IdAllocator("post")
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    first = allocator.new_id()
+    now[0] -= 5.0
+    second = allocator.new_id()
+    assert second > first
+    assert IdAllocator.timestamp_ms(second) == IdAllocator.timestamp_ms(first)
+
+
+def test_an_exhausted_sequence_borrows_the_next_millisecond(monkeypatch):
+    allocator = IdAllocator("post")
+    monkeypatch.setattr(time, "time", lambda: 1_700_000_000.0)
+    ids = [allocator.new_id() for _ in range(65537)]
+    assert IdAllocator.timestamp_ms(ids[-1]) == 1_700_000_000_001
+    assert ids[-2] < ids[-1]
+
+
+def test_allocators_on_different_nodes_never_collide_in_the_same_millisecond(monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: 1_700_000_000.0)
+    first, second = IdAllocator("post", node_id=1), IdAllocator("post", node_id=2)
+    assert first.new_id() != second.new_id()
+
+
+def test_the_embedded_timestamp_is_the_creation_time():
+    before = int(time.time() * 1000)
+    identifier = IdAllocator("thread").new_id()
+    assert before <= IdAllocator.timestamp_ms(identifier) <= int(time.time() * 1000)
+
+
+def test_concurrent_allocation_is_unique():
+    allocator = IdAllocator("post")
+    ids = []
+    lock = threading.Lock()
+
+    def allocate() -> None:
+        batch = [allocator.new_id() for _ in range(1000)]
+        with lock:
+            ids.extend(batch)
+
+    threads = [threading.Thread(target=allocate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == 8000
+
+
+def test_idempotency_keys_map_to_the_resource_they_created():
+    store = IdempotencyStore()
+    fingerprint = IdempotencyStore.fingerprint("thread-1", "Hello", None)
+    assert store.lookup("key-1", fingerprint) is None
+    store.record("key-1", fingerprint, "post-1")
+    assert store.lookup("key-1", fingerprint) == "post-1"
+    with pytest.raises(IdempotencyConflictError):
+        store.lookup("key-1", IdempotencyStore.fingerprint("thread-1", "Different", None))
+
+
+def test_idempotency_records_expire_and_are_bounded():
+    store = IdempotencyStore(ttl_seconds=0.0)
+    store.record("key-1", "fp", "post-1")
+    assert store.lookup("key-1", "fp") is None
+
+    store = IdempotencyStore(max_keys=2)
+    for index in range(3):
+        store.record(f"key-{index}", "fp", f"post-{index}")
+    assert store.lookup("key-0", "fp") is None
+    assert store.lookup("key-2", "fp") == "post-2"
+
+
+def test_recording_a_key_again_moves_it_behind_older_keys(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    store = IdempotencyStore(ttl_seconds=10.0)
+    store.record("key-a", "fp", "post-a")
+    now[0] = 1.0
+    store.record("key-b", "fp", "post-b")
+    now[0] = 5.0
+    store.record("key-a", "fp", "post-a")
+    now[0] = 11.5
+    assert store.lookup("key-b", "fp") is None
+    assert store.lookup("key-a", "fp") == "post-a"
@@ -0,0 +1,125 @@
+"""
+Offline chat retrieval: building and reading the memory-mapped index, reciprocal-rank fusion, and the Azure Search
+fallback to it.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.clients.azure_search import AzureSearchClient
+from app.clients.faults import FAULTS
+from app.config import get_settings
+from app.search.ingest import chunk_document, main as ingest
+from app.search.local_retrieval import RRF_K, LocalRetriever, build_index, get_local_retriever
+
+CHUNKS = [
+    {"title": "Alternate side parking", "source": "parking.md", "text": "Alternate side parking rules are suspended on holidays. Check street cleaning signs before you park."},
+    {"title": "Rent stabilization", "source": "housing.md", "text": "Rent stabilization limits yearly increases for many apartments. Tenants can request a lease renewal."},
+    {"title": "Composting", "source": "sanitation.md", "text": "Curbside composting collects food scraps and yard waste every week in every borough."},
+    {"title": "Library cards", "source": "libraries.html", "text": "Any resident can get a free library card at a branch with proof of address."},
+]
+
+
+@pytest.fixture
+def retriever(tmp_path: Path) -> LocalRetriever:
+    build_index(CHUNKS, tmp_path, dim=256)
+    return LocalRetriever(tmp_path)
+
+
+def test_the_matching_chunk_comes_first_shaped_like_a_search_result(retriever):
+    results = retriever.search("rent stabilization lease", top=2)
+    assert results[0] == {
+        "title": "Rent stabilization",
+        "sourcefile": "housing.md",
+        "content": CHUNKS[1]["text"],
+        "score": results[0]["score"],
+        "retrieval": "local",
+    }
+    assert len(results) <= 2
+
+
+def test_a_chunk_ranked_first_by_both_retrievers_gets_both_rrf_shares(retriever):
+    (best,) = retriever.search("composting food scraps", top=1)
+    assert best["title"] == "Composting"
+    assert best["score"] == round(2.0 / (RRF_K + 1), 6)
+
+
+def test_fusion_prefers_agreement_and_ignores_chunks_a_retriever_did_not_match(retriever, monkeypatch):
+    # Dense ranks chunk 0 then 1; BM25 ranks chunk 2 then 1. Chunk 1 is second in both lists and wins.
+    monkeypatch.setattr(retriever, "dense_scores", lambda tokens: np.array([0.9, 0.5, 0.0, 0.0], dtype=np.float32))
+    monkeypatch.setattr(retriever, "bm25_scores", lambda tokens: np.array([0.0, 0.5, 0.9, 0.0], dtype=np.float32))
+    results = retriever.search("anything", top=4)
+    assert [result["title"] for result in results] == ["Rent stabilization", "Alternate side parking", "Composting"]
+    assert results[0]["score"] == round(2.0 / (RRF_K + 2), 6)
+
+
+def test_bm25_scores_only_chunks_with_a_query_term(retriever):
+    scores = retriever.bm25_scores(["library", "unknownterm"])
+    assert scores.argmax() == 3
+    assert np.count_nonzero(scores) == 1
+
+
+def test_queries_without_terms_and_empty_indexes_return_nothing(retriever, tmp_path):
+    assert retriever.search("the and of") == []
+    empty = tmp_path / "empty"
+    build_index([], empty, dim=64)
+    assert LocalRetriever(empty).search("parking") == []
+
+
+def test_an_index_from_another_format_version_is_rejected(tmp_path):
+    build_index(CHUNKS, tmp_path, dim=64)
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    (tmp_path / "manifest.json").write_text(json.dumps({**manifest, "version": 99}))
+    with pytest.raises(ValueError):
+        LocalRetriever(tmp_path)
+
+
+def test_chunks_overlap_their_neighbours():
+    document = {"title": "T", "source": "s", "text": " ".join(str(number) for number in range(10))}
+    chunks = [chunk["text"].split() for chunk in chunk_document(document, chunk_size=4, overlap=1)]
+    assert chunks == [["0", "1", "2", "3"], ["3", "4", "5", "6"], ["6", "7", "8", "9"]]
+
+
+def test_the_ingest_command_builds_an_index_the_retriever_reads(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "parking.md").write_text("# Parking rules\n\nMeters are free on Sundays.", encoding="utf-8")
+    (docs / "ignored.bin").write_bytes(b"\0")
+    out = tmp_path / "index"
+    assert ingest([str(docs), "--out", str(out), "--dim", "64"]) == 0
+    (result,) = LocalRetriever(out).search("meters sundays")
+    assert (result["title"], result["sourcefile"]) == ("Parking rules", "parking.md")
+    assert ingest([str(tmp_path / "missing"), "--out", str(out)]) == 1
+
+
+@pytest.fixture
+def local_index(tmp_path, monkeypatch):
+    build_index(CHUNKS, tmp_path, dim=256)
+    monkeypatch.setenv("LOCAL_RETRIEVAL_DIR", str(tmp_path))
+    get_settings.cache_clear()
+    get_local_retriever.cache_clear()
+    yield
+    get_settings.cache_clear()
+    get_local_retriever.cache_clear()
+
+
+def test_a_missing_index_turns_local_retrieval_off(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCAL_RETRIEVAL_DIR", str(tmp_path / "absent"))
+    get_settings.cache_clear()
+    get_local_retriever.cache_clear()
+    try:
+        assert get_local_retriever() is None
+    finally:
+        get_settings.cache_clear()
+        get_local_retriever.cache_clear()
+
+
+def test_azure_search_failures_are_answered_from_the_local_index(upstreams, local_index):
+    FAULTS.configure({"azure_search": {"error_rate": 1.0, "error": "connect"}})
+    results = AzureSearchClient().search("alternate side parking holidays", 3)
+    assert results[0]["title"] == "Alternate side parking"
+    assert {result["retrieval"] for result in results} == {"local"}
@@ -0,0 +1,118 @@
+"""
+Metrics registry: Prometheus text rendering, label validation and per-route request metrics.
+"""
+from __future__ import annotations
+
+import functools
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.metrics import (
+    HTTP_REQUESTS,
+    LRU_CACHE_REQUESTS,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    register_lru_cache,
+)
+
+
+def test_counter_renders_help_type_and_one_line_per_label_set():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs run.", ("kind",))
+    counter.inc(kind="a")
+    counter.inc(2.5, kind="b")
+    counter.inc(kind="a")
+    assert registry.render().splitlines() == [
+        "# HELP jobs_total Jobs run.",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="a"} 2',
+        'jobs_total{kind="b"} 2.5',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter("escaped_total", "Escaping.", ("path",))
+    counter.inc(path='a"b\\c\nd')
+    assert counter.collect() == ['escaped_total{path="a\\"b\\\\c\\nd"} 1']
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/x")
+    assert histogram.collect() == [
+        'latency_seconds_bucket{route="/x",le="0.1"} 2',
+        'latency_seconds_bucket{route="/x",le="1"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 3.65',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+    assert histogram.count(route="/x") == 4
+
+
+@pytest.mark.parametrize("labels", [{}, {"kind": "a", "extra": "b"}, {"other": "a"}])
+def test_wrong_label_names_are_rejected(labels):
+    counter = Counter("checked_total", "Checked.", ("kind",))
+    with pytest.raises(ValueError):
+        counter.inc(**labels)
+
+
+def test_registering_a_name_twice_returns_the_first_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("shared_total", "First.")
+    assert registry.counter("shared_total", "Second.") is first
+
+
+def test_lru_cache_lookups_are_exported_as_a_counter():
+    @functools.lru_cache
+    def square(value: int) -> int:
+        return value * value
+
+    register_lru_cache("test_square", square)
+    square(2)
+    square(2)
+    square(3)
+    lines = LRU_CACHE_REQUESTS.render()
+    assert "# TYPE lru_cache_requests_total counter" in lines
+    assert 'lru_cache_requests_total{cache="test_square",result="hit"} 1' in lines
+    assert 'lru_cache_requests_total{cache="test_square",result="miss"} 2' in lines
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: str) -> dict:
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def test_requests_are_labelled_by_route_template_not_path():
+    client = TestClient(_app())
+    before = HTTP_REQUESTS.value(method="GET", route="/items/{item_id}", status="200")
+    client.get("/items/1")
+    client.get("/items/2")
+    assert HTTP_REQUESTS.value(method="GET", route="/items/{item_id}", status="200") == before + 2
+    assert not any("/items/1" in key for key in HTTP_REQUESTS.snapshot())
+
+
+def test_unmatched_requests_share_one_label():
+    client = TestClient(_app())
+    before = HTTP_REQUESTS.value(method="GET", route="unmatched", status="404")
+    client.get("/nothing/here")
+    client.get("/or/here")
+    assert HTTP_REQUESTS.value(method="GET", route="unmatched", status="404") == before + 2
+
+
+def test_mounted_routes_include_the_mount_prefix():
+    from app.main import app
+
+    before = HTTP_REQUESTS.value(method="GET", route="/api/health", status="200")
+    TestClient(app).get("/api/health")
+    assert HTTP_REQUESTS.value(method="GET", route="/api/health", status="200") == before + 1
@@ -0,0 +1,104 @@
+"""
+Columnar post store: lossless round trips, per-thread scans, parents, interning and reads during writes.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.repositories.post_store import ColumnarPostStore
+from app.schemas import ForumPost
+
+START = datetime(2026, 5, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+
+
+def post(post_id: str, thread_id: str = "t1", content: str = "Hello", **fields) -> ForumPost:
+    fields.setdefault("author", "Sarah Chen")
+    fields.setdefault("created_at", START)
+    return ForumPost(id=post_id, thread_id=thread_id, content=content, **fields)
+
+
+def test_posts_round_trip_unchanged():
+    original = [
+        post("p1", content="Café hours — 9am to 5pm 🚲"),
+        post("p2", content="", author="Moderator", is_ai_moderator=True, created_at=START + timedelta(seconds=1)),
+        post("p3", content="Replying to the café note", parent_post_id="p1", created_at=START + timedelta(minutes=5)),
+    ]
+    store = ColumnarPostStore()
+    store.extend(original)
+    assert store.posts("t1") == original
+
+
+def test_threads_are_scanned_in_append_order():
+    store = ColumnarPostStore()
+    for index, thread_id in enumerate(["t1", "t2", "t1", "t2", "t1"]):
+        store.append_model(post(f"p{index}", thread_id))
+    assert [row.id for row in store.rows("t1")] == ["p0", "p2", "p4"]
+    assert [row.id for row in store.rows("t2")] == ["p1", "p3"]
+    assert (store.count("t1"), store.count("t2"), store.count("missing")) == (3, 2, 0)
+    assert store.rows("missing") == [] and store.posts("missing") == []
+    assert len(store) == 5
+
+
+def test_lookup_by_id_and_duplicate_ids_are_rejected():
+    store = ColumnarPostStore()
+    store.append_model(post("p1", content="First"))
+    assert "p1" in store and "p2" not in store
+    assert store.get("p1").content == "First"
+    assert store.get("p2") is None
+    with pytest.raises(ValueError):
+        store.append_model(post("p1", content="Again"))
+    assert len(store) == 1
+    assert store.get("p1").content == "First"
+
+
+def test_parents_resolve_whether_or_not_they_were_stored_first():
+    store = ColumnarPostStore()
+    store.append_model(post("reply-early", parent_post_id="p-not-loaded"))
+    store.append_model(post("p1"))
+    store.append_model(post("reply", parent_post_id="p1"))
+    store.append_model(post("top"))
+    assert [row.parent_post_id for row in store.rows("t1")] == ["p-not-loaded", None, "p1", None]
+
+
+def test_thread_ids_and_authors_are_stored_once():
+    store = ColumnarPostStore()
+    for index in range(50):
+        store.append_model(post(f"p{index}", f"t{index % 2}", author=["Sarah Chen", "Marcus Johnson"][index % 2]))
+    assert len(store._threads) == 2
+    assert len(store._authors) == 2
+    assert {row.author for row in store.rows("t1")} == {"Marcus Johnson"}
+
+
+def test_the_footprint_grows_with_content():
+    store = ColumnarPostStore()
+    store.append_model(post("p1"))
+    before = store.nbytes()
+    store.append_model(post("p2", content="x" * 10_000))
+    assert store.nbytes() >= before + 10_000
+
+
+def test_readers_scanning_during_writes_only_see_complete_rows():
+    store = ColumnarPostStore()
+    done = threading.Event()
+    problems = []
+
+    def read() -> None:
+        while not done.is_set():
+            for row in store.rows("t1"):
+                model = row.to_model()
+                if model.content != f"Post {model.id} ✓":
+                    problems.append(model)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for index in range(3000):
+            store.append_model(post(str(index), content=f"Post {index} ✓"))
+    finally:
+        done.set()
+        reader.join()
+    assert problems == []
+    assert store.count("t1") == 3000
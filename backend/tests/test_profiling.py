@@ -0,0 +1,82 @@
+"""
+Sampling profiler: sessions stop changing once they end, and the event loop only counts for the request it runs.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.profiling import PROFILER, ProfilingMiddleware, SamplingProfiler
+from app.tracing import TracingMiddleware
+
+
+def _spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _busy_profiled(seconds: float) -> None:
+    _spin(seconds)
+
+
+def _busy_elsewhere(seconds: float) -> None:
+    _spin(seconds)
+
+
+def test_an_ended_session_no_longer_changes():
+    profiler = SamplingProfiler(interval_ms=1.0)
+    stop = threading.Event()
+    worker = threading.Thread(target=lambda: [_spin(0.001) for _ in iter(stop.is_set, True)], daemon=True)
+    worker.start()
+    try:
+        session = profiler.begin("GET", "/x", "header")
+        session.threads.add(worker.ident)
+        deadline = time.monotonic() + 5.0
+        while session.sample_count < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        profiler.end(session, "/x")
+        stacks, count = dict(session.stacks), session.sample_count
+        time.sleep(0.05)
+        assert session.sample_count == count >= 5
+        assert dict(session.stacks) == stacks
+        assert profiler.routes()["/x"]["samples"] == count
+    finally:
+        stop.set()
+        worker.join()
+
+
+def test_event_loop_samples_from_other_requests_are_left_out():
+    async def app(scope, receive, send) -> None:
+        if scope["path"] == "/profiled":
+            _busy_profiled(0.1)
+            await asyncio.sleep(0.3)
+        else:
+            await asyncio.sleep(0.05)
+            _busy_elsewhere(0.2)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = ProfilingMiddleware(TracingMiddleware(app), admin_token="secret")
+
+    async def request(path: str, headers) -> None:
+        scope = {"type": "http", "method": "GET", "path": path, "headers": headers}
+
+        async def send(message) -> None:
+            pass
+
+        await middleware(scope, None, send)
+
+    async def main() -> None:
+        await asyncio.gather(
+            request("/profiled", [(b"x-profile", b"1"), (b"x-admin-token", b"secret")]),
+            request("/other", []),
+        )
+
+    before = {summary["id"] for summary in PROFILER.profiles()}
+    asyncio.run(main())
+    (profile_id,) = {summary["id"] for summary in PROFILER.profiles()} - before
+    folded = PROFILER.get(profile_id).folded()
+    assert "_busy_profiled" in folded
+    assert "_busy_elsewhere" not in folded
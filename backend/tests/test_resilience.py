@@ -0,0 +1,224 @@
+"""
+Resilience layer: circuit breaker, retry classification, retries under a budget, hedging and deadlines.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import List
+
+import httpx
+import pytest
+
+from app.clients.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    Upstream,
+    is_retryable,
+)
+from app.clients.scheduler import QueueTimeoutError
+
+REQUEST = httpx.Request("GET", "https://upstream.invalid/")
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    return httpx.HTTPStatusError(f"HTTP {status}", request=REQUEST, response=httpx.Response(status, request=REQUEST))
+
+
+def _upstream(**overrides) -> Upstream:
+    options = dict(
+        name="test",
+        breaker=CircuitBreaker("test", failure_threshold=5, reset_timeout=30.0),
+        budget=RetryBudget(),
+        timeout=1.0,
+        max_attempts=3,
+        backoff_base=0.001,
+        backoff_max=0.002,
+    )
+    options.update(overrides)
+    return Upstream(**options)
+
+
+class Attempts:
+    """An attempt that fails with the queued errors, then answers ``"ok"``."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.timeouts: List[float] = []
+
+    def __call__(self, timeout: float) -> str:
+        self.timeouts.append(timeout)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_the_breaker_opens_after_consecutive_failures_and_probes_once():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+
+
+def test_a_cancelled_probe_lets_the_next_call_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.cancel_probe()
+    assert breaker.allow()
+
+
+def test_the_breaker_stays_open_until_the_reset_timeout():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert 59.0 < breaker.retry_in() <= 60.0
+
+
+@pytest.mark.parametrize(
+    "exc, retryable",
+    [
+        (httpx.ConnectError("refused", request=REQUEST), True),
+        (httpx.ReadTimeout("slow", request=REQUEST), True),
+        (_status_error(503), True),
+        (_status_error(429), True),
+        (_status_error(400), False),
+        (_status_error(404), False),
+        (TimeoutError(), True),
+        (ValueError("bad body"), False),
+        (CircuitOpenError("test", 1.0), False),
+        (QueueTimeoutError("test", "interactive", 1.0), False),
+    ],
+)
+def test_retryable_errors(exc, retryable):
+    assert is_retryable(exc) is retryable
+
+
+def test_sdk_errors_are_classified_by_status_and_class_name():
+    class ServiceResponseError(Exception):
+        pass
+
+    class ServiceResponseTimeoutError(ServiceResponseError):
+        pass
+
+    class HttpResponseError(Exception):
+        def __init__(self, status_code: int) -> None:
+            super().__init__(status_code)
+            self.status_code = status_code
+
+    assert is_retryable(ServiceResponseTimeoutError())
+    assert is_retryable(HttpResponseError(500))
+    assert not is_retryable(HttpResponseError(409))
+
+
+def test_retryable_failures_are_retried_up_to_max_attempts():
+    attempts = Attempts(_status_error(503), httpx.ConnectError("refused", request=REQUEST))
+    assert _upstream().call(attempts) == "ok"
+    assert len(attempts.timeouts) == 3
+
+    attempts = Attempts(*[_status_error(503)] * 3)
+    with pytest.raises(httpx.HTTPStatusError):
+        _upstream().call(attempts)
+    assert len(attempts.timeouts) == 3
+
+
+def test_non_retryable_failures_and_unsafe_calls_are_not_retried():
+    attempts = Attempts(_status_error(400))
+    upstream = _upstream()
+    with pytest.raises(httpx.HTTPStatusError):
+        upstream.call(attempts)
+    assert len(attempts.timeouts) == 1
+    # The upstream answered, so its breaker counts a success.
+    assert upstream.breaker.failures == 0
+
+    attempts = Attempts(_status_error(503))
+    with pytest.raises(httpx.HTTPStatusError):
+        _upstream().call(attempts, retry=False)
+    assert len(attempts.timeouts) == 1
+
+
+def test_an_empty_retry_budget_stops_retries():
+    budget = RetryBudget(ratio=0.0, min_per_second=0.0, capacity=0.0)
+    attempts = Attempts(_status_error(503))
+    with pytest.raises(httpx.HTTPStatusError):
+        _upstream(budget=budget).call(attempts)
+    assert len(attempts.timeouts) == 1
+
+
+def test_the_retry_budget_refills_from_calls():
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, capacity=1.0)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_an_open_circuit_fails_fast_without_calling_the_upstream():
+    upstream = _upstream(breaker=CircuitBreaker("test", failure_threshold=2, reset_timeout=60.0))
+    attempts = Attempts(*[_status_error(503)] * 2)
+    with pytest.raises(httpx.HTTPStatusError):
+        upstream.call(attempts)
+    assert upstream.breaker.state == OPEN
+
+    calls = len(attempts.timeouts)
+    with pytest.raises(CircuitOpenError):
+        upstream.call(attempts)
+    assert len(attempts.timeouts) == calls
+
+
+def test_attempt_timeouts_are_cut_to_the_remaining_deadline():
+    timeouts: List[float] = []
+
+    def attempt(timeout: float) -> str:
+        timeouts.append(timeout)
+        if len(timeouts) == 1:
+            time.sleep(0.15)
+            raise _status_error(503)
+        return "ok"
+
+    _upstream(timeout=0.2, deadline=0.3, backoff_base=0.0, backoff_max=0.0).call(attempt)
+    first, second = timeouts
+    assert first == 0.2
+    assert second <= 0.15
+
+
+def test_hedging_returns_the_first_answer():
+    calls = []
+    lock = threading.Lock()
+
+    def attempt(timeout: float) -> str:
+        with lock:
+            calls.append(timeout)
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.5)
+            return "primary"
+        return "hedge"
+
+    started = time.monotonic()
+    assert _upstream(hedge_after=0.02).call(attempt, hedge=True) == "hedge"
+    assert time.monotonic() - started < 0.4
+    assert len(calls) == 2
+
+
+def test_fast_answers_are_not_hedged():
+    attempts = Attempts()
+    assert _upstream(hedge_after=0.5).call(attempts, hedge=True) == "ok"
+    assert len(attempts.timeouts) == 1
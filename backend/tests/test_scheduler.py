@@ -0,0 +1,102 @@
+"""
+Upstream scheduler: slot limits, the interactive reserve, weighted fair queuing and queue timeouts.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import List
+
+import pytest
+
+from app.clients.errors import UpstreamUnavailable
+from app.clients.scheduler import (
+    BACKGROUND,
+    BATCH,
+    INTERACTIVE,
+    PriorityLimiter,
+    QueueTimeoutError,
+    call_priority,
+    current_priority,
+)
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+def test_calls_queue_for_a_slot_and_time_out():
+    limiter = PriorityLimiter("test", 1, 0)
+    limiter.acquire(INTERACTIVE)
+    with pytest.raises(QueueTimeoutError) as raised:
+        limiter.acquire(INTERACTIVE, timeout=0.02)
+    assert isinstance(raised.value, UpstreamUnavailable)
+    assert raised.value.upstream == "test"
+    assert limiter.queued(INTERACTIVE) == 0
+    limiter.release(INTERACTIVE)
+    with limiter.slot(INTERACTIVE, timeout=0.02):
+        assert limiter.in_flight == 1
+    assert limiter.in_flight == 0
+
+
+def test_background_calls_leave_the_reserve_to_interactive_ones():
+    limiter = PriorityLimiter("test", 2, 1)
+    limiter.acquire(BACKGROUND)
+    with pytest.raises(QueueTimeoutError):
+        limiter.acquire(BATCH, timeout=0.02)
+    limiter.acquire(INTERACTIVE, timeout=0.02)
+    assert limiter.in_flight == 2
+
+
+def test_freed_slots_go_to_interactive_calls_first():
+    limiter = PriorityLimiter("test", 1, 0)
+    limiter.acquire(INTERACTIVE)
+    order: List[str] = []
+
+    def waiter(priority: str) -> None:
+        with limiter.slot(priority, timeout=2.0):
+            order.append(priority)
+
+    background = threading.Thread(target=waiter, args=(BACKGROUND,))
+    background.start()
+    _wait_for(lambda: limiter.queued(BACKGROUND) == 1)
+    interactive = threading.Thread(target=waiter, args=(INTERACTIVE,))
+    interactive.start()
+    _wait_for(lambda: limiter.queued(INTERACTIVE) == 1)
+    limiter.release(INTERACTIVE)
+    background.join()
+    interactive.join()
+    assert order == [INTERACTIVE, BACKGROUND]
+
+
+def test_background_and_batch_share_slots_three_to_one():
+    limiter = PriorityLimiter("test", 1, 0)
+    limiter.acquire(INTERACTIVE)
+    order: List[str] = []
+    threads = []
+    for priority in (BACKGROUND, BATCH):
+        for _ in range(8):
+            thread = threading.Thread(target=lambda p=priority: (limiter.acquire(p, 5.0), order.append(p), limiter.release(p)))
+            thread.start()
+            threads.append(thread)
+    _wait_for(lambda: limiter.queued(BACKGROUND) == 8 and limiter.queued(BATCH) == 8)
+    limiter.release(INTERACTIVE)
+    for thread in threads:
+        thread.join()
+    assert order[:8].count(BACKGROUND) == 6
+    assert order[:8].count(BATCH) == 2
+    assert sorted(order) == sorted([BACKGROUND] * 8 + [BATCH] * 8)
+
+
+def test_call_priority_is_scoped_to_the_block():
+    assert current_priority() == INTERACTIVE
+    with call_priority(BATCH):
+        assert current_priority() == BATCH
+    assert current_priority() == INTERACTIVE
+    with pytest.raises(ValueError):
+        with call_priority("urgent"):
+            pass
@@ -0,0 +1,45 @@
+"""
+Live snapshot metrics: the policy baseline and its hand-over through the warm-start snapshot.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+from app.schemas import Metric
+from app.snapshot_metrics import POLICY_CHANGES, SnapshotMetricsAggregator
+
+TODAY = date(2024, 6, 10)
+FALLBACK = [Metric(label=POLICY_CHANGES, value=4, trend="+12%")]
+POLICIES = [{"id": str(index), "title": f"Policy {index}", "status": "Proposed"} for index in range(10)]
+
+
+def _aggregator() -> SnapshotMetricsAggregator:
+    return SnapshotMetricsAggregator(window_days=7, today=lambda: TODAY)
+
+
+def test_the_first_policy_list_is_a_baseline_not_a_change():
+    metrics = _aggregator()
+    metrics.ingest_policies(POLICIES)
+    assert metrics.metrics(FALLBACK) == FALLBACK
+
+    changed = [dict(POLICIES[0], status="Adopted"), *POLICIES[1:], {"id": "new", "title": "New", "status": "Proposed"}]
+    metrics.ingest_policies(changed)
+    assert metrics.metrics(FALLBACK) == [Metric(label=POLICY_CHANGES, value=2, trend="+100%")]
+
+
+def test_a_new_worker_continues_from_the_saved_policy_state():
+    first = _aggregator()
+    first.ingest_policies(POLICIES)
+    first.ingest_policies([dict(POLICIES[0], status="Adopted"), *POLICIES[1:]])
+
+    second = _aggregator()
+    second.restore_policies(first.policy_state())
+    second.ingest_policies([dict(POLICIES[0], status="Adopted"), *POLICIES[1:]])
+    assert second.metrics(FALLBACK) == first.metrics(FALLBACK) == [Metric(label=POLICY_CHANGES, value=1, trend="+100%")]
+
+
+def test_a_saved_state_does_not_replace_policies_already_ingested():
+    metrics = _aggregator()
+    metrics.ingest_policies(POLICIES)
+    metrics.restore_policies({"policies": {}, "changes": {TODAY.isoformat(): 50}})
+    assert metrics.metrics(FALLBACK) == FALLBACK
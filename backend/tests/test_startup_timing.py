@@ -0,0 +1,35 @@
+"""
+Cold-start timing: only the server entry point installs the import timer.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+_PROBE = """
+import json, sys
+import {module}
+from app.startup_timing import STARTUP
+print(json.dumps({{"installed": STARTUP.timer in sys.meta_path, "fastapi": "fastapi" in STARTUP.timer.modules}}))
+"""
+
+
+def _probe(module: str) -> dict:
+    env = {**os.environ, "WARM_START_ENABLED": "false"}
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)], cwd=BACKEND, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_importing_the_app_package_leaves_imports_untimed():
+    assert _probe("app.main") == {"installed": False, "fastapi": False}
+
+
+def test_the_server_entry_point_times_framework_imports():
+    assert _probe("app.asgi") == {"installed": True, "fastapi": True}
@@ -0,0 +1,101 @@
+"""
+Logging pipeline: per-logger sampling, the non-blocking queue handler and the text and JSON output formats.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import queue
+from typing import Iterator
+
+import pytest
+
+from app.structured_logging import (
+    LOG_DROPPED,
+    LogQueueHandler,
+    SamplingFilter,
+    configure_logging,
+    shutdown_logging,
+)
+from app.tracing import TRACER
+
+
+def record(name: str, level: int = logging.INFO, msg: str = "hello %s", args: tuple = ("world",)) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_the_longest_matching_prefix_sets_the_rate():
+    sampler = SamplingFilter({"app": 1.0, "app.main.fields": 0.0})
+    assert sampler.filter(record("app.main"))
+    assert not sampler.filter(record("app.main.fields"))
+    assert not sampler.filter(record("app.main.fields.child"))
+    assert sampler.filter(record("app.main.fieldsets"))
+
+
+def test_warnings_are_never_sampled_and_drops_are_counted():
+    sampler = SamplingFilter({"noisy": 0.0})
+    before = LOG_DROPPED.value(reason="sampled")
+    assert sampler.filter(record("noisy", logging.WARNING))
+    assert not sampler.filter(record("noisy", logging.DEBUG))
+    assert LOG_DROPPED.value(reason="sampled") == before + 1
+
+
+def test_the_queue_handler_stamps_the_trace_and_leaves_formatting_to_the_listener():
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    handler = LogQueueHandler(records)
+    with TRACER.start_span("request") as span:
+        handler.emit(record("app"))
+    queued = records.get_nowait()
+    assert (queued.trace_id, queued.span_id) == (span.trace_id, span.span_id)
+    assert (queued.msg, queued.args) == ("hello %s", ("world",))
+    assert not hasattr(queued, "message")
+
+
+def test_a_full_queue_drops_the_record_instead_of_blocking():
+    handler = LogQueueHandler(queue.Queue(maxsize=1))
+    before = LOG_DROPPED.value(reason="queue_full")
+    handler.emit(record("app"))
+    handler.emit(record("app"))
+    assert LOG_DROPPED.value(reason="queue_full") == before + 1
+
+
+@pytest.fixture
+def root_logger() -> Iterator[logging.Logger]:
+    root = logging.getLogger()
+    level = root.level
+    yield root
+    shutdown_logging()
+    for handler in [h for h in root.handlers if isinstance(h, LogQueueHandler)]:
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+
+def test_text_is_the_default_format(root_logger, capsys):
+    configure_logging()
+    logging.getLogger("app.test").info("ready in %d ms", 12)
+    shutdown_logging()
+    assert capsys.readouterr().out.rstrip().endswith("INFO app.test: ready in 12 ms")
+
+
+def test_json_lines_carry_trace_ids_and_extra_fields(root_logger, capsys):
+    configure_logging(log_format="json")
+    with TRACER.start_span("request") as span:
+        logging.getLogger("app.test").info("chat answered", extra={"message_chars": 42})
+    shutdown_logging()
+    entry = json.loads(capsys.readouterr().out)
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["message"] == "chat answered"
+    assert entry["message_chars"] == 42
+    assert entry["trace_id"] == span.trace_id
+
+
+def test_configuring_again_replaces_the_pipeline(root_logger, capsys):
+    configure_logging(level="WARNING", sample_rates={"app": 0.0})
+    configure_logging(level="DEBUG")
+    assert len([h for h in root_logger.handlers if isinstance(h, LogQueueHandler)]) == 1
+    assert root_logger.level == logging.DEBUG
+    assert logging.getLogger("httpx").level == logging.WARNING
+    logging.getLogger("app.test").debug("kept")
+    shutdown_logging()
+    assert "kept" in capsys.readouterr().out
@@ -0,0 +1,128 @@
+"""
+Vote counting: dedupe through shared storage and the other workers' totals read back into the tally.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Set, Tuple
+
+import pytest
+
+from app.repositories.votes import VoteCounter
+from app.schemas import Election
+
+
+class SharedVoteStore:
+    """What the Cosmos votes container provides: one document per voter, and a total per election and worker."""
+
+    def __init__(self) -> None:
+        self.voters: Set[Tuple[str, int]] = set()
+        self.totals: Dict[str, Dict[str, int]] = {}
+        self.failing = False
+
+    def counter(self, node: str) -> VoteCounter:
+        def claim(election_id: str, fingerprint: int) -> bool:
+            if self.failing:
+                raise ConnectionError("storage is down")
+            if (election_id, fingerprint) in self.voters:
+                return False
+            self.voters.add((election_id, fingerprint))
+            return True
+
+        def sink(totals: Dict[str, int]) -> None:
+            self.totals.setdefault(node, {}).update(totals)
+
+        def load(election_ids: List[str]) -> Dict[str, int]:
+            stored: Dict[str, int] = {}
+            for other, totals in self.totals.items():
+                if other != node:
+                    for election_id, votes in totals.items():
+                        stored[election_id] = stored.get(election_id, 0) + votes
+            return stored
+
+        return VoteCounter(shards=4, refresh_interval=60.0, flush_interval=60.0, sink=sink, claim=claim, load=load)
+
+
+@pytest.fixture
+def store():
+    return SharedVoteStore()
+
+
+def test_a_voter_counts_once_across_workers(store):
+    first, second = store.counter("host-1"), store.counter("host-2")
+    try:
+        assert first.vote("elex-1", "alice")
+        assert not first.vote("elex-1", "alice")
+        assert not second.vote("elex-1", "alice")
+        assert second.vote("elex-1", "bob")
+        assert second.vote("elex-2", "alice")
+    finally:
+        first.close()
+        second.close()
+    assert store.totals == {"host-1": {"elex-1": 1}, "host-2": {"elex-1": 1, "elex-2": 1}}
+
+
+def test_the_tally_includes_the_other_workers_and_earlier_runs(store):
+    earlier = store.counter("host-1")
+    earlier.vote("elex-1", "alice")
+    earlier.close()
+
+    restarted, sibling = store.counter("host-2"), store.counter("host-3")
+    try:
+        restarted.register([Election(id="elex-1", title="Budget vote", description="", stance="", votes=100)])
+        assert not restarted.vote("elex-1", "alice")
+        sibling.vote("elex-1", "bob")
+        sibling.flush()
+        restarted.vote("elex-1", "carol")
+        restarted.flush()
+        assert restarted.votes("elex-1") == 103
+    finally:
+        restarted.close()
+        sibling.close()
+
+
+def test_a_failed_claim_leaves_the_vote_uncounted(store):
+    counter = store.counter("host-1")
+    try:
+        store.failing = True
+        with pytest.raises(ConnectionError):
+            counter.vote("elex-1", "alice")
+        store.failing = False
+        assert counter.vote("elex-1", "alice")
+        assert counter.refresh() == {"elex-1": 1}
+    finally:
+        counter.close()
+
+
+def test_without_shared_storage_several_workers_cannot_vote(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.config import get_settings
+    from app.main import app, get_votes
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    get_settings.cache_clear()
+    get_votes.cache_clear()
+    try:
+        response = TestClient(app).post("/api/dashboard/elections/elex-1/votes", json={"voter_id": "alice"})
+        assert response.status_code == 503
+        assert not get_votes().shared
+    finally:
+        get_votes().close()
+        get_votes.cache_clear()
+        get_settings.cache_clear()
+
+
+def test_voters_and_totals_round_trip_through_the_cosmos_votes_container(upstreams):
+    from app.clients.cosmos import CosmosBatchClient
+    from app.main import _stored_votes, _vote_sink, _voter_claim
+
+    client = CosmosBatchClient("votes")
+    claim = _voter_claim(client)
+    assert claim("elex-cosmos", 42)
+    assert not claim("elex-cosmos", 42)
+
+    _vote_sink(client, "host-1")({"elex-cosmos": 3})
+    _vote_sink(client, "host-2")({"elex-cosmos": 2})
+    # Each worker reads the others' totals; voter documents carry no node and are not counted.
+    assert _stored_votes(client, "host-2")(["elex-cosmos", "elex-none"]) == {"elex-cosmos": 3, "elex-none": 0}
+    assert _stored_votes(client, "host-3")(["elex-cosmos"]) == {"elex-cosmos": 5}
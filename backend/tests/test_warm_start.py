@@ -0,0 +1,120 @@
+"""
+Warm-start snapshots: the file format, loading outcomes, and which dashboard payloads count as last-good.
+"""
+from __future__ import annotations
+
+import struct
+import time
+
+import pytest
+
+from app.cache import LocalCacheBackend
+from app.clients.faults import FAULTS
+from app.repositories.dashboard import WARM_START_SECTION, DashboardRepository
+from app.sample_data import STUB_DASHBOARD
+from app.warm_start import (
+    FORMAT_VERSION,
+    MAGIC,
+    WARM_START,
+    SnapshotFormatError,
+    WarmStartStore,
+    decode_snapshot,
+    encode_snapshot,
+    write_snapshot,
+)
+
+SECTIONS = {"dashboard": {"stories": [{"title": "Bike lanes"}], "events": []}, "alerts": [1, 2, 3]}
+
+
+def store(path, max_age: float = 3600.0) -> WarmStartStore:
+    warm = WarmStartStore()
+    warm.configure(str(path), interval=60.0, max_age=max_age)
+    return warm
+
+
+def test_sections_round_trip():
+    written_at, sections = decode_snapshot(encode_snapshot(SECTIONS, written_at=1234.5))
+    assert written_at == 1234.5
+    assert sections == SECTIONS
+
+
+def test_a_corrupt_section_is_skipped_and_the_rest_load():
+    data = bytearray(encode_snapshot(SECTIONS))
+    # Flip the last byte of the final body, which belongs to the last section.
+    data[-1] ^= 0xFF
+    _, sections = decode_snapshot(bytes(data))
+    assert sections == {"dashboard": SECTIONS["dashboard"]}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"NOTWARM\0" + encode_snapshot({})[8:],
+        struct.pack("<8sHHd", MAGIC, FORMAT_VERSION + 1, 0, time.time()),
+        struct.pack("<8sHHd", MAGIC, FORMAT_VERSION, 2, time.time()),
+    ],
+    ids=["empty", "magic", "version", "truncated-table"],
+)
+def test_files_this_version_cannot_read_are_rejected(data):
+    with pytest.raises(SnapshotFormatError):
+        decode_snapshot(data)
+
+
+def test_long_section_names_are_rejected():
+    with pytest.raises(ValueError):
+        encode_snapshot({"a-very-long-section-name": 1})
+
+
+def test_a_saved_store_loads_in_the_next_worker(tmp_path):
+    path = tmp_path / "warm.bin"
+    first = store(path)
+    first.put("dashboard", SECTIONS["dashboard"])
+    assert first.save()
+    assert not first.save()
+    assert store(path).load() == {"dashboard": SECTIONS["dashboard"]}
+
+
+def test_a_missing_file_starts_cold(tmp_path):
+    assert store(tmp_path / "absent.bin").load() == {}
+
+
+def test_a_stale_file_starts_cold(tmp_path):
+    path = tmp_path / "warm.bin"
+    write_snapshot(str(path), SECTIONS)
+    assert store(path, max_age=3600.0).load() == SECTIONS
+    stale = store(path, max_age=0.001)
+    time.sleep(0.01)
+    assert stale.load() == {}
+    assert stale.get("dashboard") is None
+
+
+def test_values_recorded_since_startup_beat_the_file(tmp_path):
+    path = tmp_path / "warm.bin"
+    write_snapshot(str(path), SECTIONS)
+    warm = store(path)
+    warm.put("alerts", [9])
+    warm.load()
+    assert warm.get("alerts") == [9]
+    assert warm.get("dashboard") == SECTIONS["dashboard"]
+
+
+@pytest.fixture
+def cosmos_down(upstreams, monkeypatch):
+    monkeypatch.setattr(WARM_START, "_sections", {})
+    FAULTS.configure({"cosmos": {"error_rate": 1.0, "error": "connect"}})
+    return upstreams
+
+
+def test_the_stub_with_live_feed_events_is_not_stored_as_last_good(cosmos_down):
+    payload = DashboardRepository(cache=LocalCacheBackend())._load_payload()
+    assert payload["stories"] == STUB_DASHBOARD["stories"]
+    assert WARM_START.get(WARM_START_SECTION) is None
+
+
+def test_an_earlier_last_good_payload_is_served_and_kept(cosmos_down):
+    last_good = {**STUB_DASHBOARD, "stories": [], "events": []}
+    WARM_START.put(WARM_START_SECTION, last_good)
+    payload = DashboardRepository(cache=LocalCacheBackend())._load_payload()
+    assert payload["stories"] == []
+    assert WARM_START.get(WARM_START_SECTION)["stories"] == []
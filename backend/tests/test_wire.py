@@ -0,0 +1,25 @@
+"""
+Response shaping: identifying fields survive a `fields=` projection.
+"""
+from __future__ import annotations
+
+import pytest
+from fastapi import HTTPException
+
+from app.schemas import Event, ForumSearchHit
+from app.wire import parse_fields
+
+
+def test_projections_keep_the_id():
+    assert parse_fields("name,venue", Event) == {"id", "name", "venue"}
+
+
+def test_search_hit_projections_keep_the_fields_that_identify_a_hit():
+    assert parse_fields("snippet", ForumSearchHit) == {"snippet", "kind", "thread_id", "post_id"}
+    assert "identity_fields" not in ForumSearchHit.model_fields
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(HTTPException) as raised:
+        parse_fields("id,nope", Event)
+    assert raised.value.status_code == 400
@@ -0,0 +1,216 @@
+"""
+Forum write-behind: group commits, backpressure, and threads read back from what was written.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import pytest
+
+from app.repositories.forum import ForumRepository, ForumStoreUnavailable
+from app.repositories.write_behind import GroupCommitWriter, WriteBackpressureError
+
+
+class RecordingSink:
+    """Collects every batch written; ``gate`` holds writes back until it is set."""
+
+    def __init__(self) -> None:
+        self.batches: List[Tuple[str, List[Dict]]] = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, partition: str, documents: Sequence[Dict]) -> None:
+        self.gate.wait(5)
+        with self._lock:
+            self.batches.append((partition, list(documents)))
+
+    def documents(self) -> List[Dict]:
+        return [document for _, documents in self.batches for document in documents]
+
+
+def doc(identifier: str, **fields) -> Dict:
+    return {"id": identifier, **fields}
+
+
+def test_a_full_batch_is_written_without_waiting_for_the_interval():
+    sink = RecordingSink()
+    writer = GroupCommitWriter(sink, max_batch=3, flush_interval=30.0)
+    writer.submit("t1", doc("a"), doc("b"), doc("c"))
+    assert writer.flush(2.0)
+    assert sink.batches == [("t1", [doc("a"), doc("b"), doc("c")])]
+    writer.close()
+
+
+def test_documents_submitted_within_the_interval_share_one_batch():
+    sink = RecordingSink()
+    writer = GroupCommitWriter(sink, max_batch=100, flush_interval=0.2)
+    for identifier in "abcde":
+        writer.submit("t1", doc(identifier))
+    time.sleep(0.5)
+    assert [len(documents) for _, documents in sink.batches] == [5]
+    writer.close()
+
+
+def test_batches_are_grouped_by_partition_and_split_at_max_batch():
+    sink = RecordingSink()
+    writer = GroupCommitWriter(sink, max_batch=2, flush_interval=30.0, max_pending=10)
+    sink.gate.clear()
+    writer.submit("t1", doc("x"))
+    writer.submit("t1", doc("y"))
+    # The flusher now holds the first batch; the next ones queue up behind it.
+    writer.submit("t1", doc("a"))
+    writer.submit("t2", doc("b"))
+    writer.submit("t1", doc("c"))
+    writer.submit("t1", doc("d"))
+    sink.gate.set()
+    assert writer.flush(2.0)
+    assert all(len(documents) <= 2 for _, documents in sink.batches)
+    assert {partition for partition, documents in sink.batches if doc("b") in documents} == {"t2"}
+    assert [d["id"] for partition, documents in sink.batches if partition == "t1" for d in documents] == ["x", "y", "a", "c", "d"]
+    writer.close()
+
+
+def test_the_last_write_of_a_document_wins_within_a_flush():
+    sink = RecordingSink()
+    writer = GroupCommitWriter(sink, max_batch=100, flush_interval=0.1)
+    writer.submit("t1", doc("post-1"), doc("t1", post_count=1))
+    writer.submit("t1", doc("post-2"), doc("t1", post_count=2))
+    assert writer.flush(2.0)
+    assert sink.batches == [("t1", [doc("post-1"), doc("post-2"), doc("t1", post_count=2)])]
+    writer.close()
+
+
+def test_close_flushes_everything_still_buffered():
+    sink = RecordingSink()
+    writer = GroupCommitWriter(sink, max_batch=100, flush_interval=30.0)
+    writer.submit("t1", doc("a"))
+    writer.submit("t2", doc("b"))
+    assert writer.close(2.0)
+    assert sorted(d["id"] for d in sink.documents()) == ["a", "b"]
+    with pytest.raises(RuntimeError):
+        writer.submit("t1", doc("c"))
+
+
+def test_a_failing_batch_is_retried_and_then_dropped(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    attempts = []
+
+    def sink(partition: str, documents: Sequence[Dict]) -> None:
+        attempts.append(partition)
+        raise ConnectionError("down")
+
+    writer = GroupCommitWriter(sink, max_batch=10, flush_interval=0.0, max_attempts=3)
+    writer.submit("t1", doc("a"))
+    assert writer.flush(2.0)
+    assert attempts == ["t1", "t1", "t1"]
+    writer.close()
+
+
+def test_submit_blocks_while_the_queue_is_full_and_times_out():
+    sink = RecordingSink()
+    sink.gate.clear()
+    writer = GroupCommitWriter(sink, max_batch=1, flush_interval=0.0, max_pending=1)
+    writer.submit("t1", doc("a"))
+    # Wait for the flusher to take it; the sink is stuck, so the next document fills the queue.
+    deadline = time.monotonic() + 2.0
+    while writer._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.submit("t1", doc("b"))
+    started = time.monotonic()
+    with pytest.raises(WriteBackpressureError):
+        writer.submit("t1", doc("c"), timeout=0.1)
+    assert 0.1 <= time.monotonic() - started < 1.0
+
+    # Once the sink drains, a blocked submit gets through.
+    threading.Timer(0.1, sink.gate.set).start()
+    writer.submit("t1", doc("c"), timeout=2.0)
+    assert writer.close(2.0)
+    assert [d["id"] for d in sink.documents()] == ["a", "b", "c"]
+
+
+class ForumStore:
+    """The forum container: documents per thread partition, written by the writer and read back by ``load``."""
+
+    def __init__(self) -> None:
+        self.partitions: Dict[str, Dict[str, Dict]] = {}
+        self.failing = False
+
+    def write(self, partition: str, documents: Sequence[Dict]) -> None:
+        stored = self.partitions.setdefault(partition, {})
+        for document in documents:
+            stored[document["id"]] = dict(document)
+
+    def load(self, thread_id: str) -> List[Dict]:
+        if self.failing:
+            raise ConnectionError("Cosmos is down")
+        return list(self.partitions.get(thread_id, {}).values())
+
+    def repository(self) -> Tuple[ForumRepository, GroupCommitWriter]:
+        writer = GroupCommitWriter(self.write, flush_interval=0.0)
+        return ForumRepository(writer=writer, load=self.load), writer
+
+
+def test_a_restarted_worker_loads_stored_posts_instead_of_reseeding():
+    store = ForumStore()
+    first, writer = store.repository()
+    thread = first.fetch_forum_threads().threads[0]
+    post = first.create_post(thread.id, "Stored for later")
+    assert writer.close(2.0)
+    before = first.fetch_thread_detail(thread.id)
+
+    second, writer = store.repository()
+    after = second.fetch_thread_detail(thread.id)
+    assert [p.id for p in after.posts] == [p.id for p in before.posts]
+    assert after.posts[-1].id == post.id
+    assert after.thread.post_count == before.thread.post_count
+    assert after.thread.last_activity == before.thread.last_activity
+
+    # The next write extends the stored counters rather than overwriting them with a fresh seed.
+    second.create_post(thread.id, "One more")
+    assert writer.close(2.0)
+    assert store.partitions[thread.id][thread.id]["post_count"] == before.thread.post_count + 1
+    writer.close()
+
+
+def test_a_thread_whose_posts_cannot_be_loaded_is_not_reseeded():
+    store = ForumStore()
+    seeded, writer = store.repository()
+    thread_id = seeded.fetch_forum_threads().threads[0].id
+    assert writer.close(2.0)
+
+    store.failing = True
+    repo, writer = store.repository()
+    assert repo.fetch_forum_threads().threads == []
+    with pytest.raises(ForumStoreUnavailable):
+        repo.create_post(thread_id, "Lost?")
+    with pytest.raises(ForumStoreUnavailable):
+        repo.fetch_thread_detail(thread_id)
+
+    store.failing = False
+    assert repo.fetch_thread_detail(thread_id) is not None
+    writer.close()
+
+
+def test_a_full_write_queue_refuses_the_post_without_storing_it(monkeypatch):
+    monkeypatch.setenv("FORUM_WRITE_SUBMIT_TIMEOUT_SECONDS", "0.05")
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+    store = ForumStore()
+    repo, writer = store.repository()
+    thread = repo.fetch_forum_threads().threads[0]
+    detail = repo.fetch_thread_detail(thread.id)
+
+    def refuse(*args, **kwargs):
+        raise WriteBackpressureError("queue full")
+
+    monkeypatch.setattr(writer, "submit", refuse)
+    with pytest.raises(ForumStoreUnavailable):
+        repo.create_post(thread.id, "Refused")
+    assert repo.fetch_thread_detail(thread.id).thread.post_count == detail.thread.post_count
+    assert len(repo.fetch_thread_detail(thread.id).posts) == len(detail.posts)
+    writer.close()
+    get_settings.cache_clear()
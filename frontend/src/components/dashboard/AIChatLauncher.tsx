@@ -111,6 +111,7 @@ export const AIChatLauncher = ({ summary, isOpen: controlledIsOpen, onOpen, onCl
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [currentSources, setCurrentSources] = useState<Source[]>([]);
+  const [sessionId, setSessionId] = useState<string | undefined>();
   const messagesEndRef = useRef<HTMLDivElement>(null);
   
   const isOpen = controlledIsOpen !== undefined ? controlledIsOpen : internalIsOpen;
@@ -150,7 +151,8 @@ export const AIChatLauncher = ({ summary, isOpen: controlledIsOpen, onOpen, onCl
     setCurrentSources([]);
 
     try {
-      const response = await sendChatMessage(messageText);
+      const response = await sendChatMessage(messageText, sessionId);
+      setSessionId(response.session_id);
       
       const assistantMessage: ChatMessage = {
         id: `msg-${Date.now()}-assistant`,
@@ -186,6 +188,13 @@ export const AIChatLauncher = ({ summary, isOpen: controlledIsOpen, onOpen, onCl
     handleSendMessage(question);
   };
 
+  const handleNewConversation = () => {
+    setSessionId(undefined);
+    setMessages([]);
+    setCurrentSources([]);
+    setError(null);
+  };
+
   useEffect(() => {
     const handleEscape = (event: KeyboardEvent) => {
       if (event.key === "Escape") {
@@ -336,7 +345,11 @@ export const AIChatLauncher = ({ summary, isOpen: controlledIsOpen, onOpen, onCl
               <aside className="hidden w-full max-w-sm border-t border-slate-200 px-6 py-4 lg:block lg:border-l lg:border-t-0 overflow-y-auto">
                 <div className="flex items-center justify-between">
                   <h3 className="text-sm font-semibold text-slate-900">Chat History</h3>
-                  <button className="inline-flex items-center gap-1 text-xs font-semibold text-indigo-600">
+                  <button
+                    type="button"
+                    onClick={handleNewConversation}
+                    className="inline-flex items-center gap-1 text-xs font-semibold text-indigo-600"
+                  >
                     <FaPlus className="h-3 w-3" /> New Conversation
                   </button>
                 </div>
@@ -23,8 +23,10 @@ export const fetchServiceAlerts = async (): Promise<ServiceAlertsResponse> => {
   return data;
 };
 
-export const sendChatMessage = async (message: string): Promise<ChatResponse> => {
-  const { data } = await api.post<ChatResponse>("/chat", { message } as ChatRequest);
+// Pass the session_id from the previous response to continue a conversation; the server issues a new one
+// when it is omitted, unknown or expired.
+export const sendChatMessage = async (message: string, sessionId?: string): Promise<ChatResponse> => {
+  const { data } = await api.post<ChatResponse>("/chat", { message, session_id: sessionId } as ChatRequest);
   return data;
 };
 
@@ -16,10 +16,12 @@ export type ChatMessage = {
 
 export type ChatRequest = {
   message: string;
+  session_id?: string;
 };
 
 export type ChatResponse = {
   response: string;
   sources: Source[];
+  session_id?: string;
 };
 
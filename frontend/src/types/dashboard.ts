@@ -38,6 +38,12 @@ export type Discussion = {
   last_active_minutes: number;
 };
 
+export type EventOccurrence = {
+  id?: string;
+  start_time: string;
+  end_time: string;
+};
+
 export type Event = {
   id: string;
   name: string;
@@ -49,6 +55,7 @@ export type Event = {
   description?: string;
   website_url?: string;
   address?: string;
+  occurrences?: EventOccurrence[] | null;
 };
 
 export type Election = {